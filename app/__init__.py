@@ -2,19 +2,37 @@ from flask import Flask
 from app.extensions import db, migrate, dbm
 from app import models
 from config import Config
+from utils.sqlite import is_sqlite_file, sqlite_engine_options, apply_sqlite_pragmas
+from utils.signed_token import check_secret_key
 
 
 def create_app(config_object=Config):
     _app = Flask(__name__)
     _app.config.from_object(config_object)
+    if _app.config["TOKEN_MODE"] == "signed":
+        check_secret_key(_app.config["SECRET_KEY"])
     register_extensions(_app)
     return _app
 
 
 def register_extensions(_app):
+    if is_sqlite_file(_app.config["SQLALCHEMY_DATABASE_URI"]):
+        _app.config.setdefault(
+            "SQLALCHEMY_ENGINE_OPTIONS",
+            sqlite_engine_options(_app.config["SQLITE_POOL_SIZE"]),
+        )
     db.init_app(_app)
+    with _app.app_context():
+        apply_sqlite_pragmas(db.engine, _app.config["SQLITE_PRAGMAS"])
     migrate.init_app(_app, db)
-    dbm.init_db(db, models)
+    dbm.init_db(
+        db,
+        models,
+        token_cache_size=_app.config["TOKEN_CACHE_SIZE"],
+        revocation_refresh_sec=_app.config["REVOCATION_REFRESH_SEC"],
+        group_commit_window_ms=_app.config["GROUP_COMMIT_WINDOW_MS"],
+        results_cache_size=_app.config["RESULTS_CACHE_SIZE"],
+    )
     # gm.init_dbm(dbm)
 
 
@@ -0,0 +1,264 @@
+"""
+ASGI entry point of the API: "uvicorn app.asgi:application", or
+HTS_APP=app.asgi:application HTS_WORKER_CLASS=uvicorn.workers.UvicornWorker
+./start_server.sh start
+The routes and functions are the same as in the WSGI server, they run in
+a thread pool. Only waiting happens on the event loop: a results request
+with "wait" (seconds) and a matching If-None-Match is held until the
+tournament changes, so idle spectators cost a coroutine instead of a thread
+"""
+
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, IO, Optional, Set, Tuple
+
+from flask import Response
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import app, functions, models
+from utils.sqlite import is_sqlite_file, apply_sqlite_pragmas
+from utils.wsgi_bridge import read_body, run_wsgi
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+WATCHED_SCOPES = {"round": models.Round, "subround": models.Subround}
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+LONG_POLLS = {  # path -> (scope, pretty)
+    "/api/v1/round/results": ("round", False),
+    "/api/v1/round/results/pretty": ("round", True),
+    "/api/v1/subround/results": ("subround", False),
+    "/api/v1/subround/results/pretty": ("subround", True),
+}
+RESULT_FUNCTIONS = {
+    "round": functions.get_round_result,
+    "subround": functions.get_subround_result,
+}
+
+Watched = Tuple[str, int]  # (scope, id)
+
+logger = logging.getLogger(__name__)
+
+
+def async_database_uri(uri: str) -> str:
+    url = make_url(uri)
+    return str(url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)))
+
+
+def version_statement(scope: str, scope_id: int):
+    """
+    :return: select of the version of the tournament owning the round or subround
+    """
+    m = models
+    model = WATCHED_SCOPES[scope]
+    statement = select(m.Tournament.version).select_from(model)
+    if model is m.Subround:
+        statement = statement.join(m.Round, m.Subround.round_id == m.Round.id)
+    statement = statement.join(m.Tournament, m.Round.tournament_id == m.Tournament.id)
+    return statement.where(model.id == scope_id)
+
+
+class Watch:
+    def __init__(self) -> None:
+        self.version: Optional[int] = None  # None until read, -1 if deleted
+        self.changed = asyncio.Event()  # Replaced after every change
+        self.waiters = 0
+
+
+class VersionWatcher:
+    """
+    Re-reads the tournament version of every watched round or subround with
+    an async session, once per interval and once after each write served by
+    this process. One task per watched object, however many clients wait on it
+    """
+
+    def __init__(self, sessions: Callable[[], AsyncSession], interval_sec: float):
+        self.sessions = sessions
+        self.interval_sec = interval_sec
+        self.watches: Dict[Watched, Watch] = dict()
+        self.tasks: Set[asyncio.Task] = set()  # Referenced until done
+        self.poked = asyncio.Event()
+
+    def poke(self) -> None:
+        poked, self.poked = self.poked, asyncio.Event()
+        poked.set()
+
+    async def wait_for_change(self, key: Watched, version: int, timeout: float) -> bool:
+        """
+        :return: whether the version differs from the given one before the timeout
+        """
+        watch = self.watches.get(key)
+        if watch is None:
+            watch = self.watches[key] = Watch()
+            task = asyncio.create_task(self.follow(key, watch))
+            self.tasks.add(task)
+            task.add_done_callback(lambda done: self.followed(key, watch, done))
+        watch.waiters += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            while watch.version is None or watch.version == version:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(watch.changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return False
+            return True
+        finally:
+            watch.waiters -= 1
+
+    async def follow(self, key: Watched, watch: Watch) -> None:
+        try:
+            statement = version_statement(*key)
+            while True:
+                poked = self.poked
+                async with self.sessions() as session:
+                    version = (await session.execute(statement)).scalar()
+                version = -1 if version is None else version
+                if version != watch.version:
+                    watch.version = version
+                    changed, watch.changed = watch.changed, asyncio.Event()
+                    changed.set()
+                if watch.waiters == 0:
+                    return
+                try:
+                    await asyncio.wait_for(poked.wait(), self.interval_sec)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            del self.watches[key]
+
+    def followed(self, key: Watched, watch: Watch, task: asyncio.Task) -> None:
+        """
+        Done callback of the follow task: logs its failure and wakes the waiters,
+        they read the results themselves and get the error, if any
+        """
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Watching the version of %s %s failed", *key, exc_info=task.exception()
+            )
+        watch.version = -1
+        watch.changed.set()
+
+
+class AsyncServer:
+    def __init__(self, flask_app) -> None:
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(flask_app.config["ASYNC_THREADS"])
+        self.engine = None
+        self.watcher: Optional[VersionWatcher] = None
+        self.in_flight: Dict[Tuple, asyncio.Future] = dict()
+
+    async def __call__(self, scope: Dict, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":  # Websockets are not served
+            await receive()
+            await send({"type": "websocket.close"})
+            return
+        body = await read_body(receive)
+        try:
+            if scope["method"] == "GET" and scope["path"] in LONG_POLLS:
+                response = await self.long_poll(scope, body)
+                body.seek(0)
+                if response is not None:  # Responses are WSGI apps themselves
+                    await run_wsgi(response, scope, body, send, self.executor)
+                    return
+            await run_wsgi(self.flask_app, scope, body, send, self.executor)
+            if scope["method"] in WRITE_METHODS and self.watcher is not None:
+                self.watcher.poke()
+        finally:
+            body.close()
+
+    async def lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def start(self) -> None:
+        config = self.flask_app.config
+        uri = config["SQLALCHEMY_DATABASE_URI"]
+        options = {}
+        if is_sqlite_file(uri):
+            options = {"poolclass": AsyncAdaptedQueuePool, "pool_size": 2}
+        self.engine = create_async_engine(
+            config["ASYNC_DATABASE_URI"] or async_database_uri(uri), **options
+        )
+        apply_sqlite_pragmas(self.engine.sync_engine, config["SQLITE_PRAGMAS"])
+        sessions = sessionmaker(self.engine, class_=AsyncSession)
+        self.watcher = VersionWatcher(sessions, config["LONG_POLL_INTERVAL_MS"] / 1000)
+
+    async def stop(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+        self.executor.shutdown(wait=False)
+
+    async def long_poll(self, scope: Dict, body: IO[bytes]) -> Optional[Response]:
+        """
+        :return: the response, None if the request does not wait and should be
+        served by the WSGI app as is
+        """
+        try:
+            request = json.loads(body.read() or b"{}")
+            wait = min(
+                float(request["wait"]), self.flask_app.config["LONG_POLL_MAX_SEC"]
+            )
+            scope_name, pretty = LONG_POLLS[scope["path"]]
+            token, scope_id = request["token"], int(request[f"{scope_name}_id"])
+        except (ValueError, KeyError, TypeError):
+            return None
+        if self.watcher is None or wait <= 0:
+            return None
+        if_none_match = dict(scope["headers"]).get(b"if-none-match", b"").decode()
+        response = await self.results(
+            scope_name, token, scope_id, pretty, if_none_match
+        )
+        if response.status_code != 304:
+            return response
+        # The ETag ends with the version of the tournament
+        version = int(response.headers["ETag"].strip('"').rsplit("-", 1)[1])
+        key = (scope_name, scope_id)
+        if await self.watcher.wait_for_change(key, version, wait):
+            response = await self.results(
+                scope_name, token, scope_id, pretty, if_none_match
+            )
+        return response
+
+    async def results(
+        self, scope_name: str, token: str, scope_id: int, pretty: bool, etags: str
+    ) -> Response:
+        """
+        Identical requests in flight share one call, so a change does not
+        wake a thread for every waiting spectator
+        """
+        key = (scope_name, token, scope_id, pretty, etags)
+        future = self.in_flight.get(key)
+        if future is None:
+
+            def call() -> Response:
+                with self.flask_app.app_context():
+                    return RESULT_FUNCTIONS[scope_name](
+                        token, scope_id, pretty, etags or None
+                    )
+
+            loop = asyncio.get_running_loop()
+            future = self.in_flight[key] = loop.run_in_executor(self.executor, call)
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+
+application = AsyncServer(app)
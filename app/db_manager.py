@@ -1,26 +1,54 @@
-from typing import Tuple, Callable, Optional, List, Dict
+from typing import Tuple, Callable, Optional, List, Dict, Iterable, Iterator, Set, Any
 from flask_sqlalchemy import SQLAlchemy
 
 from exceptions import KnownException
 from exceptions.UserExceptions import (
+    UserException,
     LogicGameSizeException,
     LogicPlayersDontMatchException,
     ObjectNotFoundException,
     ObjectAlreadyExistsException,
     NotTheOwnerOfObjectException,
 )
+from sqlalchemy import select, insert, update, exists, literal, bindparam, text, func
+from sqlalchemy import inspect as sqlalchemy_inspect
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm.exc import StaleDataError
 import entities.tournament
 import entities.player
 import entities.word
 import entities.round
-from collections import Counter
+import pickle
+from collections import Counter, defaultdict
+import datetime
 from datetime import datetime as DatetimeT
 from entities.subround import Subround as SubroundE  # FIXME: differs for weird reasons
+from entities.principal import Principal
 
 # FIXME: too many duplicated lines!
-from utils.utils import gen_rand_key, shuffle_and_split_near_equal_parts
+from utils.utils import (
+    gen_rand_key,
+    shuffle_and_split_near_equal_parts,
+    chunked,
+    normalize_word,
+)
+from utils.cache import TTLCache, InvalidatedCache
+from utils.group_commit import GroupCommitter, Outcome
+from utils.pool import ShuffledPool
+import threading
+
+# Fields of list endpoints, in the order of entities' to_base_info_dict
+LIST_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "Tournament": ("name", "id"),
+    "Round": ("name", "id"),
+    "Subround": ("name", "id"),
+    "Player": ("name_first", "name_second", "id"),
+    "Word": ("text", "difficulty", "id"),
+}
+
+
+STREAM_BATCH_SIZE = 1000
 
 
 class DBException(KnownException):
@@ -47,12 +75,37 @@ class DBManager:
     def __init__(self):
         self.db: Optional[SQLAlchemy] = None
         self.models = None
+        self.token_cache: TTLCache = TTLCache()
+        self.results_cache: InvalidatedCache = InvalidatedCache()
+        self.revoked_tokens: Dict[str, DatetimeT] = dict()
+        self.revoked_tokens_loaded: Optional[DatetimeT] = None
+        self.revocation_refresh_sec: int = 30
+        self.group_committer: Optional[GroupCommitter] = None
+        # (tournament_id, difficulty) -> (words version, ids of free words)
+        self.word_pools: Dict[Tuple[int, int], Tuple[int, ShuffledPool]] = dict()
+        self.word_pools_lock = threading.Lock()
 
     # BASE FUNCTIONS
 
-    def init_db(self, db: SQLAlchemy, models):
+    def init_db(
+        self,
+        db: SQLAlchemy,
+        models,
+        token_cache_size: int = 1024,
+        revocation_refresh_sec: int = 30,
+        group_commit_window_ms: int = 0,
+        results_cache_size: int = 1024,
+    ):
         self.db = db
         self.models = models
+        self.token_cache = TTLCache(token_cache_size)
+        self.results_cache = InvalidatedCache(results_cache_size)
+        self.revocation_refresh_sec = revocation_refresh_sec
+        self.group_committer = None
+        if group_commit_window_ms > 0:
+            self.group_committer = GroupCommitter(
+                self.run_group, group_commit_window_ms / 1000
+            )
 
     def is_ok(self):
         return self.db is not None and self.models is not None
@@ -82,197 +135,791 @@ class DBManager:
             raise ObjectNotFoundException("Token")
         return token_obj
 
+    def cache_token(self, token: str, user_obj, expires_in: DatetimeT) -> None:
+        refresh_at = datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=self.revocation_refresh_sec
+        )  # Other worker processes may delete the token or the user
+        self.token_cache.put(
+            token,
+            (user_obj.id, user_obj.username, expires_in),
+            min(expires_in, refresh_at),
+        )
+
+    # REVOCATION LIST HELPERS
+    def load_revoked_tokens(self) -> None:
+        now = datetime.datetime.utcnow()
+        self.revoked_tokens = dict(
+            self.db.session.query(
+                self.models.RevokedToken.id, self.models.RevokedToken.expires_in
+            ).filter(self.models.RevokedToken.expires_in > now)
+        )
+        self.revoked_tokens_loaded = now
+
+    def is_revocation_list_stale(self) -> bool:
+        return (
+            self.revoked_tokens_loaded is None
+            or (datetime.datetime.utcnow() - self.revoked_tokens_loaded).total_seconds()
+            > self.revocation_refresh_sec
+        )
+
+    # OWNERSHIP HELPERS
+    def owner_query(self, model, *columns):
+        """
+        :param model: Round, Subround, Game, Player or Word model
+        :param columns: what to select, the model, the owner's user_id and
+        the tournament id by default
+        :return: query, joined up to the owning tournament, so the object and its
+        owner are fetched in one statement
+        """
+        m = self.models
+        if not columns:
+            columns = (model, m.Tournament.user_id, m.Tournament.id)
+        query = self.db.session.query(*columns).select_from(model)
+        if model is m.Game:
+            query = query.join(m.Subround, m.Game.subround_id == m.Subround.id)
+        if model in (m.Game, m.Subround):
+            query = query.join(m.Round, m.Subround.round_id == m.Round.id)
+        if model in (m.Game, m.Subround, m.Round):
+            return query.join(m.Tournament, m.Round.tournament_id == m.Tournament.id)
+        return query.join(m.Tournament, model.tournament_id == m.Tournament.id)
+
+    def get_owned_object(
+        self,
+        principal: Principal,
+        model,
+        object_id: int,
+        object_name: str,
+        owner_name: str,
+    ):
+        if principal.owns(object_name, object_id):
+            return model.query.get(int(object_id))
+        row = self.owner_query(model).filter(model.id == object_id).first()
+        if row is None:
+            raise ObjectNotFoundException(object_name)
+        object_obj, user_id, tournament_id = row
+        if user_id != principal.uid:
+            raise NotTheOwnerOfObjectException(owner_name)
+        principal.grant(object_name, object_id)
+        principal.grant("Tournament", tournament_id)
+        return object_obj
+
+    def get_owned_version(
+        self,
+        principal: Principal,
+        model,
+        object_id: int,
+        object_name: str,
+        owner_name: str,
+    ) -> int:
+        """
+        :return: version of the tournament of the object, the ownership is
+        checked in the same statement
+        """
+        return self.get_owned_columns(
+            principal, model, object_id, object_name, owner_name
+        )[0]
+
+    def get_owned_columns(
+        self,
+        principal: Principal,
+        model,
+        object_id: int,
+        object_name: str,
+        owner_name: str,
+        *columns,
+    ) -> Tuple:
+        """
+        :return: version of the tournament of the object and the given columns
+        of the object, the ownership is checked in the same statement
+        """
+        m = self.models
+        owner_columns = (m.Tournament.user_id, m.Tournament.id)
+        selected = (m.Tournament.version, *columns, *owner_columns)
+        if model is m.Tournament:
+            query = self.db.session.query(*selected)
+        else:
+            query = self.owner_query(model, *selected)
+        row = query.filter(model.id == object_id).first()
+        if row is None:
+            raise ObjectNotFoundException(object_name)
+        *values, user_id, tournament_id = row
+        if user_id != principal.uid:
+            if model is m.Tournament:
+                raise ObjectNotFoundException(object_name)
+            raise NotTheOwnerOfObjectException(owner_name)
+        principal.grant(object_name, object_id)
+        principal.grant("Tournament", tournament_id)
+        return tuple(values)
+
+    def is_owner_of_object(
+        self, principal: Principal, model, object_id: int, object_name: str
+    ) -> bool:
+        if principal.owns(object_name, object_id):
+            return True
+        user_id = (
+            self.owner_query(model, self.models.Tournament.user_id)
+            .filter(model.id == object_id)
+            .scalar()
+        )
+        if user_id is None or user_id != principal.uid:
+            return False
+        principal.grant(object_name, object_id)
+        return True
+
+    # LIST HELPERS
+    def page_query(
+        self,
+        query,
+        model,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[str], Any]:
+        """
+        :param query: query of the model objects to list
+        :param after_id: keyset cursor, only objects with greater ids are listed
+        :param limit: maximal amount of objects, all if None
+        :param fields: names of the fields to return, all of LIST_FIELDS if None;
+        id is always returned, as it is the cursor for the next page
+        :return: names of the selected columns and the query of them, ordered by id
+        """
+        known = LIST_FIELDS[model.__name__]
+        if fields is None:
+            fields = list(known)
+        unknown = [field for field in fields if field not in known]
+        if unknown:
+            raise UserException(400, f"Unknown field {unknown[0]}")
+        if limit is not None and limit <= 0:
+            raise UserException(400, "Limit should be positive")
+        names = [field for field in known if field in fields or field == "id"]
+        rows = (
+            query.with_entities(*(getattr(model, name) for name in names))
+            .filter(model.id > after_id)
+            .order_by(model.id)
+            .limit(limit)
+        )
+        return names, rows
+
+    def get_page(
+        self,
+        query,
+        model,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        :return: dicts of the page_query columns, no objects are built
+        """
+        names, rows = self.page_query(query, model, after_id, limit, fields)
+        return [dict(zip(names, row)) for row in rows]
+
+    def iter_rows(
+        self, query, model, fields: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        """
+        :return: iterator over dicts of all the page_query columns, fetched from the
+        cursor in batches of STREAM_BATCH_SIZE, so memory doesn't depend on the size
+        The arguments are checked before the iterator is returned
+        """
+        names, rows = self.page_query(query, model, fields=fields)
+        return (dict(zip(names, row)) for row in rows.yield_per(STREAM_BATCH_SIZE))
+
     # TOURNAMENT_HELPERS
+    def bump_tournament_version(self, model, object_id: int, words=False) -> None:
+        """
+        Increments the version of the tournament of the object (or of the
+        tournament itself) in the current transaction. Does not commit
+        :param words: whether free words have changed, their version is incremented too
+        """
+        m = self.models
+        tournament_id = object_id
+        if model is not m.Tournament:
+            tournament_id = (
+                self.owner_query(model, m.Tournament.id)
+                .filter(model.id == object_id)
+                .scalar_subquery()
+            )
+        values = {"version": m.Tournament.version + 1}
+        if words:
+            values["words_version"] = m.Tournament.words_version + 1
+        self.db.session.execute(
+            update(m.Tournament)
+            .where(m.Tournament.id == tournament_id)
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+
+    def scope_model(self, scope: str):
+        """
+        :param scope: one of SCORE_SCOPES
+        """
+        m = self.models
+        return {"round": m.Round, "subround": m.Subround, "game": m.Game}[scope]
+
+    def bump_results_version(self, scope: str, scope_ids) -> None:
+        """
+        Increments the results version of the rounds, subrounds or games
+        in the current transaction, so their cached results are not used
+        by any process. Does not commit
+        :param scope_ids: ids of the objects
+        """
+        model = self.scope_model(scope)
+        self.db.session.execute(
+            update(model)
+            .where(model.id.in_(scope_ids))
+            .values(results_version=model.results_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
     def is_tournament_exists_id(self, user_id: int, tournament_name: str) -> bool:
         tournament_obj = self.models.Tournament.query.filter_by(
             user_id=user_id, name=tournament_name
         ).first()
         return tournament_obj is not None
 
-    def is_tournament_owner_id(self, user_id: int, tournament_id: int) -> bool:
+    def is_tournament_owner_id(self, principal: Principal, tournament_id: int) -> bool:
+        if principal.owns("Tournament", tournament_id):
+            return True
         tournament_obj = self.models.Tournament.query.filter_by(
             id=tournament_id
         ).first()
-        return tournament_obj is not None and tournament_obj.user_id == user_id
+        if tournament_obj is None or tournament_obj.user_id != principal.uid:
+            return False
+        principal.grant("Tournament", tournament_id)
+        return True
 
-    def get_tournament_id(self, user_id: int, tournament_id: int):
+    def get_tournament_id(self, principal: Principal, tournament_id: int):
+        if principal.owns("Tournament", tournament_id):
+            return self.models.Tournament.query.get(int(tournament_id))
         tournament_obj = self.models.Tournament.query.filter_by(
-            id=tournament_id, user_id=user_id
+            id=tournament_id, user_id=principal.uid
         ).first()
         if tournament_obj is None:
             raise ObjectNotFoundException("Tournament")
+        principal.grant("Tournament", tournament_id)
         return tournament_obj
 
     # ROUND HELPERS
     def is_round_exists_id(
-        self, user_id: int, tournament_id: int, round_name: str
+        self, principal: Principal, tournament_id: int, round_name: str
     ) -> bool:
-        if not self.is_tournament_owner_id(user_id, tournament_id):
+        if not self.is_tournament_owner_id(principal, tournament_id):
             raise NotTheOwnerOfObjectException("Tournament")
         round_obj = self.models.Round.query.filter_by(
             name=round_name, tournament_id=tournament_id
         ).first()
         return round_obj is not None
 
-    def is_round_owner_id(self, user_id: int, round_id: int) -> bool:
-        round_obj = self.models.Round.query.filter_by(id=round_id).first()
-        return round_obj is not None and round_obj.tournament.user_id == user_id
+    def is_round_owner_id(self, principal: Principal, round_id: int) -> bool:
+        return self.is_owner_of_object(principal, self.models.Round, round_id, "Round")
 
-    def get_round_id(self, user_id: int, round_id: int):
-        round_obj = self.models.Round.query.filter_by(id=round_id).first()
-        if round_obj is None:
-            raise ObjectNotFoundException("Round")
-        if not self.is_tournament_owner_id(user_id, round_obj.tournament_id):
-            raise NotTheOwnerOfObjectException("Tournament")
-        return round_obj
+    def get_round_id(self, principal: Principal, round_id: int):
+        return self.get_owned_object(
+            principal, self.models.Round, round_id, "Round", "Tournament"
+        )
 
     # PLAYER HELPERS
-    def is_player_exists_id(
-        self, user_id: int, tournament_id: int, player_name: str
-    ) -> bool:  # FIXME: will change
-        if not self.is_tournament_owner_id(user_id, tournament_id):
-            raise NotTheOwnerOfObjectException("Tournament")
-
-        p = self.models.Player.query.filter(
-            (
-                (self.models.Player.tournament_id == tournament_id)
-                & (
-                    (self.models.Player.name_first == player_name)
-                    | (self.models.Player.name_second == player_name)
-                )
+    def find_pair_id(self, tournament_id: int, player_name: str) -> Optional[int]:
+        """
+        :return: id of the pair with the player of this name, None if there is no such
+        """
+        return (
+            self.db.session.query(self.models.PlayerName.player_id)
+            .filter_by(
+                tournament_id=tournament_id,
+                normalized_name=normalize_word(player_name),
             )
-        ).first()
-        return p is not None
+            .scalar()
+        )
 
-    def get_pair_id(self, user_id: int, pair_id: int):
-        pair_obj = self.models.Player.query.filter_by(id=pair_id).first()
-        if pair_obj is None:
-            raise ObjectNotFoundException("Player")
-        if not self.is_tournament_owner_id(user_id, pair_obj.tournament_id):
-            raise NotTheOwnerOfObjectException("Tournament")
-        return pair_obj
+    def add_player_names(self, players: List) -> None:
+        """
+        Inserts the names of flushed pairs into PlayerName,
+        raises IntegrityError if a name is already used in the tournament
+        """
+        self.db.session.execute(
+            self.models.PlayerName.__table__.insert(),
+            [
+                {
+                    "tournament_id": player.tournament_id,
+                    "normalized_name": normalize_word(name),
+                    "player_id": player.id,
+                }
+                for player in players
+                for name in (player.name_first, player.name_second)
+            ],
+        )
+
+    def get_pair_id(self, principal: Principal, pair_id: int):
+        return self.get_owned_object(
+            principal, self.models.Player, pair_id, "Player", "Tournament"
+        )
 
     # WORD HELPERS
-    def is_word_exists_id(
-        self, user_id: int, tournament_id: int, word_text: str
-    ) -> bool:
-        if not self.is_tournament_owner_id(user_id, tournament_id):
-            raise NotTheOwnerOfObjectException("Tournament")
-        word_obj = self.models.Word.query.filter_by(text=word_text).first()
-        return word_obj is not None
-
-    def get_word_id(self, user_id: int, word_id: int):
-        word_obj = self.models.Word.query.filter_by(id=word_id).first()
-        if word_obj is None:
-            raise ObjectNotFoundException("Word")
-        if not self.is_tournament_owner_id(user_id, word_obj.tournament_id):
-            raise NotTheOwnerOfObjectException("Tournament")
-        return word_obj
+    def get_word_id(self, principal: Principal, word_id: int):
+        return self.get_owned_object(
+            principal, self.models.Word, word_id, "Word", "Tournament"
+        )
 
     # SUBROUND HELPERS
     def is_subround_exists_id(
-        self, user_id: int, round_id: int, subround_name: str
+        self, principal: Principal, round_id: int, subround_name: str
     ) -> bool:
-        if not self.is_round_owner_id(user_id, round_id):
+        if not self.is_round_owner_id(principal, round_id):
             raise NotTheOwnerOfObjectException("Round")
         subround_obj = self.models.Subround.query.filter_by(
             name=subround_name, round_id=round_id
         ).first()
         return subround_obj is not None
 
-    def is_subround_owner_id(self, user_id: int, subround_id: int) -> bool:
-        subround_obj = self.models.Subround.query.filter_by(id=subround_id).first()
-        return (
-            subround_obj is not None
-            and subround_obj.round.tournament.user_id == user_id
+    def get_subround_id(self, principal: Principal, subround_id: int):
+        return self.get_owned_object(
+            principal, self.models.Subround, subround_id, "Subround", "Round"
         )
 
-    def get_subround_id(self, user_id: int, subround_id: int):
-        subround_obj = self.models.Subround.query.filter_by(id=subround_id).first()
-        if subround_obj is None:
-            raise ObjectNotFoundException("Subround")
-        if not self.is_round_owner_id(user_id, subround_obj.round_id):
-            raise NotTheOwnerOfObjectException("Round")
-        return subround_obj
-
     # WORD TAKER AND LINKER
 
-    def get_x_random_words_with_difficulty_y_id(
-        self, user_id: int, tournament_id: int, amount: int, difficulty: int
-    ):
-        if not self.is_tournament_owner_id(user_id, tournament_id):
-            raise NotTheOwnerOfObjectException("Tournament")
-        words = (
-            self.models.Word.query.filter_by(
+    # Free words of a tournament and difficulty are drawn from a pre-shuffled pool
+    # of their ids. A pool is valid only for the words version of the tournament
+    # it was built at, other changes (results, pairs) don't touch it. Word changes
+    # committed by this process move the pools to the new version
+    # (sync_word_pools), any other word change makes them rebuilt on the next draw
+
+    def read_words_version(self, tournament_id: int) -> int:
+        return (
+            self.db.session.query(self.models.Tournament.words_version)
+            .filter_by(id=tournament_id)
+            .scalar()
+        )
+
+    def get_word_pool(
+        self, tournament_id: int, difficulty: int, version: int
+    ) -> ShuffledPool:
+        """
+        Must be called with word_pools_lock held
+        """
+        key = (tournament_id, difficulty)
+        entry = self.word_pools.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        Word = self.models.Word
+        pool = ShuffledPool(
+            word_id
+            for (word_id,) in self.db.session.query(Word.id).filter_by(
                 tournament_id=tournament_id, difficulty=difficulty, subround_id=None
             )
-            .order_by(self.models.Word.random_seed)
-            .limit(amount)
-            .all()
         )
-
-        if len(words) < amount:
-            raise ObjectNotFoundException("Not enough words")
-        return words
-
-    def link_words_with_subround(self, subround_obj, words_list):
-        subround_obj.words.extend(words_list)
-        self.db.session.add(subround_obj)
-        self.db.session.commit()
+        self.word_pools[key] = (version, pool)
+        return pool
+
+    def sync_word_pools(
+        self,
+        tournament_id: int,
+        version: int,
+        difficulty: Optional[int] = None,
+        change: Optional[Callable[[ShuffledPool], None]] = None,
+    ) -> None:
+        """
+        Moves the pools of the tournament to the version committed by this process,
+        applying the change to the pool of the difficulty. Pools which have missed
+        another change are dropped
+        """
+        with self.word_pools_lock:
+            for key in [key for key in self.word_pools if key[0] == tournament_id]:
+                pool_version, pool = self.word_pools[key]
+                if pool_version != version - 1:
+                    del self.word_pools[key]
+                    continue
+                if change is not None and key[1] == difficulty:
+                    change(pool)
+                self.word_pools[key] = (version, pool)
+
+    def drop_word_pools(self, tournament_id: int) -> None:
+        with self.word_pools_lock:
+            for key in [key for key in self.word_pools if key[0] == tournament_id]:
+                del self.word_pools[key]
+
+    def draw_words_to_subround(
+        self,
+        subround_obj,
+        tournament_id: int,
+        difficulty: int,
+        amount: int,
+        retries: int = 3,
+    ) -> None:
+        """
+        Links amount random free words of the difficulty with the subround, O(amount)
+        The drawn words are taken only if they are still free, otherwise the pool
+        was stale (changed by another process), it is rebuilt and the draw repeated
+        """
+        if amount < 0:
+            raise UserException(400, "Amount of words should not be negative")
+        Word = self.models.Word
+        for attempt in range(retries):
+            version = self.read_words_version(tournament_id)
+            with self.word_pools_lock:
+                pool = self.get_word_pool(tournament_id, difficulty, version)
+                if len(pool) < amount:
+                    raise ObjectNotFoundException("Not enough words")
+                word_ids = pool.draw(amount)
+            try:
+                taken = Word.query.filter(
+                    Word.id.in_(word_ids), Word.subround_id.is_(None)
+                ).update({"subround_id": subround_obj.id}, synchronize_session=False)
+                if taken == amount:
+                    self.bump_tournament_version(
+                        self.models.Tournament, tournament_id, words=True
+                    )
+                    version = self.read_words_version(tournament_id)
+                    self.db.session.commit()
+                    self.sync_word_pools(tournament_id, version)
+                    return
+                self.db.session.rollback()
+            except Exception:
+                self.db.session.rollback()
+                self.drop_word_pools(tournament_id)
+                raise
+            self.drop_word_pools(tournament_id)
+        raise DBException(500, "Words were changed concurrently, try again")
+
+    # PAIRS LINKER
+
+    def link_pairs_with_scope(
+        self,
+        principal: Principal,
+        scope_obj,
+        association_table,
+        scope: str,
+        pair_ids: List[int],
+        object_name: str,
+    ) -> None:
+        """
+        Adds all pairs to the round or subround in one transaction:
+        pairs and their owners are fetched with one IN query, association rows
+        and zero scores are inserted with one multi-row statement each
+        """
+        scope_column = f"{scope}_id"
+        pair_ids = [int(pair_id) for pair_id in pair_ids]
+        if not pair_ids:
+            return
+        if len(set(pair_ids)) != len(pair_ids):
+            raise ObjectAlreadyExistsException(object_name)
+        owners = dict(
+            self.owner_query(
+                self.models.Player,
+                self.models.Player.id,
+                self.models.Tournament.user_id,
+            ).filter(self.models.Player.id.in_(pair_ids))
+        )
+        if len(owners) != len(pair_ids):
+            raise ObjectNotFoundException("Player")
+        if any(user_id != principal.uid for user_id in owners.values()):
+            raise NotTheOwnerOfObjectException("Tournament")
+        already_linked = (
+            self.db.session.query(association_table.c.player_id)
+            .filter(association_table.c[scope_column] == scope_obj.id)
+            .filter(association_table.c.player_id.in_(pair_ids))
+            .first()
+        )
+        if already_linked is not None:
+            raise ObjectAlreadyExistsException(object_name)
+        try:
+            self.db.session.execute(
+                association_table.insert().values(
+                    [
+                        {"player_id": pair_id, scope_column: scope_obj.id}
+                        for pair_id in pair_ids
+                    ]
+                )
+            )
+            self.insert_zero_scores(scope, scope_obj.id, pair_ids)
+            self.bump_results_version(scope, [scope_obj.id])
+            self.bump_tournament_version(type(scope_obj), scope_obj.id)
+            self.db.session.commit()
+        except IntegrityError:
+            self.db.session.rollback()
+            raise ObjectAlreadyExistsException(object_name)
+        except Exception:
+            self.db.session.rollback()
+            raise
+        self.invalidate_scores((scope, scope_obj.id))
 
     # GAME HELPERS
 
-    def is_game_exists_id(self, user_id: int, game_id: int) -> bool:
-        game_obj = self.models.Game.query.filter_by(id=game_id).first()
-        if game_obj is None:
-            return False
-        if not self.is_subround_owner_id(user_id, game_obj.subround_id):
-            raise NotTheOwnerOfObjectException("Subround")
-        return True
-
-    def get_game_id(self, user_id: int, game_id: int):
-        game_obj = self.models.Game.query.filter_by(id=game_id).first()
-        if game_obj is None:
-            raise ObjectNotFoundException("Game")
-        if not self.is_subround_owner_id(user_id, game_obj.subround_id):
-            raise NotTheOwnerOfObjectException("Subround")
-        return game_obj
+    def get_game_id(self, principal: Principal, game_id: int):
+        return self.get_owned_object(
+            principal, self.models.Game, game_id, "Game", "Subround"
+        )
 
     # RESULTS HELPERS
 
-    def update_add_results_push_from_game(self, game_obj):
-        subround_obj = game_obj.subround
-        new_results = Counter(subround_obj.results) + game_obj.results
-        subround_obj.results = new_results
-        self.db.session.add(subround_obj)
-        self.db.session.add(game_obj)
-        self.db.session.commit()
-        self.update_add_results_push_from_subround(subround_obj)
-
-    def update_add_results_push_from_subround(self, subround_obj):
-        round_obj = subround_obj.round  # FIXME: duplicated code.
-        new_results = Counter(round_obj.results) + subround_obj.results
-        round_obj.results = new_results
-        self.db.session.add(subround_obj)
-        self.db.session.add(round_obj)
-        self.db.session.commit()
+    def insert_zero_scores(self, scope: str, scope_id: int, pair_ids: List[int]):
+        if pair_ids:
+            self.db.session.execute(
+                self.models.Score.__table__.insert().values(
+                    [
+                        {"scope": scope, "scope_id": scope_id, "player_id": pair_id}
+                        for pair_id in pair_ids
+                    ]
+                )
+            )
 
-    def update_subtract_results_push_from_game(self, game_obj):
-        subround_obj = game_obj.subround
-        new_results = Counter(subround_obj.results) - game_obj.results
-        subround_obj.results = new_results
-        self.db.session.add(subround_obj)
-        self.db.session.add(game_obj)
-        self.db.session.commit()
-        self.update_subtract_results_push_from_subround(subround_obj, game_obj)
-
-    def update_subtract_results_push_from_subround(self, subround_obj, game_obj):
-        round_obj = subround_obj.round
-        new_results = Counter(round_obj.results) - game_obj.results
-        round_obj.results = new_results
-        self.db.session.add(subround_obj)
-        self.db.session.add(round_obj)
-        self.db.session.commit()
+    def get_scores(
+        self,
+        scope: str,
+        scope_id: int,
+        pretty: bool,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Tuple]:
+        """
+        :param offset: amount of best pairs to skip
+        :param limit: maximal amount of pairs to return, all if None
+        :return: list of (pair id or "name_first & name_second", score),
+        sorted by score in the database, so the (scope, scope_id, value, player_id)
+        index answers top-k and range queries without sorting
+        """
+        rows = self.scores_query(scope, scope_id, pretty).offset(offset).limit(limit)
+        return [self.score_row(row, pretty) for row in rows]
+
+    def scores_query(self, scope: str, scope_id: int, pretty: bool):
+        Score = self.models.Score
+        if pretty:
+            query = self.db.session.query(
+                self.models.Player.name_first,
+                self.models.Player.name_second,
+                Score.value,
+            ).join(self.models.Player, Score.player_id == self.models.Player.id)
+        else:
+            query = self.db.session.query(Score.player_id, Score.value)
+        return query.filter(Score.scope == scope, Score.scope_id == scope_id).order_by(
+            Score.value.desc(), Score.player_id.desc()
+        )
+
+    def score_row(self, row: Tuple, pretty: bool) -> Tuple:
+        if not pretty:
+            player_id, value = row
+            return player_id, value
+        first, second, value = row
+        return f"{first} & {second}", value
+
+    def iter_scores(self, scope: str, scope_id: int, pretty: bool) -> Iterator[Tuple]:
+        """
+        :return: iterator over get_scores of the whole scope, fetched in batches
+        """
+        rows = self.scores_query(scope, scope_id, pretty).yield_per(STREAM_BATCH_SIZE)
+        return (self.score_row(row, pretty) for row in rows)
+
+    def get_cached_scores(
+        self, scope: str, scope_id: int, pretty: bool, results_version: int
+    ) -> List[Tuple]:
+        """
+        get_scores of the whole scope through the results cache, the entries are
+        invalidated by the writers after commit with invalidate_scores.
+        Entries remember the results version of the scope, so the caches of other
+        worker processes, which miss these invalidations, never return stale
+        scores, and writes elsewhere in the tournament keep the entries valid.
+        Results versions start at random, so entries of deleted objects are not
+        matched by objects reusing their ids, they age out of the cache
+        """
+        key = (scope, scope_id, pretty)
+        entry, stamp = self.results_cache.get(key)
+        if entry is None or entry[0] != results_version:
+            entry = (results_version, self.get_scores(scope, scope_id, pretty))
+            self.results_cache.put(key, entry, stamp)
+        return list(entry[1])
+
+    def invalidate_scores(self, *scopes: Tuple[str, int]) -> None:
+        self.results_cache.invalidate(
+            *(
+                (scope, scope_id, pretty)
+                for scope, scope_id in scopes
+                for pretty in (False, True)
+            )
+        )
+
+    def get_rank(self, scope: str, scope_id: int, pair_id: int) -> Tuple[int, int]:
+        """
+        :return: (rank, score) of the pair, pairs with equal scores share the rank
+        Counted with an index range scan over the better scores
+        """
+        Score = self.models.Score
+        scope_rows = (Score.scope == scope) & (Score.scope_id == scope_id)
+        value = (
+            self.db.session.query(Score.value)
+            .filter(scope_rows & (Score.player_id == pair_id))
+            .scalar()
+        )
+        if value is None:
+            raise ObjectNotFoundException("Player in round")
+        better = (
+            self.db.session.query(func.count())
+            .select_from(Score)
+            .filter(scope_rows & (Score.value > value))
+            .scalar()
+        )
+        return better + 1, value
+
+    def push_game_scores(self, game_id: int, subround_id: int, sign: int) -> int:
+        """
+        Adds (sign=1) or subtracts (sign=-1) game scores to the subround and
+        the round scores with set-based statements, rows of pairs missing there
+        are created first. The results versions of the game, the subround and
+        the round are incremented. Does not commit
+        :return: id of the round
+        """
+        Score = self.models.Score
+        game_score = aliased(Score)
+        game_rows = (game_score.scope == "game") & (game_score.scope_id == game_id)
+        round_id = (
+            self.db.session.query(self.models.Subround.round_id)
+            .filter(self.models.Subround.id == subround_id)
+            .scalar()
+        )
+        for scope, scope_id in (
+            ("subround", subround_id),
+            ("round", round_id),
+        ):
+            scope_rows = (Score.scope == scope) & (Score.scope_id == scope_id)
+            missing = select(
+                literal(scope), literal(scope_id), game_score.player_id, literal(0)
+            ).where(
+                game_rows
+                & ~exists().where(
+                    scope_rows & (Score.player_id == game_score.player_id)
+                )
+            )
+            self.db.session.execute(
+                insert(Score).from_select(
+                    ["scope", "scope_id", "player_id", "value"], missing
+                )
+            )
+            game_value = (
+                select(game_score.value)
+                .where(game_rows & (game_score.player_id == Score.player_id))
+                .scalar_subquery()
+            )
+            self.db.session.execute(
+                update(Score)
+                .where(
+                    scope_rows
+                    & Score.player_id.in_(select(game_score.player_id).where(game_rows))
+                )
+                .values(value=Score.value + sign * game_value)
+                .execution_options(synchronize_session=False)
+            )
+            self.bump_results_version(scope, [scope_id])
+        self.bump_results_version("game", [game_id])
+        return round_id
+
+    def switch_game_results_set(self, game_id: int, results_set: bool) -> bool:
+        """
+        Compare-and-set of Game.results_set, so only one of concurrent
+        submissions (or deletions) of the same game results wins
+        :return: whether the flag was switched by this call
+        """
+        switched = self.models.Game.query.filter_by(
+            id=game_id, results_set=not results_set
+        ).update({"results_set": results_set}, synchronize_session=False)
+        return switched == 1
+
+    def run_in_transaction(self, action: Callable[[], Any], retries: int = 3) -> Any:
+        """
+        Runs the action and commits, rolls back on any error
+        Retries on IntegrityError, which means a concurrent transaction has
+        inserted the same score rows first
+        """
+        for attempt in range(retries):
+            try:
+                result = action()
+                self.db.session.commit()
+                return result
+            except IntegrityError:
+                self.db.session.rollback()
+                if attempt + 1 == retries:
+                    raise
+            except Exception:
+                self.db.session.rollback()
+                raise
+
+    def run_group(
+        self, actions: List[Callable[[], Any]], retries: int = 3
+    ) -> List[Outcome]:
+        """
+        Runs actions of concurrent submitters in one transaction with one commit
+        A failed action is reported to its submitter only: the transaction is
+        rolled back and the rest of the actions are run again without it
+        (IntegrityError is retried as in run_in_transaction)
+        """
+        outcomes: List[Outcome] = [(True, None)] * len(actions)
+        attempts = [0] * len(actions)
+        pending = list(range(len(actions)))
+        while pending:
+            current = None
+            try:
+                for current in pending:
+                    outcomes[current] = (True, actions[current]())
+                current = None
+                self.db.session.commit()
+                return outcomes
+            except Exception as e:
+                self.db.session.rollback()
+                if current is None:  # The commit itself has failed
+                    for index in pending:
+                        outcomes[index] = (False, e)
+                    return outcomes
+                attempts[current] += 1
+                if not isinstance(e, IntegrityError) or attempts[current] == retries:
+                    outcomes[current] = (False, e)
+                    pending.remove(current)
+        return outcomes
+
+    def commit_action(self, action: Callable[[], Any]) -> Any:
+        """
+        Runs the action in its own transaction or, if group commit is enabled,
+        in a transaction shared with the actions submitted concurrently.
+        The action must not use objects loaded by the caller session
+        """
+        if self.group_committer is None:
+            return self.run_in_transaction(action)
+        return self.group_committer.submit(action)
+
+    def tournament_rows(self, model, tournament_id: int, *columns, link=None):
+        """
+        :param link: (association table, its column referencing the model),
+        joined to select pairs linked with the model objects
+        :return: query of the given columns of all the model objects (or of
+        their links) in the tournament
+        """
+        query = self.owner_query(model, *columns)
+        if link is not None:
+            table, column = link
+            query = query.join(table, column == model.id)
+        return query.filter(self.models.Tournament.id == tournament_id)
+
+    def delete_scores_under(self, level: str, object_id: int) -> None:
+        """
+        :param level: "tournament", "round", "subround" or "game"
+        Deletes scores of the object and of everything inside it. Does not commit
+        """
+        m = self.models
+        if level == "tournament":
+            column = m.Tournament.id
+        else:
+            column = self.scope_model(level).id
+        first = 0 if level == "tournament" else self.models.SCORE_SCOPES.index(level)
+        for scope in self.models.SCORE_SCOPES[first:]:
+            model = self.scope_model(scope)
+            ids = self.owner_query(model, model.id).filter(column == object_id)
+            m.Score.query.filter(
+                m.Score.scope == scope, m.Score.scope_id.in_(ids.subquery().select())
+            ).delete(synchronize_session=False)
+
+    def delete_score(self, scope: str, scope_id: int, pair_id: int) -> None:
+        self.models.Score.query.filter_by(
+            scope=scope, scope_id=scope_id, player_id=pair_id
+        ).delete(synchronize_session=False)
 
     # DATABASE RESPONSES
 
@@ -291,9 +938,53 @@ class DBManager:
         return user_obj.password_hash
 
     @database_response
-    def get_username_and_exptime_by_token(self, token: str) -> Tuple[str, DatetimeT]:
-        token_obj = self.get_token(token)
-        return token_obj.owner.username, token_obj.expires_in
+    def set_password_hash(self, username: str, pass_hash: str) -> None:
+        self.get_user(username).password_hash = pass_hash
+        self.db.session.commit()
+
+    @database_response
+    def get_principal(self, username: str) -> Principal:
+        return Principal(dbu=self.get_user(username))
+
+    @database_response
+    def get_principal_and_exptime_by_token(
+        self, token: str
+    ) -> Tuple[Principal, DatetimeT]:
+        cached = self.token_cache.get(token)
+        if cached is not None:
+            user_id, username, expires_in = cached
+            return Principal(username=username, uid=user_id), expires_in
+        row = (
+            self.db.session.query(self.models.User, self.models.Token.expires_in)
+            .join(self.models.Token, self.models.Token.user_id == self.models.User.id)
+            .filter(self.models.Token.id == token)
+            .first()
+        )
+        if row is None:
+            raise ObjectNotFoundException("Token")
+        user_obj, expires_in = row
+        self.cache_token(token, user_obj, expires_in)
+        return Principal(dbu=user_obj), expires_in
+
+    @database_response
+    def get_principal_by_signed_token(
+        self, token: str, user_id: int, expires_in: DatetimeT
+    ) -> Principal:
+        """
+        :param token: signed token with a valid signature, of the user
+        :return: principal of the user, throws ObjectNotFound("Token") if the user
+        doesn't exist anymore. Cached as the table tokens, so the user is looked up
+        at most once per revocation_refresh_sec
+        """
+        cached = self.token_cache.get(token)
+        if cached is not None:
+            user_id, username, _ = cached
+            return Principal(username=username, uid=user_id)
+        user_obj = self.models.User.query.get(user_id)
+        if user_obj is None:
+            raise ObjectNotFoundException("Token")
+        self.cache_token(token, user_obj, expires_in)
+        return Principal(dbu=user_obj)
 
     @database_response
     def insert_token(self, token_id: str, expires_in: DatetimeT, username: str) -> None:
@@ -306,6 +997,7 @@ class DBManager:
 
     @database_response
     def delete_token(self, token: str) -> None:
+        self.token_cache.pop(token)
         if not self.is_token_exists(token):
             return
         token_obj = self.get_token(token)
@@ -313,343 +1005,770 @@ class DBManager:
         self.db.session.commit()
 
     @database_response
-    def insert_tournament(self, username: str, tournament_name: str) -> int:
-        user_obj = self.get_user(username)
-        if self.is_tournament_exists_id(user_obj.id, tournament_name):
+    def is_token_id_revoked(self, token_id: str) -> bool:
+        """
+        Checks the in-process copy of the revocation list,
+        which is reloaded from the database at most once per revocation_refresh_sec
+        """
+        if self.is_revocation_list_stale():
+            self.load_revoked_tokens()
+        return token_id in self.revoked_tokens
+
+    @database_response
+    def revoke_token_id(self, token_id: str, expires_in: DatetimeT) -> None:
+        self.models.RevokedToken.query.filter(
+            self.models.RevokedToken.expires_in <= datetime.datetime.utcnow()
+        ).delete()
+        if self.models.RevokedToken.query.get(token_id) is None:
+            self.db.session.add(
+                self.models.RevokedToken(id=token_id, expires_in=expires_in)
+            )
+        self.db.session.commit()
+        self.revoked_tokens[token_id] = expires_in
+
+    @database_response
+    def insert_tournament(self, principal: Principal, tournament_name: str) -> int:
+        if self.is_tournament_exists_id(principal.uid, tournament_name):
             raise ObjectAlreadyExistsException("Tournament")
-        new_tournament = self.models.Tournament(name=tournament_name, owner=user_obj)
+        new_tournament = self.models.Tournament(
+            name=tournament_name, user_id=principal.uid
+        )
         self.db.session.add(new_tournament)
         self.db.session.commit()
+        principal.grant("Tournament", new_tournament.id)
         return new_tournament.id
 
     @database_response
-    def get_tournaments(self, username: str) -> List:
-        user_obj = self.get_user(username)
-        return [
-            entities.tournament.Tournament(dbu=t).to_base_info_dict()
-            for t in user_obj.tournaments
-        ]
+    def get_tournaments(
+        self,
+        principal: Principal,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List:
+        return self.get_page(
+            self.models.Tournament.query.filter_by(user_id=principal.uid),
+            self.models.Tournament,
+            after_id,
+            limit,
+            fields,
+        )
 
     @database_response
-    def get_tournament_info(self, username: str, tournament_id: int) -> Dict:
-        user_obj = self.get_user(username)
-        tournament_obj = self.get_tournament_id(user_obj.id, tournament_id)
+    def get_tournament_info(self, principal: Principal, tournament_id: int) -> Dict:
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
         tournament_info: Dict = entities.tournament.Tournament(
             tournament_obj
         ).to_base_info_dict()
-        tournament_info["rounds"] = self.get_rounds(username, tournament_id)
-        tournament_info["players"] = self.get_players(username, tournament_id)
+        tournament_info["rounds"] = self.get_rounds(principal, tournament_id)
+        tournament_info["players"] = self.get_players(principal, tournament_id)
         return tournament_info
 
     @database_response
-    def delete_tournament(self, username: str, tournament_id: int) -> None:
-        user_obj = self.get_user(username)
-        tournament_obj = self.get_tournament_id(user_obj.id, tournament_id)
+    def get_tournament_version(self, principal: Principal, tournament_id: int) -> int:
+        return self.get_owned_version(
+            principal, self.models.Tournament, tournament_id, "Tournament", ""
+        )
+
+    @database_response
+    def get_tournament_snapshot(self, principal: Principal, tournament_id: int) -> Dict:
+        """
+        Whole tournament tree in a constant number of queries: one per table,
+        joined up to the tournament, assembled here. Pairs and words are listed
+        in the tournament and referenced by id below it
+        """
+        m = self.models
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        tournament_id = tournament_obj.id
+
+        def linked(model, table, column, object_column):
+            by_object: Dict[int, List[int]] = defaultdict(list)
+            rows = self.tournament_rows(
+                model,
+                tournament_id,
+                object_column,
+                table.c.player_id,
+                link=(table, column),
+            ).order_by(table.c.player_id)
+            for object_id, player_id in rows:
+                by_object[object_id].append(player_id)
+            return by_object
+
+        round_pairs = linked(
+            m.Round, m.players_in_rounds, m.players_in_rounds.c.round_id, m.Round.id
+        )
+        subround_pairs = linked(
+            m.Subround,
+            m.players_in_subrounds,
+            m.players_in_subrounds.c.subround_id,
+            m.Subround.id,
+        )
+        game_pairs = linked(
+            m.Game, m.players_in_games, m.players_in_games.c.game_id, m.Game.id
+        )
+        results: Dict[Tuple[str, int], List] = defaultdict(list)
+        for scope, model in zip(m.SCORE_SCOPES, (m.Round, m.Subround, m.Game)):
+            ids = self.tournament_rows(model, tournament_id, model.id)
+            for scope_id, player_id, value in (
+                self.db.session.query(
+                    m.Score.scope_id, m.Score.player_id, m.Score.value
+                )
+                .filter(
+                    m.Score.scope == scope,
+                    m.Score.scope_id.in_(ids.subquery().select()),
+                )
+                .order_by(m.Score.value.desc(), m.Score.player_id.desc())
+            ):
+                results[(scope, scope_id)].append((player_id, value))
+
+        words = self.tournament_rows(m.Word, tournament_id, m.Word).order_by(m.Word.id)
+        subround_words: Dict[int, List[int]] = defaultdict(list)
+        for w in words:
+            if w.subround_id is not None:
+                subround_words[w.subround_id].append(w.id)
+
+        games: Dict[int, List[Dict]] = defaultdict(list)
+        for g in self.tournament_rows(m.Game, tournament_id, m.Game).order_by(
+            m.Game.id
+        ):
+            principal.grant("Game", g.id)
+            game_info: Dict = {
+                "id": g.id,
+                "players": game_pairs[g.id],
+                "results set": bool(g.results_set),
+            }
+            if g.results_set:
+                game_info["results"] = results[("game", g.id)]
+            games[g.subround_id].append(game_info)
+
+        subrounds: Dict[int, List[Dict]] = defaultdict(list)
+        for s in self.tournament_rows(m.Subround, tournament_id, m.Subround).order_by(
+            m.Subround.id
+        ):
+            principal.grant("Subround", s.id)
+            subround_info: Dict = SubroundE(dbu=s).to_base_info_dict()
+            subround_info["players"] = subround_pairs[s.id]
+            subround_info["words"] = subround_words[s.id]
+            subround_info["divided into games"] = len(games[s.id]) > 0
+            subround_info["games"] = games[s.id]
+            subround_info["results"] = results[("subround", s.id)]
+            subrounds[s.round_id].append(subround_info)
+
+        rounds = []
+        for r in self.tournament_rows(m.Round, tournament_id, m.Round).order_by(
+            m.Round.id
+        ):
+            principal.grant("Round", r.id)
+            round_info: Dict = entities.round.Round(dbu=r).to_base_info_dict()
+            round_info["players"] = round_pairs[r.id]
+            round_info["subrounds"] = subrounds[r.id]
+            round_info["results"] = results[("round", r.id)]
+            rounds.append(round_info)
+
+        snapshot: Dict = entities.tournament.Tournament(
+            dbu=tournament_obj
+        ).to_base_info_dict()
+        snapshot["players"] = [
+            entities.player.Player(dbu=p).to_base_info_dict()
+            for p in self.tournament_rows(m.Player, tournament_id, m.Player).order_by(
+                m.Player.id
+            )
+        ]
+        snapshot["words"] = [
+            entities.word.Word(dbu=w).to_base_info_dict() for w in words
+        ]
+        snapshot["rounds"] = rounds
+        return snapshot
+
+    @database_response
+    def delete_tournament(self, principal: Principal, tournament_id: int) -> None:
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        self.delete_scores_under("tournament", tournament_obj.id)
         self.db.session.delete(tournament_obj)
         self.db.session.commit()
 
     @database_response
-    def insert_round(self, username: str, tournament_id: int, round_name: str) -> int:
-        user_obj = self.get_user(username)
-        if self.is_round_exists_id(user_obj.id, tournament_id, round_name):
+    def insert_round(
+        self, principal: Principal, tournament_id: int, round_name: str
+    ) -> int:
+        if self.is_round_exists_id(principal, tournament_id, round_name):
             raise ObjectAlreadyExistsException("Round")
 
-        tournament_obj = self.get_tournament_id(user_obj.id, tournament_id)
-        new_round = self.models.Round(
-            name=round_name, tournament=tournament_obj, results=Counter()
-        )
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        new_round = self.models.Round(name=round_name, tournament=tournament_obj)
         self.db.session.add(new_round)
+        self.bump_tournament_version(self.models.Tournament, tournament_obj.id)
         self.db.session.commit()
         return new_round.id
 
     @database_response
-    def get_rounds(self, username: str, tournament_id: int) -> List:
-        user_obj = self.get_user(username)
-        tournament = self.get_tournament_id(user_obj.id, tournament_id)
-        return [
-            entities.round.Round(dbu=r).to_base_info_dict() for r in tournament.rounds
-        ]
+    def get_rounds(
+        self,
+        principal: Principal,
+        tournament_id: int,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List:
+        tournament = self.get_tournament_id(principal, tournament_id)
+        return self.get_page(
+            tournament.rounds, self.models.Round, after_id, limit, fields
+        )
 
     @database_response
-    def get_round_info(self, username: str, round_id: int) -> Dict:
-        user_obj = self.get_user(username)
-        round_obj = self.get_round_id(user_obj.id, round_id)
+    def get_round_info(self, principal: Principal, round_id: int) -> Dict:
+        round_obj = self.get_round_id(principal, round_id)
         round_info: Dict = entities.round.Round(round_obj).to_base_info_dict()
-        round_info["subrounds"] = self.get_subrounds(username, round_id)
-        round_info["players"] = self.get_players_in_round(username, round_id)
+        round_info["subrounds"] = self.get_subrounds(principal, round_id)
+        round_info["players"] = self.get_players_in_round(principal, round_id)
         return round_info
 
     @database_response
-    def delete_round(self, username: str, round_id: int) -> None:
-        user_obj = self.get_user(username)
-        round_to_delete = self.get_round_id(user_obj.id, round_id)
+    def delete_round(self, principal: Principal, round_id: int) -> None:
+        round_to_delete = self.get_round_id(principal, round_id)
+        self.delete_scores_under("round", round_to_delete.id)
+        self.bump_tournament_version(  # Words of its subrounds are freed
+            self.models.Tournament, round_to_delete.tournament_id, words=True
+        )
         self.db.session.delete(round_to_delete)
         self.db.session.commit()
 
     @database_response
     def insert_player(
-        self, username: str, tournament_id: int, name_first: str, name_second: str
+        self,
+        principal: Principal,
+        tournament_id: int,
+        name_first: str,
+        name_second: str,
     ) -> int:
-        user_obj = self.get_user(username)
-        if self.is_player_exists_id(
-            user_obj.id, tournament_id, name_first
-        ) or self.is_player_exists_id(user_obj.id, tournament_id, name_second):
-            raise ObjectAlreadyExistsException("Player")
-
-        tournament_obj = self.get_tournament_id(user_obj.id, tournament_id)
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
         new_player = self.models.Player(
             name_first=name_first, name_second=name_second, tournament=tournament_obj
         )
-        self.db.session.add(new_player)
+        try:  # Names used in the tournament are rejected by the PlayerName key
+            self.db.session.add(new_player)
+            self.db.session.flush()
+            self.add_player_names([new_player])
+        except IntegrityError:
+            self.db.session.rollback()
+            raise ObjectAlreadyExistsException("Player")
+        self.bump_tournament_version(self.models.Tournament, tournament_obj.id)
         self.db.session.commit()
         return new_player.id
 
     @database_response
-    def get_players(self, username: str, tournament_id: int) -> List:
-        user_obj = self.get_user(username)
-        tournament = self.get_tournament_id(user_obj.id, tournament_id)
-        return [
-            entities.player.Player(dbu=p).to_base_info_dict()
-            for p in tournament.players
-        ]
+    def insert_players_bulk(
+        self,
+        principal: Principal,
+        tournament_id: int,
+        rows: Iterable[Tuple[int, str, str]],
+        chunk_size: int = 500,
+        retries: int = 3,
+    ) -> Tuple[int, List[Dict]]:
+        """
+        :param rows: (line number, name_first, name_second) tuples, may be a generator
+        :return: amount of inserted pairs and the list of rejected lines
+        Every player name may be used only once in a tournament. Names are checked
+        against the upload in memory, each chunk is inserted optimistically and
+        only if the PlayerName key rejects it, the names already in the tournament
+        are looked up with one query and skipped
+        """
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        PlayerName = self.models.PlayerName
+        inserted = 0
+        rejected: List[Dict] = []
+        seen: Set[str] = set()
+        for chunk in chunked(rows, chunk_size):
+            candidates = []
+            for line_no, first, second in chunk:
+                keys = {normalize_word(first), normalize_word(second)}
+                if len(keys) < 2:
+                    rejected.append({"line": line_no, "reason": "Same player twice"})
+                    continue
+                if keys & seen:
+                    rejected.append(
+                        {"line": line_no, "reason": "Player already exists"}
+                    )
+                    continue
+                seen.update(keys)
+                candidates.append((line_no, first, second, keys))
+            existing: Set[str] = set()
+            for attempt in range(retries):
+                new_players = [
+                    self.models.Player(
+                        name_first=first,
+                        name_second=second,
+                        tournament_id=tournament_obj.id,
+                    )
+                    for _, first, second, keys in candidates
+                    if not keys & existing
+                ]
+                if not new_players:
+                    break
+                try:
+                    self.db.session.add_all(new_players)
+                    self.db.session.flush()
+                    self.add_player_names(new_players)
+                    self.bump_tournament_version(
+                        self.models.Tournament, tournament_obj.id
+                    )
+                    self.db.session.commit()
+                    inserted += len(new_players)
+                    break
+                except IntegrityError:
+                    self.db.session.rollback()
+                    if attempt + 1 == retries:
+                        raise
+                existing = set(
+                    key
+                    for (key,) in self.db.session.query(
+                        PlayerName.normalized_name
+                    ).filter(
+                        PlayerName.tournament_id == tournament_obj.id,
+                        PlayerName.normalized_name.in_(
+                            [key for *_, keys in candidates for key in keys]
+                        ),
+                    )
+                )
+            rejected.extend(
+                {"line": line_no, "reason": "Player already exists"}
+                for line_no, _, _, keys in candidates
+                if keys & existing
+            )
+        rejected.sort(key=lambda line: line["line"])
+        return inserted, rejected
 
     @database_response
-    def delete_player(self, username: str, pair_id: int) -> None:
-        user_obj = self.get_user(username)
-        pair_to_delete = self.get_pair_id(user_obj.id, pair_id)
+    def get_players(
+        self,
+        principal: Principal,
+        tournament_id: int,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List:
+        tournament = self.get_tournament_id(principal, tournament_id)
+        return self.get_page(
+            tournament.players, self.models.Player, after_id, limit, fields
+        )
+
+    @database_response
+    def get_pair_by_name(
+        self, principal: Principal, tournament_id: int, player_name: str
+    ) -> int:
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        pair_id = self.find_pair_id(tournament_obj.id, player_name)
+        if pair_id is None:
+            raise ObjectNotFoundException("Player")
+        return pair_id
+
+    @database_response
+    def stream_players(
+        self,
+        principal: Principal,
+        tournament_id: int,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        return self.iter_rows(tournament_obj.players, self.models.Player, fields)
+
+    @database_response
+    def delete_player(self, principal: Principal, pair_id: int) -> None:
+        pair_to_delete = self.get_pair_id(principal, pair_id)
+        Score = self.models.Score
+        scored = (  # Its scores are deleted with it
+            self.db.session.query(Score.scope, Score.scope_id)
+            .filter(Score.player_id == pair_to_delete.id)
+            .all()
+        )
+        for scope in self.models.SCORE_SCOPES:
+            scope_ids = [scope_id for name, scope_id in scored if name == scope]
+            if scope_ids:
+                self.bump_results_version(scope, scope_ids)
+        self.bump_tournament_version(
+            self.models.Tournament, pair_to_delete.tournament_id
+        )
         self.db.session.delete(pair_to_delete)
         self.db.session.commit()
+        self.invalidate_scores(*scored)
 
     @database_response
     def insert_word(
-        self, username: str, tournament_id: int, word_text: str, word_difficulty: int
+        self,
+        principal: Principal,
+        tournament_id: int,
+        word_text: str,
+        word_difficulty: int,
     ) -> int:
-        user_obj = self.get_user(username)
-        if self.is_word_exists_id(user_obj.id, tournament_id, word_text):
-            raise ObjectAlreadyExistsException("Word")
-
-        tournament_obj = self.get_tournament_id(user_obj.id, tournament_id)
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
         new_word = self.models.Word(
             text=word_text,
+            normalized_text=normalize_word(word_text),
             difficulty=word_difficulty,
             tournament=tournament_obj,
             random_seed=gen_rand_key(),
         )
-        self.db.session.add(new_word)
+        try:  # Duplicates are rejected by the (tournament, normalized text) index
+            self.db.session.add(new_word)
+            self.db.session.flush()
+        except IntegrityError:
+            self.db.session.rollback()
+            raise ObjectAlreadyExistsException("Word")
+        self.bump_tournament_version(
+            self.models.Tournament, tournament_obj.id, words=True
+        )
+        version = self.read_words_version(tournament_obj.id)
         self.db.session.commit()
+        self.sync_word_pools(
+            tournament_obj.id,
+            version,
+            word_difficulty,
+            lambda pool: pool.add(new_word.id),
+        )
         return new_word.id
 
     @database_response
-    def get_words(self, username: str, tournament_id: int) -> List:
-        user_obj = self.get_user(username)
-        tournament_obj = self.get_tournament_id(user_obj.id, tournament_id)
-        return [
-            entities.word.Word(dbu=w).to_base_info_dict() for w in tournament_obj.words
-        ]
+    def insert_words_bulk(
+        self,
+        principal: Principal,
+        tournament_id: int,
+        rows: Iterable[Tuple[int, str, int]],
+        chunk_size: int = 500,
+        retries: int = 3,
+    ) -> Tuple[int, List[Dict]]:
+        """
+        :param rows: (line number, text, difficulty) tuples, may be a generator
+        :return: amount of inserted words and the list of rejected lines
+        Rows are inserted in chunks with one multi-row insert each, duplicates in the
+        upload are skipped by normalized text. Only if the unique index rejects
+        a chunk, the words already in the tournament are looked up and skipped
+        """
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        Word = self.models.Word
+        inserted = 0
+        rejected: List[Dict] = []
+        seen: Set[str] = set()
+        for chunk in chunked(rows, chunk_size):
+            candidates = []
+            for line_no, word_text, difficulty in chunk:
+                key = normalize_word(word_text)
+                if key in seen:
+                    rejected.append({"line": line_no, "reason": "Word already exists"})
+                    continue
+                seen.add(key)
+                candidates.append(
+                    {
+                        "text": word_text,
+                        "normalized_text": key,
+                        "difficulty": difficulty,
+                        "tournament_id": tournament_obj.id,
+                        "random_seed": gen_rand_key(),
+                        "line": line_no,
+                    }
+                )
+            existing: Set[str] = set()
+            for attempt in range(retries):
+                new_words = [
+                    {name: value for name, value in word.items() if name != "line"}
+                    for word in candidates
+                    if word["normalized_text"] not in existing
+                ]
+                if not new_words:
+                    break
+                try:
+                    self.db.session.execute(Word.__table__.insert(), new_words)
+                    self.bump_tournament_version(
+                        self.models.Tournament, tournament_obj.id, words=True
+                    )
+                    self.db.session.commit()
+                    inserted += len(new_words)
+                    break
+                except IntegrityError:
+                    self.db.session.rollback()
+                    if attempt + 1 == retries:
+                        raise
+                existing = set(
+                    key
+                    for (key,) in self.db.session.query(Word.normalized_text).filter(
+                        Word.tournament_id == tournament_obj.id,
+                        Word.normalized_text.in_(
+                            [word["normalized_text"] for word in candidates]
+                        ),
+                    )
+                )
+            rejected.extend(
+                {"line": word["line"], "reason": "Word already exists"}
+                for word in candidates
+                if word["normalized_text"] in existing
+            )
+        rejected.sort(key=lambda line: line["line"])
+        return inserted, rejected
 
     @database_response
-    def delete_word(self, username: str, word_id: int) -> None:
-        user_obj = self.get_user(username)
-        word_to_delete = self.get_word_id(user_obj.id, word_id)
+    def get_words(
+        self,
+        principal: Principal,
+        tournament_id: int,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List:
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        return self.get_page(
+            tournament_obj.words, self.models.Word, after_id, limit, fields
+        )
+
+    @database_response
+    def stream_words(
+        self,
+        principal: Principal,
+        tournament_id: int,
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        tournament_obj = self.get_tournament_id(principal, tournament_id)
+        return self.iter_rows(tournament_obj.words, self.models.Word, fields)
+
+    @database_response
+    def delete_word(self, principal: Principal, word_id: int) -> None:
+        word_to_delete = self.get_word_id(principal, word_id)
+        tournament_id = word_to_delete.tournament_id
+        difficulty, word_id = word_to_delete.difficulty, word_to_delete.id
+        self.bump_tournament_version(self.models.Tournament, tournament_id, words=True)
+        version = self.read_words_version(tournament_id)
         self.db.session.delete(word_to_delete)
         self.db.session.commit()
+        self.sync_word_pools(
+            tournament_id, version, difficulty, lambda pool: pool.discard(word_id)
+        )
 
     @database_response
-    def add_pair_id_to_round(self, username: str, round_id: int, pair_id: int) -> None:
-        user_obj = self.get_user(username)
-        round_obj = self.get_round_id(user_obj.id, round_id)
-        player_obj = self.get_pair_id(user_obj.id, pair_id)
-        try:  # FIXME: Find some better way to check
-            round_obj.players.append(player_obj)
-            results = Counter(round_obj.results)
-            results[pair_id] = 0
-            round_obj.results = results
-            self.db.session.add(round_obj)
-            self.db.session.commit()
-        except IntegrityError as e:
-            raise ObjectAlreadyExistsException("Player in round")
+    def add_pair_id_to_round(
+        self, principal: Principal, round_id: int, pair_id: int
+    ) -> None:
+        self.add_pair_ids_to_round(principal, round_id, [pair_id])
 
     @database_response
-    def get_players_in_round(self, username: str, round_id: int) -> List:
-        user_obj = self.get_user(username)
-        round_obj = self.get_round_id(user_obj.id, round_id)
+    def add_pair_ids_to_round(
+        self, principal: Principal, round_id: int, pair_ids: List[int]
+    ) -> None:
+        round_obj = self.get_round_id(principal, round_id)
+        self.link_pairs_with_scope(
+            principal,
+            round_obj,
+            self.models.players_in_rounds,
+            "round",
+            pair_ids,
+            "Player in round",
+        )
+
+    @database_response
+    def get_players_in_round(self, principal: Principal, round_id: int) -> List:
+        round_obj = self.get_round_id(principal, round_id)
         return [
-            entities.player.Player(dbu=p).to_base_info_dict()
-            for p in self.db.session.query(self.models.Round)
-            .filter_by(id=round_obj.id)
-            .first()
-            .players
+            entities.player.Player(dbu=p).to_base_info_dict() for p in round_obj.players
         ]
 
     @database_response
     def delete_player_from_round(
-        self, username: str, round_id: int, pair_id: int
+        self, principal: Principal, round_id: int, pair_id: int
     ) -> None:
-        user_obj = self.get_user(username)
-        round_obj = self.get_round_id(user_obj.id, round_id)
-        player_obj = self.get_pair_id(user_obj.id, pair_id)
+        round_obj = self.get_round_id(principal, round_id)
+        player_obj = self.get_pair_id(principal, pair_id)
         try:  # FIXME: Duplicated code
             round_obj.players.remove(player_obj)
-            results = Counter(round_obj.results)
-            del results[pair_id]
-            round_obj.results = results
+            self.delete_score("round", round_obj.id, player_obj.id)
+            self.bump_results_version("round", [round_obj.id])
+            self.bump_tournament_version(
+                self.models.Tournament, round_obj.tournament_id
+            )
             self.db.session.add(round_obj)
             self.db.session.commit()
         except StaleDataError as e:
             raise ObjectNotFoundException("Player in round")
+        self.invalidate_scores(("round", round_obj.id))
 
     @database_response
-    def insert_subround(self, username: str, round_id: int, subround_name: str) -> int:
-        user_obj = self.get_user(username)
-        if self.is_subround_exists_id(user_obj.id, round_id, subround_name):
+    def insert_subround(
+        self, principal: Principal, round_id: int, subround_name: str
+    ) -> int:
+        if self.is_subround_exists_id(principal, round_id, subround_name):
             raise ObjectAlreadyExistsException("Subround")
 
-        round_obj = self.get_round_id(user_obj.id, round_id)
-        new_subround = self.models.Subround(
-            name=subround_name, round=round_obj, results=Counter()
-        )
+        round_obj = self.get_round_id(principal, round_id)
+        new_subround = self.models.Subround(name=subround_name, round=round_obj)
         self.db.session.add(new_subround)
+        self.bump_tournament_version(self.models.Tournament, round_obj.tournament_id)
         self.db.session.commit()
         return new_subround.id
 
     @database_response
-    def get_subround_info(self, username: str, subround_id: int) -> Dict:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
+    def get_subround_info(self, principal: Principal, subround_id: int) -> Dict:
+        subround_obj = self.get_subround_id(principal, subround_id)
         subround_info: Dict = SubroundE(subround_obj).to_base_info_dict()
-        games = self.get_games(username, subround_id)
+        games = self.get_games(principal, subround_id)
         subround_info["divided into games"] = len(games) > 0
         subround_info["games"] = games
-        subround_info["players"] = self.get_players_in_subround(username, subround_id)
+        subround_info["players"] = self.get_players_in_subround(principal, subround_id)
         return subround_info
 
     @database_response
-    def get_subrounds(self, username: str, round_id: int) -> List:
-        user_obj = self.get_user(username)
-        round_obj = self.get_round_id(user_obj.id, round_id)
-        return [SubroundE(dbu=p).to_base_info_dict() for p in round_obj.subrounds]
+    def get_subrounds(
+        self,
+        principal: Principal,
+        round_id: int,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List:
+        round_obj = self.get_round_id(principal, round_id)
+        return self.get_page(
+            round_obj.subrounds, self.models.Subround, after_id, limit, fields
+        )
 
     @database_response
-    def delete_subround(self, username: str, subround_id: int) -> None:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
+    def delete_subround(self, principal: Principal, subround_id: int) -> None:
+        subround_obj = self.get_subround_id(principal, subround_id)
+        self.delete_scores_under("subround", subround_obj.id)
+        self.bump_tournament_version(  # Its words are freed
+            self.models.Round, subround_obj.round_id, words=True
+        )
         self.db.session.delete(subround_obj)
         self.db.session.commit()
 
     @database_response
     def add_pair_id_to_subround(
-        self, username: str, subround_id: int, pair_id: int
+        self, principal: Principal, subround_id: int, pair_id: int
     ) -> None:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
-        player_obj = self.get_pair_id(user_obj.id, pair_id)
-        try:  # FIXME: Find some better way to check
-            subround_obj.players.append(player_obj)
-            results = Counter(subround_obj.results)
-            results[pair_id] = 0
-            subround_obj.results = results
-            self.db.session.add(subround_obj)
-            self.db.session.commit()
-        except IntegrityError as e:
-            raise ObjectAlreadyExistsException("Player in subround")
+        self.add_pair_ids_to_subround(principal, subround_id, [pair_id])
 
     @database_response
-    def get_players_in_subround(self, username: str, subround_id: int) -> List:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
+    def add_pair_ids_to_subround(
+        self, principal: Principal, subround_id: int, pair_ids: List[int]
+    ) -> None:
+        subround_obj = self.get_subround_id(principal, subround_id)
+        self.link_pairs_with_scope(
+            principal,
+            subround_obj,
+            self.models.players_in_subrounds,
+            "subround",
+            pair_ids,
+            "Player in subround",
+        )
+
+    @database_response
+    def get_players_in_subround(self, principal: Principal, subround_id: int) -> List:
+        subround_obj = self.get_subround_id(principal, subround_id)
         return [
             entities.player.Player(dbu=p).to_base_info_dict()
-            for p in self.db.session.query(self.models.Subround)
-            .filter_by(id=subround_obj.id)
-            .first()
-            .players
+            for p in subround_obj.players
         ]
 
     @database_response
     def delete_player_from_subround(
-        self, username: str, subround_id: int, pair_id: int
+        self, principal: Principal, subround_id: int, pair_id: int
     ) -> None:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
-        player_obj = self.get_pair_id(user_obj.id, pair_id)
+        subround_obj = self.get_subround_id(principal, subround_id)
+        player_obj = self.get_pair_id(principal, pair_id)
         try:  # FIXME: Duplicated code
             subround_obj.players.remove(player_obj)
-            results = Counter(subround_obj.results)
-            del results[pair_id]
-            subround_obj.results = results
+            self.delete_score("subround", subround_obj.id, player_obj.id)
+            self.bump_results_version("subround", [subround_obj.id])
+            self.bump_tournament_version(self.models.Round, subround_obj.round_id)
             self.db.session.add(subround_obj)
             self.db.session.commit()
         except StaleDataError as e:
             raise ObjectNotFoundException("Player in round")
+        self.invalidate_scores(("subround", subround_obj.id))
 
     @database_response
     def add_x_words_of_diff_y_to_subround(
-        self, username: str, subround_id: int, words_difficulty: int, words_amount: int
+        self,
+        principal: Principal,
+        subround_id: int,
+        words_difficulty: int,
+        words_amount: int,
     ) -> None:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
-        words = self.get_x_random_words_with_difficulty_y_id(
-            user_obj.id,
+        subround_obj = self.get_subround_id(principal, subround_id)
+        self.draw_words_to_subround(
+            subround_obj,
             subround_obj.round.tournament_id,
-            words_amount,
             words_difficulty,
+            words_amount,
         )
-        self.link_words_with_subround(subround_obj, words)
 
     @database_response
-    def get_subround_words(self, username: str, subround_id: int) -> List:
-        user_obj = self.get_user(username)
-        s = self.get_subround_id(user_obj.id, subround_id)
+    def get_subround_words(self, principal: Principal, subround_id: int) -> List:
+        s = self.get_subround_id(principal, subround_id)
         return [entities.word.Word(dbu=w).to_base_info_dict() for w in s.words]
 
     @database_response
     def split_subround_into_games(
-        self, username: str, subround_id: int, games_amount: int
+        self, principal: Principal, subround_id: int, games_amount: int
     ) -> List[int]:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
+        subround_obj = self.get_subround_id(principal, subround_id)
         if subround_obj.games.count() > 0:
             raise ObjectAlreadyExistsException("Subround already split")
-        if subround_obj.players.count() < 2 * games_amount:
+        players_ids = [
+            player_id
+            for (player_id,) in self.db.session.query(
+                self.models.players_in_subrounds.c.player_id
+            ).filter_by(subround_id=subround_obj.id)
+        ]
+        if len(players_ids) < 2 * games_amount:
             raise LogicGameSizeException()
-        players_parts = shuffle_and_split_near_equal_parts(
-            subround_obj.players.all(), games_amount
-        )  # FIXME: can be slow?
-        for players_part in players_parts:
-            results_counter = Counter([(p.id, 0) for p in players_part])
-            new_game = self.models.Game(
-                subround=subround_obj, results=results_counter, results_set=False
+        players_parts = shuffle_and_split_near_equal_parts(players_ids, games_amount)
+        new_games = [
+            self.models.Game(subround_id=subround_obj.id, results_set=False)
+            for players_part in players_parts
+        ]
+        try:  # One transaction: games first (for ids), then all links at once
+            self.db.session.add_all(new_games)
+            self.db.session.flush()
+            self.db.session.execute(
+                self.models.players_in_games.insert(),
+                [
+                    {"player_id": player_id, "game_id": new_game.id}
+                    for new_game, players_part in zip(new_games, players_parts)
+                    for player_id in players_part
+                ],
+            )
+            self.db.session.execute(
+                self.models.Score.__table__.insert(),
+                [
+                    {"scope": "game", "scope_id": new_game.id, "player_id": player_id}
+                    for new_game, players_part in zip(new_games, players_parts)
+                    for player_id in players_part
+                ],
             )
-            self.db.session.add(new_game)
+            self.bump_tournament_version(self.models.Round, subround_obj.round_id)
             self.db.session.commit()
-            for player in players_part:
-                player.games.append(new_game)
-                self.db.session.add(player)
-                self.db.session.commit()
-        final_ids = [game.id for game in subround_obj.games]
-        return final_ids
+        except Exception:
+            self.db.session.rollback()
+            raise
+        return [new_game.id for new_game in new_games]
 
     @database_response
-    def get_games(self, username: str, subround_id: int) -> List[int]:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
+    def get_games(self, principal: Principal, subround_id: int) -> List[int]:
+        subround_obj = self.get_subround_id(principal, subround_id)
         games_ids = [game.id for game in subround_obj.games]
         return games_ids
 
     @database_response
-    def undo_split_subround_into_games(self, username: str, subround_id: int) -> None:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
+    def undo_split_subround_into_games(
+        self, principal: Principal, subround_id: int
+    ) -> None:
+        subround_obj = self.get_subround_id(principal, subround_id)
         if subround_obj.games.count() == 0:
             raise ObjectNotFoundException("Subround not split")
         for game in subround_obj.games:
+            self.delete_scores_under("game", game.id)
             self.db.session.delete(game)  # I believe in cascade delete
+        self.bump_tournament_version(self.models.Round, subround_obj.round_id)
         self.db.session.commit()
 
     @database_response
-    def get_game_info(self, username: str, game_id: int) -> Dict:
-        user_obj = self.get_user(username)
-        game_obj = self.get_game_id(user_obj.id, game_id)
+    def get_game_info(self, principal: Principal, game_id: int) -> Dict:
+        game_obj = self.get_game_id(principal, game_id)
         game_info: Dict = {"id": game_id}
         players = [
             entities.player.Player(dbu=p).to_base_info_dict() for p in game_obj.players
@@ -657,87 +1776,440 @@ class DBManager:
         game_info["players"] = players
         if game_obj.results_set:
             game_info["results set"] = True
-            game_info["results"] = self.get_game_result(username, game_id, pretty=True)
+            game_info["results"] = dict(
+                self.get_game_result(principal, game_id, pretty=True)
+            )
         else:
             game_info["results set"] = False
         return game_info
 
     @database_response
-    def set_game_result(self, username: str, game_id: int, result: Counter) -> None:
-        user_obj = self.get_user(username)
-        game_obj = self.get_game_id(user_obj.id, game_id)
+    def set_game_result(
+        self, principal: Principal, game_id: int, result: Counter
+    ) -> None:
+        game_obj = self.get_game_id(principal, game_id)
         if game_obj.results_set:
             raise ObjectAlreadyExistsException("Game results")
-        if result.keys() != set([p.id for p in game_obj.players]):
+        game_id, subround_id = game_obj.id, game_obj.subround_id
+        Score = self.models.Score
+        game_rows = (Score.scope == "game") & (Score.scope_id == game_id)
+        players_ids = set(
+            player_id
+            for (player_id,) in self.db.session.query(Score.player_id).filter(game_rows)
+        )
+        if result.keys() != players_ids:
             raise LogicPlayersDontMatchException()
-        game_obj.results_set = True
-        game_obj.results = result
-        self.db.session.add(game_obj)
-        self.db.session.commit()
-        self.update_add_results_push_from_game(game_obj)
+
+        def write_results():
+            if not self.switch_game_results_set(game_id, True):
+                raise ObjectAlreadyExistsException("Game results")
+            self.db.session.execute(
+                update(Score)
+                .where(game_rows & (Score.player_id == bindparam("pair_id")))
+                .values(value=bindparam("score"))
+                .execution_options(synchronize_session=False),
+                [{"pair_id": key, "score": value} for key, value in result.items()],
+            )
+            round_id = self.push_game_scores(game_id, subround_id, 1)
+            self.bump_tournament_version(self.models.Subround, subround_id)
+            return round_id
+
+        round_id = self.commit_action(write_results)
+        self.invalidate_scores(
+            ("game", game_id), ("subround", subround_id), ("round", round_id)
+        )
 
     @database_response
-    def get_game_result(self, username: str, game_id: int, pretty: bool) -> Counter:
-        user_obj = self.get_user(username)
-        game_obj = self.get_game_id(user_obj.id, game_id)
-        if not game_obj.results_set:
+    def get_game_result(
+        self, principal: Principal, game_id: int, pretty: bool
+    ) -> List[Tuple]:
+        Game = self.models.Game
+        _, results_version, results_set = self.get_owned_columns(
+            principal,
+            Game,
+            game_id,
+            "Game",
+            "Subround",
+            Game.results_version,
+            Game.results_set,
+        )
+        if not results_set:
             raise ObjectNotFoundException("Game results")
-        if not pretty:
-            return game_obj.results
-        players: List = game_obj.players
-        names_to_score: Counter = Counter()
-        for player in players:
-            names_to_score[
-                f"{player.name_first} & {player.name_second}"
-            ] = game_obj.results[player.id]
-        return names_to_score
+        return self.get_cached_scores("game", int(game_id), pretty, results_version)
 
     @database_response
-    def delete_game_result(self, username: str, game_id: int) -> None:
-        user_obj = self.get_user(username)
-        game_obj = self.get_game_id(user_obj.id, game_id)
+    def delete_game_result(self, principal: Principal, game_id: int) -> None:
+        game_obj = self.get_game_id(principal, game_id)
         if not game_obj.results_set:
             raise ObjectNotFoundException("Game results")
-        self.update_subtract_results_push_from_game(game_obj)
-        game_obj.results_set = False
-        self.db.session.add(game_obj)
-        self.db.session.commit()
+        game_id, subround_id = game_obj.id, game_obj.subround_id
+
+        def erase_results():
+            if not self.switch_game_results_set(game_id, False):
+                raise ObjectNotFoundException("Game results")
+            round_id = self.push_game_scores(game_id, subround_id, -1)
+            self.bump_tournament_version(self.models.Subround, subround_id)
+            return round_id
+
+        round_id = self.commit_action(erase_results)
+        self.invalidate_scores(
+            ("game", game_id), ("subround", subround_id), ("round", round_id)
+        )
+
+    @database_response
+    def get_round_versions(
+        self, principal: Principal, round_id: int
+    ) -> Tuple[int, int]:
+        """
+        :return: version of the tournament (the ETag) and of the round results
+        (the cache key), the ownership is checked in the same statement
+        """
+        Round = self.models.Round
+        return self.get_owned_columns(
+            principal, Round, round_id, "Round", "Tournament", Round.results_version
+        )
+
+    @database_response
+    def get_subround_versions(
+        self, principal: Principal, subround_id: int
+    ) -> Tuple[int, int]:
+        """
+        :return: as get_round_versions
+        """
+        Subround = self.models.Subround
+        return self.get_owned_columns(
+            principal,
+            Subround,
+            subround_id,
+            "Subround",
+            "Round",
+            Subround.results_version,
+        )
 
     @database_response
     def get_subround_result(
-        self, username: str, subround_id: int, pretty: bool
-    ) -> Counter:
-        user_obj = self.get_user(username)
-        subround_obj = self.get_subround_id(user_obj.id, subround_id)
-        if subround_obj.results is None:
-            raise ObjectNotFoundException("Game results")
-        if not pretty:
-            return subround_obj.results
-        players: List = subround_obj.players
-        names_to_score: Counter = Counter()
-        for player in players:
-            names_to_score[
-                f"{player.name_first} & {player.name_second}"
-            ] = subround_obj.results[player.id]
-        return names_to_score
+        self,
+        principal: Principal,
+        subround_id: int,
+        pretty: bool,
+        results_version: Optional[int] = None,
+    ) -> List[Tuple]:
+        """
+        :param results_version: from get_subround_versions in the same request,
+        which has checked the ownership; read here if None
+        """
+        if results_version is None:
+            _, results_version = self.get_subround_versions(principal, subround_id)
+        return self.get_cached_scores(
+            "subround", int(subround_id), pretty, results_version
+        )
 
     @database_response
-    def get_round_result(self, username: str, round_id: int, pretty: bool) -> Counter:
-        user_obj = self.get_user(username)
-        round_obj = self.get_round_id(user_obj.id, round_id)
-        if round_obj.results is None:  # FIXME: Duplicated code
-            raise ObjectNotFoundException("Game results")
-        if not pretty:
-            return round_obj.results
-        players: List = round_obj.players
-        names_to_score: Counter = Counter()
-        for player in players:
-            names_to_score[
-                f"{player.name_first} & {player.name_second}"
-            ] = round_obj.results[player.id]
-        return names_to_score
+    def get_round_result(
+        self,
+        principal: Principal,
+        round_id: int,
+        pretty: bool,
+        results_version: Optional[int] = None,
+    ) -> List[Tuple]:
+        """
+        :param results_version: from get_round_versions in the same request,
+        which has checked the ownership; read here if None
+        """
+        if results_version is None:
+            _, results_version = self.get_round_versions(principal, round_id)
+        return self.get_cached_scores("round", int(round_id), pretty, results_version)
+
+    @database_response
+    def stream_result(
+        self, principal: Principal, scope: str, scope_id: int, pretty: bool
+    ) -> Iterator[Tuple]:
+        """
+        :param scope: "round", "subround" or "game"
+        :return: iterator over the results, bypasses the results cache
+        """
+        if scope == "game":
+            game_obj = self.get_game_id(principal, scope_id)
+            if not game_obj.results_set:
+                raise ObjectNotFoundException("Game results")
+            scope_id = game_obj.id
+        elif scope == "subround":
+            scope_id = self.get_subround_id(principal, scope_id).id
+        else:
+            scope_id = self.get_round_id(principal, scope_id).id
+        return self.iter_scores(scope, scope_id, pretty)
+
+    @database_response
+    def get_round_leaderboard(
+        self,
+        principal: Principal,
+        round_id: int,
+        start: int,
+        stop: Optional[int],
+        pretty: bool,
+    ) -> List[Tuple]:
+        """
+        :param start: first place to return, counting from 0
+        :param stop: place after the last one to return, up to the end if None
+        :return: part of the round results, top-k is start=0, stop=k
+        """
+        if start < 0:
+            raise UserException(400, "Start should not be negative")
+        limit = None if stop is None else stop - start
+        if limit is not None and limit <= 0:
+            raise UserException(400, "Limit should be positive")
+        round_obj = self.get_round_id(principal, round_id)
+        return self.get_scores("round", round_obj.id, pretty, start, limit)
+
+    @database_response
+    def get_round_rank(
+        self, principal: Principal, round_id: int, pair_id: int
+    ) -> Tuple[int, int]:
+        round_obj = self.get_round_id(principal, round_id)
+        return self.get_rank("round", round_obj.id, pair_id)
+
+    @database_response
+    def create_missing_indexes(self) -> Tuple[List[str], List[str]]:
+        """
+        Creates the indexes declared in the models, but missing in an existing
+        database (create_all creates only missing tables). Safe to run repeatedly
+        Indexes on columns which are not in the database yet are skipped,
+        the migrations adding these columns create them
+        :return: names of the created indexes and of the skipped ones
+        """
+        inspector = sqlalchemy_inspect(self.db.engine)
+        created, skipped = [], []
+        for table in self.db.Model.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = set(index["name"] for index in inspector.get_indexes(table.name))
+            columns = set(
+                column["name"] for column in inspector.get_columns(table.name)
+            )
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if any(column.name not in columns for column in index.columns):
+                    skipped.append(index.name)
+                    continue
+                index.create(self.db.engine)
+                created.append(index.name)
+        return created, skipped
+
+    @database_response
+    def migrate_tournament_version(self) -> bool:
+        """
+        Adds Tournament.version and Tournament.words_version to an existing
+        database, every tournament starts at version 0. Safe to run repeatedly
+        :return: whether any column was added
+        """
+        inspector = sqlalchemy_inspect(self.db.engine)
+        columns = [c["name"] for c in inspector.get_columns("tournament")]
+        missing = [name for name in ("version", "words_version") if name not in columns]
+        for name in missing:
+            self.db.session.execute(
+                text(
+                    f"ALTER TABLE tournament ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"
+                )
+            )
+        self.db.session.commit()
+        return bool(missing)
+
+    @database_response
+    def migrate_results_version(self) -> List[str]:
+        """
+        Adds results_version to the rounds, subrounds and games of an existing
+        database, every object starts at version 0. Safe to run repeatedly
+        :return: tables the column was added to
+        """
+        inspector = sqlalchemy_inspect(self.db.engine)
+        added = []
+        for scope in self.models.SCORE_SCOPES:
+            columns = [c["name"] for c in inspector.get_columns(scope)]
+            if "results_version" in columns:
+                continue
+            self.db.session.execute(
+                text(
+                    f'ALTER TABLE "{scope}"'
+                    " ADD COLUMN results_version INTEGER NOT NULL DEFAULT 0"
+                )
+            )
+            added.append(scope)
+        self.db.session.commit()
+        return added
+
+    @database_response
+    def migrate_pickled_results(self) -> int:
+        """
+        Moves results of rounds, subrounds and games from the legacy pickled
+        "results" columns into the Score table, skips objects which already have scores
+        Run it before a schema migration drops these columns
+        :return: amount of inserted scores
+        """
+        m = self.models
+        self.migrate_tournament_version()
+        m.Score.__table__.create(self.db.engine, checkfirst=True)
+        inspector = sqlalchemy_inspect(self.db.engine)
+        inserted = 0
+        self.migrate_results_version()
+        for scope in m.SCORE_SCOPES:
+            columns = [c["name"] for c in inspector.get_columns(scope)]
+            if "results" not in columns:
+                continue
+            migrated = set(
+                scope_id
+                for (scope_id,) in self.db.session.query(m.Score.scope_id)
+                .filter(m.Score.scope == scope)
+                .distinct()
+            )
+            legacy_rows = self.db.session.execute(
+                text(
+                    f'SELECT id, results{", results_set" if scope == "game" else ""}'
+                    f' FROM "{scope}"'
+                )
+            )
+            for row in legacy_rows:
+                if row[0] in migrated or row[1] is None:
+                    continue
+                association_table = getattr(m, f"players_in_{scope}s")
+                results = {  # Zero scores of members could be lost in pickles
+                    player_id: 0
+                    for (player_id,) in self.db.session.query(
+                        association_table.c.player_id
+                    ).filter(association_table.c[f"{scope}_id"] == row[0])
+                }
+                if scope != "game" or row[2]:  # Unset games stored only zeros
+                    results.update(pickle.loads(row[1]))
+                scores = [
+                    {
+                        "scope": scope,
+                        "scope_id": row[0],
+                        "player_id": player_id,
+                        "value": value,
+                    }
+                    for player_id, value in results.items()
+                    if isinstance(player_id, int)
+                ]
+                if scores:
+                    self.db.session.execute(m.Score.__table__.insert(), scores)
+                    self.bump_results_version(scope, [row[0]])
+                    inserted += len(scores)
+        self.db.session.execute(
+            update(m.Tournament).values(version=m.Tournament.version + 1)
+        )
+        self.db.session.commit()
+        self.results_cache.clear()
+        return inserted
 
     @database_response
     def clear_all_tables(self):
+        self.token_cache.clear()
+        self.results_cache.clear()
+        self.word_pools.clear()
+        self.revoked_tokens.clear()
         self.db.drop_all()
         self.db.create_all()
+
+    @database_response
+    def migrate_word_namespace(self) -> int:
+        """
+        Moves an existing database from globally unique word texts to texts
+        unique within a tournament: fills Word.normalized_text, drops the old
+        global unique index and creates the scoped one. Safe to run repeatedly
+        :return: amount of words whose normalized text was filled
+        """
+        Word = self.models.Word
+        inspector = sqlalchemy_inspect(self.db.engine)
+        columns = [c["name"] for c in inspector.get_columns("word")]
+        if "normalized_text" not in columns:
+            self.db.session.execute(
+                text("ALTER TABLE word ADD COLUMN normalized_text VARCHAR")
+            )
+        rows = self.db.session.execute(
+            text("SELECT id, text, tournament_id FROM word")
+        ).all()
+        keys: Dict[Tuple[int, str], int] = dict()
+        duplicates = []
+        for word_id, word_text, tournament_id in rows:
+            key = (tournament_id, normalize_word(word_text))
+            if key in keys:
+                duplicates.append(word_id)
+            keys.setdefault(key, word_id)
+        if duplicates:
+            self.db.session.rollback()
+            raise DBException(
+                409,
+                f"Words {', '.join(map(str, duplicates))} duplicate other words of their"
+                f" tournaments after normalization, rename or delete them first",
+            )
+        if rows:
+            self.db.session.execute(
+                update(Word.__table__)
+                .where(Word.id == bindparam("word_id"))
+                .values(normalized_text=bindparam("key")),
+                [
+                    {"word_id": word_id, "key": key}
+                    for (_, key), word_id in keys.items()
+                ],
+            )
+        self.db.session.commit()
+        if "ix_word_text" in set(
+            index["name"] for index in inspector.get_indexes("word")
+        ):
+            self.db.session.execute(text("DROP INDEX ix_word_text"))
+            self.db.session.commit()
+        self.create_missing_indexes()
+        return len(rows)
+
+    @database_response
+    def migrate_player_names(self) -> int:
+        """
+        Creates the PlayerName table in an existing database and fills it
+        for the pairs which have no names there yet, replaces the indexes
+        of the former name lookups with one on the tournament.
+        Safe to run repeatedly
+        :return: amount of inserted names
+        """
+        m = self.models
+        m.PlayerName.__table__.create(self.db.engine, checkfirst=True)
+        keys = set(
+            self.db.session.query(
+                m.PlayerName.tournament_id, m.PlayerName.normalized_name
+            )
+        )
+        missing = (
+            m.Player.query.outerjoin(m.PlayerName)
+            .filter(m.PlayerName.player_id.is_(None))
+            .all()
+        )
+        duplicates = []
+        for player in missing:
+            pair_keys = set(
+                (player.tournament_id, normalize_word(name))
+                for name in (player.name_first, player.name_second)
+            )
+            if len(pair_keys) < 2 or pair_keys & keys:
+                duplicates.append(player.id)
+            keys.update(pair_keys)
+        if duplicates:
+            raise DBException(
+                409,
+                f"Pairs {', '.join(map(str, duplicates))} reuse player names of their"
+                f" tournaments after normalization, rename or delete them first",
+            )
+        if missing:
+            self.add_player_names(missing)
+        self.db.session.commit()
+        existing = set(
+            index["name"]
+            for index in sqlalchemy_inspect(self.db.engine).get_indexes("player")
+        )
+        for name in (
+            "ix_player_tournament_name_first",
+            "ix_player_tournament_name_second",
+        ):
+            if name in existing:
+                self.db.session.execute(text(f"DROP INDEX {name}"))
+        self.db.session.commit()
+        self.create_missing_indexes()
+        return 2 * len(missing)
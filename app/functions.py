@@ -2,26 +2,32 @@
 Query functions are implemented in this file
 Used by the file routes.py
 Before decorator functions return tuple "code, data" [Tuple[int, Dictionary]]
+or "code, data, headers" [Tuple[int, Dictionary, Dictionary]]
 Decorator handles exceptions and returns the flask Response object
 """
 
 import datetime
+import json
 
 from app.extensions import dbm
-from exceptions.UserExceptions import ObjectNotFoundException
-from utils.encrypt import encrypt_password, check_password
+from exceptions.UserExceptions import ObjectNotFoundException, UserException
+from utils.encrypt import encrypt_password, check_password, needs_rehash
 from config import Config
 from exceptions import KnownException
 from app.db_manager import DBException
+from entities.principal import Principal
 from utils.utils import gen_token, full_stack
+from utils.signed_token import gen_signed_token, read_signed_token, is_signed_token
+from utils.bulk_import import ImportReader, non_empty_str
 from utils import template_data  # FIXME: DEBUG only
-from flask import make_response
+from flask import make_response, stream_with_context
 from flask import Response
-from typing import Callable, Tuple, Dict, Counter, List
+from werkzeug.http import parse_etags, quote_etag
+from typing import Callable, Tuple, Dict, Counter, List, Iterable, Optional
 
 
 def function_response(
-    result_function: Callable[..., Tuple[int, Dict]]
+    result_function: Callable[..., Tuple[int, Dict]],
 ) -> Callable[..., Response]:
     """
     :param result_function: function to wrap, returns code (Int) and data (JSON)
@@ -34,48 +40,162 @@ def function_response(
     """
 
     def wrapped(*args, **kwargs) -> Response:
+        headers: Dict = {}
         try:
-            status_code, data = result_function(*args, **kwargs)
-        except DBException as e:
-            status_code = 500
-            data = {"Error": str(e), "Stack": full_stack()}
-        except KnownException as e:
-            status_code = e.code
-            data = {"Message": e.message}
+            status_code, data, *extra = result_function(*args, **kwargs)
+            if extra:
+                headers = extra[0]
         except Exception as e:
-            status_code = 500
-            data = {"Error": str(e), "Stack": full_stack()}
+            status_code, data = exception_result(e)
         response = make_response(data, status_code)
         response.headers["Content-Type"] = "application/json"
+        response.headers.update(headers)
         return response
 
     return wrapped
 
 
-def token_auth(token: str) -> str:
+def exception_result(e: Exception) -> Tuple[int, Dict]:
+    """
+    :return: code and data of the response to the exception being handled
+    """
+    if isinstance(e, DBException):
+        return 500, {"Error": str(e), "Stack": full_stack()}
+    if isinstance(e, KnownException):
+        return e.code, {"Message": e.message}
+    return 500, {"Error": str(e), "Stack": full_stack()}
+
+
+def stream_response(
+    result_function: Callable[..., Tuple[int, Iterable]],
+) -> Callable[..., Response]:
+    """
+    :param result_function: function to wrap, returns code (Int) and an iterable of
+    JSON values, which should do all the checks before returning it
+    :return: wrapped function, output is an NDJSON (one value per line) Response,
+    streamed while the iterable is consumed
+    Exceptions raised before streaming are handled as in function_response,
+    an exception in the middle of the stream ends it with an {"Error": ...} line
+    """
+
+    def wrapped(*args, **kwargs) -> Response:
+        try:
+            status_code, rows = result_function(*args, **kwargs)
+        except Exception as e:
+            status_code, data = exception_result(e)
+            response = make_response(data, status_code)
+            response.headers["Content-Type"] = "application/json"
+            return response
+
+        def lines() -> Iterable[str]:
+            try:
+                for row in rows:
+                    yield json.dumps(row) + "\n"
+            except Exception as e:
+                yield json.dumps({"Error": str(e)}) + "\n"
+
+        return Response(
+            stream_with_context(lines()), status_code, mimetype="application/x-ndjson"
+        )
+
+    return wrapped
+
+
+def page_cursor(after_id, limit) -> Tuple[int, Optional[int]]:
+    """
+    :return: after_id and limit of a list request (from its JSON body) as integers,
+    throws UserException(400) if they are not
+    """
+    try:
+        return int(after_id), None if limit is None else int(limit)
+    except (TypeError, ValueError):
+        raise UserException(400, "after_id and limit should be integers")
+
+
+def page_result(name: str, items: List[Dict], limit: Optional[int]) -> Tuple[int, Dict]:
+    """
+    :return: 200, {name: items}, and {"Next cursor": id to pass as after_id or None
+    on the last page} if the list is paginated
+    """
+    data: Dict = {name: items}
+    if limit is not None:
+        data["Next cursor"] = items[-1]["id"] if len(items) == limit else None
+    return 200, data
+
+
+def conditional_result(
+    if_none_match: Optional[str],
+    etag: str,
+    result_function: Callable[[], Tuple[int, Dict]],
+) -> Tuple[int, Dict, Dict]:
+    """
+    :param if_none_match: If-None-Match header of the request, if any
+    :param etag: unquoted entity tag of the current version of the data
+    :param result_function: builds the response, called only if the client
+    does not have the current version
+    :return: 304 or the built response, both with the ETag header
+    """
+    headers = {"ETag": quote_etag(etag)}
+    if if_none_match is not None and parse_etags(if_none_match).contains(etag):
+        return 304, {}, headers
+    return (*result_function(), headers)
+
+
+@function_response
+def token_in_url() -> Tuple[int, Dict]:
+    """
+    :return: 400 for the requests passing the session token in the URL,
+    as the URLs are written to the access log
+    """
+    return 400, {"Message": "Token should be passed in the X-HTS-Token header"}
+
+
+def token_auth(token: str) -> Principal:
     """
     :param token: user token
-    :return: username, if token is valid, otherwise throws ObjectNotFound("Token")
+    :return: request principal, if token is valid, otherwise throws ObjectNotFound("Token")
+    The principal should be passed to every DBManager call of the request,
+    so the user and ownership checks are resolved only once
     """
-    username, exp_time = dbm.get_username_and_exptime_by_token(token)
+    if Config.TOKEN_MODE == "signed" and is_signed_token(token):
+        return signed_token_auth(token)
+    principal, exp_time = dbm.get_principal_and_exptime_by_token(token)
 
     if exp_time < datetime.datetime.utcnow():
         dbm.delete_token(token)
         raise ObjectNotFoundException("Token")  # TODO: seems not good, I guess
-    return username
+    return principal
+
+
+def signed_token_auth(token: str) -> Principal:
+    """
+    :param token: signed user token
+    :return: request principal, if token is valid, otherwise throws ObjectNotFound("Token")
+    Does not use the token table, the revocation list and the existence
+    of the user are reloaded from the database periodically
+    """
+    token_data = read_signed_token(token)
+    if token_data is None:
+        raise ObjectNotFoundException("Token")
+    user_id, exp_time, token_id = token_data
+    if exp_time < datetime.datetime.utcnow() or dbm.is_token_id_revoked(token_id):
+        raise ObjectNotFoundException("Token")
+    return dbm.get_principal_by_signed_token(token, user_id, exp_time)
 
 
 @function_response
 def status() -> Tuple[int, Dict]:  # TODO: rewrite to add meaningful information
     """
     Get the server's state
-    :return: 200, {'State': 'Active', 'API version': [str], 'DB manager': 'OK/FAILED'}
+    :return: 200, {'State': 'Active', 'API version': [str], 'DB manager': 'OK/FAILED',
+    'Results cache': {'hits', 'misses', 'size', 'max size'}}
     """
     code = 200
     data = {
         "State": "Active",
         "API version": "v1",
         "DB manager": "OK" if dbm.is_ok() else "FAILED",
+        "Results cache": dbm.results_cache.stats(),
     }
     return code, data
 
@@ -93,15 +213,38 @@ def login(username: str, password: str) -> Tuple[int, Dict]:
 
     if not check_password(password, user_password_hash):
         raise ObjectNotFoundException("User")
-
-    tok_uuid, tok_exp = gen_token()
-    dbm.insert_token(tok_uuid, tok_exp, username)
+    if needs_rehash(user_password_hash):  # The configured cost has changed
+        dbm.set_password_hash(username, encrypt_password(password))
+
+    if Config.TOKEN_MODE == "signed":
+        tok_uuid, tok_exp = gen_signed_token(dbm.get_principal(username).uid)
+    else:
+        tok_uuid, tok_exp = gen_token()
+        dbm.insert_token(tok_uuid, tok_exp, username)
     code = 201
     data = {"Token": tok_uuid}
 
     return code, data
 
 
+@function_response
+def logout(token: str) -> Tuple[int, Dict]:
+    """
+    :param token: session token to revoke
+    :return: 200, {} on success (also if the token is already unknown)
+    Throws exceptions, but they are handled in wrapper
+    """
+    if is_signed_token(token):
+        token_data = read_signed_token(token)
+        if token_data is not None:
+            _, exp_time, token_id = token_data
+            dbm.revoke_token_id(token_id, exp_time)
+    else:
+        dbm.delete_token(token)
+
+    return 200, {}
+
+
 @function_response
 def register(username: str, password: str) -> Tuple[int, Dict]:
     """
@@ -126,37 +269,72 @@ def new_tournament(token: str, name: str) -> Tuple[int, Dict]:
     :return: 201, {"ID": tournament_id} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    tournament_id = dbm.insert_tournament(username, name)
+    principal = token_auth(token)
+    tournament_id = dbm.insert_tournament(principal, name)
 
     return 201, {"ID": tournament_id}
 
 
 @function_response
-def get_tournaments(token: str) -> Tuple[int, Dict]:
+def get_tournaments(
+    token: str,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[int, Dict]:
+    """
+    :param token: session token
+    :param after_id: return only objects with greater ids (keyset cursor)
+    :param limit: maximal amount of objects in the page, all if None
+    :param fields: names of the fields to return (id is always returned), all if None
+    :return: 200, {"Tournaments": list of tournaments, "Next cursor" if limited}
+    on success; errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+    after_id, limit = page_cursor(after_id, limit)
+    tournaments = dbm.get_tournaments(principal, after_id, limit, fields)
+
+    return page_result("Tournaments", tournaments, limit)
+
+
+@function_response
+def get_tournament_info(
+    token: str, tournament_id: int, if_none_match: Optional[str] = None
+) -> Tuple[int, Dict, Dict]:
     """
     :param token: session token
-    :return: 200, {"Tournaments": list of tournaments} on success; errors on error
+    :param tournament_id: id of tournament
+    :param if_none_match: If-None-Match header value
+    :return: 200, Tournament information on success, 304 if the tournament version
+    matches; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    tournaments = dbm.get_tournaments(username)
+    principal = token_auth(token)
+    version = dbm.get_tournament_version(principal, tournament_id)
+
+    def tournament_info():
+        return 200, {
+            "Tournament info": dbm.get_tournament_info(principal, tournament_id)
+        }
 
-    return 200, {"Tournaments": tournaments}
+    etag = f"tournament-{tournament_id}-{version}"
+    return conditional_result(if_none_match, etag, tournament_info)
 
 
 @function_response
-def get_tournament_info(token: str, tournament_id: int) -> Tuple[int, Dict]:
+def get_tournament_snapshot(token: str, tournament_id: int) -> Tuple[int, Dict]:
     """
     :param token: session token
     :param tournament_id: id of tournament
-    :return: 200, Tournament information on success; errors on error
+    :return: 200, {"Tournament snapshot": rounds with subrounds, games, pairs,
+    words and results} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    tournament_info = dbm.get_tournament_info(username, tournament_id)
+    principal = token_auth(token)
+    snapshot = dbm.get_tournament_snapshot(principal, tournament_id)
 
-    return 200, {"Tournament info": tournament_info}
+    return 200, {"Tournament snapshot": snapshot}
 
 
 @function_response
@@ -167,8 +345,8 @@ def delete_tournament(token: str, tournament_id: int) -> Tuple[int, Dict]:
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    dbm.delete_tournament(username, tournament_id)
+    principal = token_auth(token)
+    dbm.delete_tournament(principal, tournament_id)
 
     return 200, {}
 
@@ -185,24 +363,91 @@ def new_player(
     :return: 201, {"ID": player_id} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    new_id = dbm.insert_player(username, tournament_id, name_first, name_second)
+    principal = token_auth(token)
+    new_id = dbm.insert_player(principal, tournament_id, name_first, name_second)
 
     return 201, {"ID": new_id}
 
 
 @function_response
-def get_players(token: str, tournament_id: int) -> Tuple[int, Dict]:
+def find_player(token: str, tournament_id: int, player_name: str) -> Tuple[int, Dict]:
     """
     :param token: session token
     :param tournament_id: id of the tournament
-    :return: 200, {"Players": list of players} on success; errors on error
+    :param player_name: name of one of the players in pair
+    :return: 200, {"ID": pair_id} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    players = dbm.get_players(username, tournament_id)
+    principal = token_auth(token)
+    pair_id = dbm.get_pair_by_name(principal, tournament_id, player_name)
 
-    return 200, {"Players": players}
+    return 200, {"ID": pair_id}
+
+
+@function_response
+def import_players(
+    token: str, tournament_id: int, lines: Iterable[bytes], fmt: str
+) -> Tuple[int, Dict]:
+    """
+    :param token: session token
+    :param tournament_id: id of the tournament to which the pairs will be added
+    :param lines: lines of the uploaded "csv" or "ndjson" file with name_first and name_second
+    :param fmt: format of the upload, "csv" or "ndjson"
+    :return: 201, {"Imported": amount, "Rejected": list of {"line", "reason"}} on success;
+    errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+    reader = ImportReader(
+        lines, fmt, [("name_first", non_empty_str), ("name_second", non_empty_str)]
+    )
+    imported, rejected = dbm.insert_players_bulk(
+        principal, tournament_id, reader, Config.IMPORT_CHUNK_SIZE
+    )
+
+    rejected = sorted(reader.rejected + rejected, key=lambda r: r["line"])
+    return 201, {"Imported": imported, "Rejected": rejected}
+
+
+@function_response
+def get_players(
+    token: str,
+    tournament_id: int,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[int, Dict]:
+    """
+    :param token: session token
+    :param tournament_id: id of the tournament
+    :param after_id: return only objects with greater ids (keyset cursor)
+    :param limit: maximal amount of objects in the page, all if None
+    :param fields: names of the fields to return (id is always returned), all if None
+    :return: 200, {"Players": list of players, "Next cursor" if limited} on success;
+    errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+    after_id, limit = page_cursor(after_id, limit)
+    players = dbm.get_players(principal, tournament_id, after_id, limit, fields)
+
+    return page_result("Players", players, limit)
+
+
+@stream_response
+def export_players(
+    token: str, tournament_id: int, fields: Optional[List[str]] = None
+) -> Tuple[int, Iterable[Dict]]:
+    """
+    :param token: session token
+    :param tournament_id: id of the tournament
+    :param fields: names of the fields to return (id is always returned), all if None
+    :return: 200, pairs one per line on success; errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+
+    return 200, dbm.stream_players(principal, tournament_id, fields)
 
 
 @function_response
@@ -213,8 +458,8 @@ def delete_player(token: str, pair_id: int) -> Tuple[int, Dict]:
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    dbm.delete_player(username, pair_id)
+    principal = token_auth(token)
+    dbm.delete_player(principal, pair_id)
 
     return 200, {}
 
@@ -231,24 +476,74 @@ def new_word(
     :return: 201, {"ID": word_id} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    new_id = dbm.insert_word(username, tournament_id, word_text, word_difficulty)
+    principal = token_auth(token)
+    new_id = dbm.insert_word(principal, tournament_id, word_text, word_difficulty)
 
     return 201, {"ID": new_id}
 
 
 @function_response
-def get_words(token: str, tournament_id: int) -> Tuple[int, Dict]:
+def import_words(
+    token: str, tournament_id: int, lines: Iterable[bytes], fmt: str
+) -> Tuple[int, Dict]:
+    """
+    :param token: session token
+    :param tournament_id: id of the tournament to which the words will be added
+    :param lines: lines of the uploaded "csv" or "ndjson" file with text and difficulty
+    :param fmt: format of the upload, "csv" or "ndjson"
+    :return: 201, {"Imported": amount, "Rejected": list of {"line", "reason"}} on success;
+    errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+    reader = ImportReader(lines, fmt, [("text", non_empty_str), ("difficulty", int)])
+    imported, rejected = dbm.insert_words_bulk(
+        principal, tournament_id, reader, Config.IMPORT_CHUNK_SIZE
+    )
+
+    rejected = sorted(reader.rejected + rejected, key=lambda r: r["line"])
+    return 201, {"Imported": imported, "Rejected": rejected}
+
+
+@function_response
+def get_words(
+    token: str,
+    tournament_id: int,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[int, Dict]:
     """
     :param token: session token
     :param tournament_id: id of the tournament
-    :return: 200, {"Words": list of words} on success; errors on error
+    :param after_id: return only objects with greater ids (keyset cursor)
+    :param limit: maximal amount of objects in the page, all if None
+    :param fields: names of the fields to return (id is always returned), all if None
+    :return: 200, {"Words": list of words, "Next cursor" if limited} on success;
+    errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    words = dbm.get_words(username, tournament_id)
+    principal = token_auth(token)
+    after_id, limit = page_cursor(after_id, limit)
+    words = dbm.get_words(principal, tournament_id, after_id, limit, fields)
 
-    return 200, {"Words": words}
+    return page_result("Words", words, limit)
+
+
+@stream_response
+def export_words(
+    token: str, tournament_id: int, fields: Optional[List[str]] = None
+) -> Tuple[int, Iterable[Dict]]:
+    """
+    :param token: session token
+    :param tournament_id: id of the tournament
+    :param fields: names of the fields to return (id is always returned), all if None
+    :return: 200, words one per line on success; errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+
+    return 200, dbm.stream_words(principal, tournament_id, fields)
 
 
 @function_response
@@ -259,8 +554,8 @@ def delete_word(token: str, word_id: int) -> Tuple[int, Dict]:
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    dbm.delete_word(username, word_id)
+    principal = token_auth(token)
+    dbm.delete_word(principal, word_id)
 
     return 200, {}
 
@@ -274,8 +569,8 @@ def new_round(token: str, tournament_id: int, round_name: str) -> Tuple[int, Dic
     :return: 200, {"ID": round id} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    new_id = dbm.insert_round(username, tournament_id, round_name)
+    principal = token_auth(token)
+    new_id = dbm.insert_round(principal, tournament_id, round_name)
 
     return 200, {"ID": new_id}
 
@@ -288,24 +583,35 @@ def get_round_info(token: str, round_id: int) -> Tuple[int, Dict]:
     :return: 200, Round information on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    round_info = dbm.get_round_info(username, round_id)
+    principal = token_auth(token)
+    round_info = dbm.get_round_info(principal, round_id)
 
     return 200, {"Round info": round_info}
 
 
 @function_response
-def get_rounds(token: str, tournament_id: int) -> Tuple[int, Dict]:
+def get_rounds(
+    token: str,
+    tournament_id: int,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[int, Dict]:
     """
     :param token: session token
     :param tournament_id: id of the tournament
-    :return: 200, {"Rounds": list of rounds} on success; errors on error
+    :param after_id: return only objects with greater ids (keyset cursor)
+    :param limit: maximal amount of objects in the page, all if None
+    :param fields: names of the fields to return (id is always returned), all if None
+    :return: 200, {"Rounds": list of rounds, "Next cursor" if limited} on success;
+    errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    rounds = dbm.get_rounds(username, tournament_id)
+    principal = token_auth(token)
+    after_id, limit = page_cursor(after_id, limit)
+    rounds = dbm.get_rounds(principal, tournament_id, after_id, limit, fields)
 
-    return 200, {"Rounds": rounds}
+    return page_result("Rounds", rounds, limit)
 
 
 @function_response
@@ -316,8 +622,8 @@ def delete_round(token: str, round_id: int) -> Tuple[int, Dict]:
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    dbm.delete_round(username, round_id)
+    principal = token_auth(token)
+    dbm.delete_round(principal, round_id)
 
     return 200, {}
 
@@ -331,8 +637,8 @@ def add_player_to_round(token: str, round_id: int, pair_id: int) -> Tuple[int, D
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    dbm.add_pair_id_to_round(username, round_id, pair_id)
+    principal = token_auth(token)
+    dbm.add_pair_id_to_round(principal, round_id, pair_id)
 
     return 200, {}
 
@@ -345,13 +651,11 @@ def add_players_to_round(
     :param token: session token
     :param round_id: id of the round to interact with
     :param pair_ids: ids of the pair (players) to add into round
-    :return: 200, {} on success; errors on error
+    :return: 200, {} on success; errors on error, nothing is added then
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-
-    for pair_id in pair_ids:  # FIXME: if error occurs after some
-        dbm.add_pair_id_to_round(username, round_id, pair_id)
+    principal = token_auth(token)
+    dbm.add_pair_ids_to_round(principal, round_id, pair_ids)
 
     return 200, {}
 
@@ -364,8 +668,8 @@ def get_players_in_round(token: str, round_id: int) -> Tuple[int, Dict]:
     :return: 200, {"Players": list of players in round} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    players = dbm.get_players_in_round(username, round_id)
+    principal = token_auth(token)
+    players = dbm.get_players_in_round(principal, round_id)
 
     return 200, {"Players": players}
 
@@ -381,9 +685,9 @@ def delete_player_from_round(
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    dbm.delete_player_from_round(username, round_id, pair_id)
+    dbm.delete_player_from_round(principal, round_id, pair_id)
     return 200, {}
 
 
@@ -396,9 +700,9 @@ def new_subround(token: str, round_id: int, subround_name: str) -> Tuple[int, Di
     :return: 201, {"ID": <id>} on success, errors on error.
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    new_id = dbm.insert_subround(username, round_id, subround_name)
+    new_id = dbm.insert_subround(principal, round_id, subround_name)
     return 201, {"ID": new_id}
 
 
@@ -410,23 +714,35 @@ def get_subround_info(token: str, subround_id: int) -> Tuple[int, Dict]:
     :return: 200, Subround information on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    subround_info = dbm.get_subround_info(username, subround_id)
+    principal = token_auth(token)
+    subround_info = dbm.get_subround_info(principal, subround_id)
 
     return 200, {"Subround info": subround_info}
 
 
 @function_response
-def get_subrounds(token: str, round_id: int) -> Tuple[int, Dict]:
+def get_subrounds(
+    token: str,
+    round_id: int,
+    after_id: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[int, Dict]:
     """
     :param token: session token
     :param round_id: id of the round to interact with
-    :return: 200, {"Subrounds": list of subrounds} on success, errors on error.
+    :param after_id: return only objects with greater ids (keyset cursor)
+    :param limit: maximal amount of objects in the page, all if None
+    :param fields: names of the fields to return (id is always returned), all if None
+    :return: 200, {"Subrounds": list of subrounds, "Next cursor" if limited} on success,
+    errors on error.
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
+    after_id, limit = page_cursor(after_id, limit)
+    subrounds = dbm.get_subrounds(principal, round_id, after_id, limit, fields)
 
-    return 200, {"Subrounds": dbm.get_subrounds(username, round_id)}
+    return page_result("Subrounds", subrounds, limit)
 
 
 @function_response
@@ -437,8 +753,8 @@ def delete_subround(token: str, subround_id: int) -> Tuple[int, Dict]:
     :return: 200, {} on success, errors on error.
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    dbm.delete_subround(username, subround_id)
+    principal = token_auth(token)
+    dbm.delete_subround(principal, subround_id)
 
     return 200, {}
 
@@ -454,8 +770,8 @@ def add_player_to_subround(
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-    dbm.add_pair_id_to_subround(username, subround_id, pair_id)
+    principal = token_auth(token)
+    dbm.add_pair_id_to_subround(principal, subround_id, pair_id)
 
     return 200, {}
 
@@ -468,13 +784,11 @@ def add_players_to_subround(
     :param token: session token
     :param subround_id: id of the subround to interact with
     :param pair_ids: ids of the pair (players) to add into round
-    :return: 200, {} on success; errors on error
+    :return: 200, {} on success; errors on error, nothing is added then
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
-
-    for pair_id in pair_ids:  # FIXME: if error occurs after some
-        dbm.add_pair_id_to_subround(username, subround_id, pair_id)
+    principal = token_auth(token)
+    dbm.add_pair_ids_to_subround(principal, subround_id, pair_ids)
 
     return 200, {}
 
@@ -486,8 +800,8 @@ def get_players_in_subround(token: str, subround_id: int) -> Tuple[int, Dict]:
     :param subround_id: id of the subround from which take players
     :return: 200, {"Players": list of players in round} on success,
     """
-    username = token_auth(token)
-    players = dbm.get_players_in_subround(username, subround_id)
+    principal = token_auth(token)
+    players = dbm.get_players_in_subround(principal, subround_id)
 
     return 200, {"Players": players}
 
@@ -503,9 +817,9 @@ def delete_player_from_subround(
     :return: 200, {} on success; errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    dbm.delete_player_from_subround(username, subround_id, pair_id)
+    dbm.delete_player_from_subround(principal, subround_id, pair_id)
     return 200, {}
 
 
@@ -521,10 +835,10 @@ def add_x_words_of_diff_y_to_subround(
     :return: 200, {} if added, errors if error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
     dbm.add_x_words_of_diff_y_to_subround(
-        username, subround_id, words_difficulty, words_amount
+        principal, subround_id, words_difficulty, words_amount
     )
     return 200, {}
 
@@ -537,9 +851,9 @@ def get_subround_words(token: str, subround_id: int) -> Tuple[int, Dict]:
     :return: 200, {"Words": list of words in subround} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    words = dbm.get_subround_words(username, subround_id)
+    words = dbm.get_subround_words(principal, subround_id)
 
     return 200, {"Words": words}
 
@@ -555,9 +869,9 @@ def split_subround_into_games(
     :return: 200, {"Games": list of IDs of games} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    games_ids = dbm.split_subround_into_games(username, subround_id, games_amount)
+    games_ids = dbm.split_subround_into_games(principal, subround_id, games_amount)
 
     return 200, {"Games": games_ids}
 
@@ -570,9 +884,9 @@ def get_games(token: str, subround_id: int) -> Tuple[int, Dict]:
     :return: 200, {"Games": list of IDs of games} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    games_ids = dbm.get_games(username, subround_id)
+    games_ids = dbm.get_games(principal, subround_id)
 
     return 200, {"Games": games_ids}
 
@@ -585,9 +899,9 @@ def undo_split_subround_into_games(token: str, subround_id: int) -> Tuple[int, D
     :return: 200, {} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    dbm.undo_split_subround_into_games(username, subround_id)
+    dbm.undo_split_subround_into_games(principal, subround_id)
 
     return 200, {}
 
@@ -600,9 +914,9 @@ def get_game_info(token: str, game_id: int) -> Tuple[int, Dict]:
     :return: 200, game information on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    game_info = dbm.get_game_info(username, game_id)
+    game_info = dbm.get_game_info(principal, game_id)
 
     return 200, {"Game info": game_info}
 
@@ -616,9 +930,9 @@ def set_game_result(token: str, game_id: int, result: Counter) -> Tuple[int, Dic
     :return: 201, {} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    dbm.set_game_result(username, game_id, result)
+    dbm.set_game_result(principal, game_id, result)
 
     return 201, {}
 
@@ -632,11 +946,11 @@ def get_game_result(token: str, game_id: int, pretty=False) -> Tuple[int, Dict]:
     :return: 200, {"Result": Dict[Player_id/Player_name : result]} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    game_result = dbm.get_game_result(username, game_id, pretty)
+    game_result = dbm.get_game_result(principal, game_id, pretty)
 
-    return 200, {"Result": game_result.most_common()}
+    return 200, {"Result": game_result}
 
 
 @function_response
@@ -647,43 +961,115 @@ def delete_game_result(token: str, game_id: int) -> Tuple[int, Dict]:
     :return: 200, {} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    dbm.delete_game_result(username, game_id)
+    dbm.delete_game_result(principal, game_id)
 
     return 200, {}
 
 
 @function_response
-def get_subround_result(token: str, subround_id: int, pretty=False) -> Tuple[int, Dict]:
+def get_subround_result(
+    token: str, subround_id: int, pretty=False, if_none_match: Optional[str] = None
+) -> Tuple[int, Dict, Dict]:
     """
     :param token: session token
     :param subround_id: id of subround which information to get
     :param pretty: whether the names of players should be printed
-    :return: 200, {"Result": Dict[Player_id/Player_name : result]} on success, errors on error
+    :param if_none_match: If-None-Match header value
+    :return: 200, {"Result": Dict[Player_id/Player_name : result]} on success,
+    304 if the tournament version matches, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
+    version, results_version = dbm.get_subround_versions(principal, subround_id)
 
-    subround_result = dbm.get_subround_result(username, subround_id, pretty)
+    def subround_result():
+        result = dbm.get_subround_result(
+            principal, subround_id, pretty, results_version
+        )
+        return 200, {"Result": result}
 
-    return 200, {"Result": subround_result.most_common()}
+    etag = f"subround-results-{subround_id}-{int(pretty)}-{version}"
+    return conditional_result(if_none_match, etag, subround_result)
 
 
 @function_response
-def get_round_result(token: str, round_id: int, pretty=False) -> Tuple[int, Dict]:
+def get_round_result(
+    token: str, round_id: int, pretty=False, if_none_match: Optional[str] = None
+) -> Tuple[int, Dict, Dict]:
     """
     :param token: session token
     :param round_id: id of round which information to get
     :param pretty: whether the names of players should be printed
-    :return: 200, {"Result": Dict[Player_id/Player_name, result]} on success, errors on error
+    :param if_none_match: If-None-Match header value
+    :return: 200, {"Result": Dict[Player_id/Player_name, result]} on success,
+    304 if the tournament version matches, errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+    version, results_version = dbm.get_round_versions(principal, round_id)
+
+    def round_result():
+        result = dbm.get_round_result(principal, round_id, pretty, results_version)
+        return 200, {"Result": result}
+
+    etag = f"round-results-{round_id}-{int(pretty)}-{version}"
+    return conditional_result(if_none_match, etag, round_result)
+
+
+@stream_response
+def export_result(
+    token: str, scope: str, scope_id: int, pretty=False
+) -> Tuple[int, Iterable[Tuple]]:
+    """
+    :param token: session token
+    :param scope: "round", "subround" or "game"
+    :param scope_id: id of the round, subround or game
+    :param pretty: whether the names of players should be printed
+    :return: 200, [Player_id/Player_name, result] one per line, best first,
+    on success; errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+
+    return 200, dbm.stream_result(principal, scope, scope_id, pretty)
+
+
+@function_response
+def get_round_leaderboard(
+    token: str, round_id: int, start: int, stop: Optional[int], pretty=False
+) -> Tuple[int, Dict]:
+    """
+    :param token: session token
+    :param round_id: id of round which leaderboard to get
+    :param start: first place to return, counting from 0
+    :param stop: place after the last one to return, up to the end if None
+    :param pretty: whether the names of players should be printed
+    :return: 200, {"Result": List[Player_id/Player_name, result]} on success, errors on error
+    Throws exceptions, but they are handled in wrapper
+    """
+    principal = token_auth(token)
+
+    leaderboard = dbm.get_round_leaderboard(principal, round_id, start, stop, pretty)
+
+    return 200, {"Result": leaderboard}
+
+
+@function_response
+def get_round_rank(token: str, round_id: int, pair_id: int) -> Tuple[int, Dict]:
+    """
+    :param token: session token
+    :param round_id: id of round
+    :param pair_id: id of the pair (player) which place to get
+    :return: 200, {"Rank": place starting from 1, "Score": result} on success, errors on error
     Throws exceptions, but they are handled in wrapper
     """
-    username = token_auth(token)
+    principal = token_auth(token)
 
-    round_result = dbm.get_round_result(username, round_id, pretty)
+    rank, score = dbm.get_round_rank(principal, round_id, pair_id)
 
-    return 200, {"Result": round_result.most_common()}
+    return 200, {"Rank": rank, "Score": score}
 
 
 @function_response
@@ -713,26 +1099,27 @@ def fill_with_example(secret_code):
 
     example_username = template_data.EXAMPLE_USER[0]
     dbm.insert_user(example_username, encrypt_password(template_data.EXAMPLE_USER[1]))
+    example_principal = dbm.get_principal(example_username)
 
     example_tournament = template_data.EXAMPLE_TOURNAMENT_NAME
-    tournament_id = dbm.insert_tournament(example_username, example_tournament)
+    tournament_id = dbm.insert_tournament(example_principal, example_tournament)
     round_ids = []
 
     for round_name in template_data.EXAMPLE_ROUNDS_NAMES:
-        round_ids.append(dbm.insert_round(example_username, tournament_id, round_name))
+        round_ids.append(dbm.insert_round(example_principal, tournament_id, round_name))
 
     subround_ids = []
     for subround_name, round_ind in template_data.EXAMPLE_SUBROUNDS:
         subround_ids.append(
-            dbm.insert_subround(example_username, round_ids[round_ind], subround_name)
+            dbm.insert_subround(example_principal, round_ids[round_ind], subround_name)
         )
 
     for word, diff in template_data.EXAMPLE_WORDS:
-        dbm.insert_word(example_username, tournament_id, word, diff)
+        dbm.insert_word(example_principal, tournament_id, word, diff)
 
     for p1, p2, ri, sri, ind in template_data.EXAMPLE_PLAYERS:
-        dbm.insert_player(example_username, tournament_id, p1, p2)
-        dbm.add_pair_id_to_round(example_username, round_ids[ri], ind)
-        dbm.add_pair_id_to_subround(example_username, subround_ids[sri], ind)
+        dbm.insert_player(example_principal, tournament_id, p1, p2)
+        dbm.add_pair_id_to_round(example_principal, round_ids[ri], ind)
+        dbm.add_pair_id_to_subround(example_principal, subround_ids[sri], ind)
 
     return 200, {}
@@ -1,6 +1,7 @@
 from sqlalchemy import Table
 
 from app.extensions import db
+from utils.utils import gen_rand_key
 
 
 class User(db.Model):
@@ -23,6 +24,14 @@ class Token(db.Model):
         return f"<Token {self.id} of user {self.user_id}>"
 
 
+class RevokedToken(db.Model):  # Revocation list for the signed tokens
+    id = db.Column(db.String, primary_key=True)
+    expires_in = db.Column(db.DateTime, index=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Revoked token {self.id}>"
+
+
 class Tournament(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, index=True, nullable=False)
@@ -36,6 +45,12 @@ class Tournament(db.Model):
         "Round", backref="tournament", lazy="dynamic", cascade="all, delete-orphan"
     )
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # Incremented by every change inside the tournament, used as the ETag
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Incremented only by the changes of free words, keys the word pools
+    words_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (db.Index("ix_tournament_user_name", "user_id", "name"),)
 
 
 players_in_rounds = Table(
@@ -43,6 +58,7 @@ players_in_rounds = Table(
     db.Model.metadata,
     db.Column("player_id", db.Integer, db.ForeignKey("player.id"), primary_key=True),
     db.Column("round_id", db.Integer, db.ForeignKey("round.id"), primary_key=True),
+    db.Index("ix_players_in_rounds_round", "round_id", "player_id"),
 )
 
 players_in_subrounds = Table(
@@ -52,6 +68,7 @@ players_in_subrounds = Table(
     db.Column(
         "subround_id", db.Integer, db.ForeignKey("subround.id"), primary_key=True
     ),
+    db.Index("ix_players_in_subrounds_subround", "subround_id", "player_id"),
 )
 
 players_in_games = Table(
@@ -59,6 +76,7 @@ players_in_games = Table(
     db.Model.metadata,
     db.Column("player_id", db.Integer, db.ForeignKey("player.id"), primary_key=True),
     db.Column("game_id", db.Integer, db.ForeignKey("game.id"), primary_key=True),
+    db.Index("ix_players_in_games_game", "game_id", "player_id"),
 )
 
 
@@ -74,7 +92,13 @@ class Round(db.Model):
     subrounds = db.relationship(
         "Subround", backref="round", lazy="dynamic", cascade="all, delete-orphan"
     )
-    results = db.Column(db.PickleType)
+    # Incremented by every change of the scores, keys the cached results. Starts
+    # at random, so an object reusing a deleted id doesn't match its cache entries
+    results_version = db.Column(
+        db.Integer, nullable=False, default=gen_rand_key, server_default="0"
+    )
+
+    __table_args__ = (db.Index("ix_round_tournament_name", "tournament_id", "name"),)
 
 
 class Subround(db.Model):
@@ -91,20 +115,28 @@ class Subround(db.Model):
     games = db.relationship(
         "Game", backref="subround", lazy="dynamic", cascade="all, delete-orphan"
     )
-    results = db.Column(db.PickleType)
+    results_version = db.Column(  # As Round.results_version
+        db.Integer, nullable=False, default=gen_rand_key, server_default="0"
+    )
+
+    __table_args__ = (db.Index("ix_subround_round_name", "round_id", "name"),)
 
 
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    subround_id = db.Column(db.Integer, db.ForeignKey("subround.id"), nullable=False)
+    subround_id = db.Column(
+        db.Integer, db.ForeignKey("subround.id"), index=True, nullable=False
+    )
     players = db.relationship(
         "Player",
         secondary=players_in_games,
         back_populates="games",
         lazy="dynamic",
     )
-    results = db.Column(db.PickleType)
     results_set = db.Column(db.Boolean)
+    results_version = db.Column(  # As Round.results_version
+        db.Integer, nullable=False, default=gen_rand_key, server_default="0"
+    )
 
 
 class Player(
@@ -113,8 +145,8 @@ class Player(
     id = db.Column(db.Integer, primary_key=True)
     name_first = db.Column(db.String, index=True, nullable=False)
     name_second = db.Column(db.String, index=True, nullable=False)
-    tournament_id = db.Column(
-        db.Integer, db.ForeignKey("tournament.id"), nullable=False
+    tournament_id = db.Column(  # Names are looked up through PlayerName
+        db.Integer, db.ForeignKey("tournament.id"), index=True, nullable=False
     )
     rounds = db.relationship(
         "Round", secondary=players_in_rounds, back_populates="players", lazy="dynamic"
@@ -128,14 +160,67 @@ class Player(
     games = db.relationship(
         "Game", secondary=players_in_games, back_populates="players", lazy="dynamic"
     )
+    scores = db.relationship("Score", lazy="dynamic", cascade="all, delete-orphan")
+    names = db.relationship("PlayerName", lazy="dynamic", cascade="all, delete-orphan")
+
+
+class PlayerName(db.Model):  # One row per player of a pair, names are unique
+    tournament_id = db.Column(
+        db.Integer, db.ForeignKey("tournament.id"), primary_key=True
+    )
+    normalized_name = db.Column(db.String, primary_key=True)  # normalize_word(name)
+    player_id = db.Column(
+        db.Integer, db.ForeignKey("player.id"), index=True, nullable=False
+    )
+
+    def __repr__(self):
+        return f"<Player name {self.normalized_name} of {self.player_id}>"
 
 
 class Word(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    text = db.Column(db.String, index=True, unique=True, nullable=False)
+    text = db.Column(db.String, nullable=False)
+    # normalize_word(text), unique within the tournament
+    normalized_text = db.Column(db.String, nullable=False)
     difficulty = db.Column(db.Integer, index=True, nullable=False)
     tournament_id = db.Column(
         db.Integer, db.ForeignKey("tournament.id"), nullable=False
     )
-    subround_id = db.Column(db.Integer, db.ForeignKey("subround.id"))
+    subround_id = db.Column(db.Integer, db.ForeignKey("subround.id"), index=True)
     random_seed = db.Column(db.Integer, index=True, nullable=False)
+
+    __table_args__ = (
+        db.Index(  # Free words of a difficulty, drawn into subrounds
+            "ix_word_tournament_difficulty_free",
+            "tournament_id",
+            "difficulty",
+            "subround_id",
+            "random_seed",
+        ),
+        db.Index(
+            "uq_word_tournament_normalized_text",
+            "tournament_id",
+            "normalized_text",
+            unique=True,
+        ),
+    )
+
+
+SCORE_SCOPES = ("round", "subround", "game")
+
+
+class Score(db.Model):  # Result of a pair in a round, subround or game
+    scope = db.Column(db.String, primary_key=True)  # One of SCORE_SCOPES
+    scope_id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey("player.id"), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_score_scope_value", "scope", "scope_id", "value", "player_id"),
+        db.Index("ix_score_player", "player_id"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<Score {self.value} of {self.player_id} in {self.scope} {self.scope_id}>"
+        )
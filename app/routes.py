@@ -1,12 +1,44 @@
 import json
 from collections import Counter
-from typing import List
+from typing import List, Optional
 
-from flask import request
+from flask import request, abort
 import app.functions as functions
 from app import app
 
 
+def header_token() -> Optional[str]:
+    """
+    Session token of the requests without a JSON body (imports and exports).
+    Their URL is written to the access log, so the token is read from the
+    X-HTS-Token header; None if it is passed in the URL, then the request is rejected
+    """
+    if "token" in request.args:
+        return None
+    return request.headers.get("X-HTS-Token", "")
+
+
+def export_fields() -> Optional[List[str]]:
+    """
+    Optional comma-separated fields query argument of export requests
+    """
+    fields: Optional[str] = request.args.get("fields")
+    return None if fields is None else fields.split(",")
+
+
+def page_args() -> dict:
+    """
+    Optional keyset pagination and field selection arguments of list requests:
+    after_id, limit and fields (list of field names)
+    Passed as sent, the functions check them
+    """
+    return {
+        "after_id": request.get_json().get("after_id", 0),
+        "limit": request.get_json().get("limit"),
+        "fields": request.get_json().get("fields"),
+    }
+
+
 @app.route("/")
 @app.route("/index")
 def index():
@@ -25,6 +57,12 @@ def login():
     return functions.login(username, password)
 
 
+@app.route("/api/v1/user/logout", methods=["POST"])
+def logout():
+    token: str = request.get_json()["token"]
+    return functions.logout(token)
+
+
 @app.route("/api/v1/user/register", methods=["POST"])
 def register():
     username: str = request.get_json()["username"]
@@ -42,13 +80,20 @@ def new_tournament():
 @app.route("/api/v1/tournaments", methods=["GET"])
 def get_tournaments():
     token: str = request.get_json()["token"]
-    return functions.get_tournaments(token)
+    return functions.get_tournaments(token, **page_args())
 
 
 @app.route("/api/v1/tournament/<tournament_id>", methods=["GET"])
 def get_tournament(tournament_id: int):
     token: str = request.get_json()["token"]
-    return functions.get_tournament_info(token, tournament_id)
+    if_none_match: str = request.headers.get("If-None-Match")
+    return functions.get_tournament_info(token, tournament_id, if_none_match)
+
+
+@app.route("/api/v1/tournament/<tournament_id>/snapshot", methods=["GET"])
+def get_tournament_snapshot(tournament_id: int):
+    token: str = request.get_json()["token"]
+    return functions.get_tournament_snapshot(token, tournament_id)
 
 
 @app.route("/api/v1/tournament", methods=["DELETE"])
@@ -67,11 +112,38 @@ def new_player():
     return functions.new_player(token, tournament_id, name_first, name_second)
 
 
+@app.route("/api/v1/player/by_name", methods=["GET"])
+def find_player():
+    token: str = request.get_json()["token"]
+    tournament_id: int = int(request.get_json()["tournament_id"])
+    player_name: str = request.get_json()["player_name"]
+    return functions.find_player(token, tournament_id, player_name)
+
+
+@app.route("/api/v1/players/import", methods=["POST"])
+def import_players():
+    token: Optional[str] = header_token()
+    if token is None:
+        return functions.token_in_url()
+    tournament_id: int = int(request.args["tournament_id"])
+    fmt: str = request.args.get("format", "ndjson")
+    return functions.import_players(token, tournament_id, request.stream, fmt)
+
+
 @app.route("/api/v1/players", methods=["GET"])
 def get_players():
     token: str = request.get_json()["token"]
     tournament_id: int = int(request.get_json()["tournament_id"])
-    return functions.get_players(token, tournament_id)
+    return functions.get_players(token, tournament_id, **page_args())
+
+
+@app.route("/api/v1/players/export", methods=["GET"])
+def export_players():
+    token: Optional[str] = header_token()
+    if token is None:
+        return functions.token_in_url()
+    tournament_id: int = int(request.args["tournament_id"])
+    return functions.export_players(token, tournament_id, export_fields())
 
 
 @app.route("/api/v1/player", methods=["DELETE"])
@@ -90,11 +162,30 @@ def new_word():
     return functions.new_word(token, tournament_id, word_text, word_difficulty)
 
 
+@app.route("/api/v1/words/import", methods=["POST"])
+def import_words():
+    token: Optional[str] = header_token()
+    if token is None:
+        return functions.token_in_url()
+    tournament_id: int = int(request.args["tournament_id"])
+    fmt: str = request.args.get("format", "ndjson")
+    return functions.import_words(token, tournament_id, request.stream, fmt)
+
+
 @app.route("/api/v1/words", methods=["GET"])
 def get_words():
     token: str = request.get_json()["token"]
     tournament_id: int = int(request.get_json()["tournament_id"])
-    return functions.get_words(token, tournament_id)
+    return functions.get_words(token, tournament_id, **page_args())
+
+
+@app.route("/api/v1/words/export", methods=["GET"])
+def export_words():
+    token: Optional[str] = header_token()
+    if token is None:
+        return functions.token_in_url()
+    tournament_id: int = int(request.args["tournament_id"])
+    return functions.export_words(token, tournament_id, export_fields())
 
 
 @app.route("/api/v1/word", methods=["DELETE"])
@@ -122,7 +213,7 @@ def get_round(round_id: int):
 def get_rounds():
     token: str = request.get_json()["token"]
     tournament_id: int = int(request.get_json()["tournament_id"])
-    return functions.get_rounds(token, tournament_id)
+    return functions.get_rounds(token, tournament_id, **page_args())
 
 
 @app.route("/api/v1/round", methods=["DELETE"])
@@ -181,7 +272,7 @@ def get_subround(subround_id: int):
 def get_subrounds():
     token: str = request.get_json()["token"]
     round_id: int = int(request.get_json()["round_id"])
-    return functions.get_subrounds(token, round_id)
+    return functions.get_subrounds(token, round_id, **page_args())
 
 
 @app.route("/api/v1/subround", methods=["DELETE"])
@@ -302,28 +393,72 @@ def delete_game_result():
 def get_subround_result():
     token: str = request.get_json()["token"]
     subround_id: int = int(request.get_json()["subround_id"])
-    return functions.get_subround_result(token, subround_id)
+    if_none_match: str = request.headers.get("If-None-Match")
+    return functions.get_subround_result(
+        token, subround_id, if_none_match=if_none_match
+    )
 
 
 @app.route("/api/v1/subround/results/pretty", methods=["GET"])
 def get_subround_result_pretty():
     token: str = request.get_json()["token"]
     subround_id: int = int(request.get_json()["subround_id"])
-    return functions.get_subround_result(token, subround_id, pretty=True)
+    if_none_match: str = request.headers.get("If-None-Match")
+    return functions.get_subround_result(
+        token, subround_id, pretty=True, if_none_match=if_none_match
+    )
 
 
 @app.route("/api/v1/round/results", methods=["GET"])
 def get_round_result():
     token: str = request.get_json()["token"]
     round_id: int = int(request.get_json()["round_id"])
-    return functions.get_round_result(token, round_id)
+    if_none_match: str = request.headers.get("If-None-Match")
+    return functions.get_round_result(token, round_id, if_none_match=if_none_match)
 
 
 @app.route("/api/v1/round/results/pretty", methods=["GET"])
 def get_round_result_pretty():
     token: str = request.get_json()["token"]
     round_id: int = int(request.get_json()["round_id"])
-    return functions.get_round_result(token, round_id, pretty=True)
+    if_none_match: str = request.headers.get("If-None-Match")
+    return functions.get_round_result(
+        token, round_id, pretty=True, if_none_match=if_none_match
+    )
+
+
+@app.route("/api/v1/<scope>/results/export", methods=["GET"])
+def export_result(scope: str):
+    if scope not in ("round", "subround", "game"):
+        abort(404)
+    token: Optional[str] = header_token()
+    if token is None:
+        return functions.token_in_url()
+    scope_id: int = int(request.args[f"{scope}_id"])
+    pretty: bool = request.args.get("pretty", "false").lower() in ("1", "true")
+    return functions.export_result(token, scope, scope_id, pretty)
+
+
+@app.route("/api/v1/round/leaderboard", methods=["GET"])
+def get_round_leaderboard():
+    token: str = request.get_json()["token"]
+    round_id: int = int(request.get_json()["round_id"])
+    if "top_k" in request.get_json():
+        start, stop = 0, int(request.get_json()["top_k"])
+    else:
+        start = int(request.get_json().get("start", 0))
+        stop = request.get_json().get("stop")
+        stop = None if stop is None else int(stop)
+    pretty: bool = bool(request.get_json().get("pretty", False))
+    return functions.get_round_leaderboard(token, round_id, start, stop, pretty)
+
+
+@app.route("/api/v1/round/rank", methods=["GET"])
+def get_round_rank():
+    token: str = request.get_json()["token"]
+    round_id: int = int(request.get_json()["round_id"])
+    pair_id: int = int(request.get_json()["player_id"])
+    return functions.get_round_rank(token, round_id, pair_id)
 
 
 @app.route("/api/v1/admin/drop", methods=["DELETE"])
@@ -0,0 +1,175 @@
+"""
+Latency of game result writes over HTTP, on the async app (app.asgi:application
+in a uvicorn worker) and on the WSGI app (hts_server:app in a gthread worker).
+Each server is one gunicorn worker with 32 threads, started with gunicorn.conf.py
+on the same database. Writes are sent one after another, then 32 at once
+from 32 clients, every write to its own game
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from typing import Dict, List
+
+from benchmarks.common import use_temporary_database
+
+use_temporary_database()
+
+from app import app, db  # noqa: E402
+from app.extensions import dbm  # noqa: E402
+
+THREADS = 32
+SEQUENTIAL = 200
+CONCURRENT_ROUNDS = 10
+PORT = 22431
+SERVERS = {  # name -> (app, worker class)
+    "asgi": ("app.asgi:application", "uvicorn.workers.UvicornWorker"),
+    "gthread": ("hts_server:app", "gthread"),
+}
+
+
+def make_games(name: str, amount: int) -> Dict[int, List[int]]:
+    """
+    :return: ids of the new games of two pairs each -> ids of their pairs
+    """
+    principal = dbm.get_principal("owner")
+    tournament_id = dbm.insert_tournament(principal, name)
+    round_id = dbm.insert_round(principal, tournament_id, "round")
+    subround_id = dbm.insert_subround(principal, round_id, "subround")
+    dbm.insert_players_bulk(
+        principal,
+        tournament_id,
+        ((line, f"first {line}", f"second {line}") for line in range(2 * amount)),
+    )
+    pair_ids = [
+        pair_id
+        for (pair_id,) in db.session.query(dbm.models.Player.id).filter_by(
+            tournament_id=tournament_id
+        )
+    ]
+    dbm.add_pair_ids_to_round(principal, round_id, pair_ids)
+    dbm.add_pair_ids_to_subround(principal, subround_id, pair_ids)
+    games = dbm.split_subround_into_games(principal, subround_id, amount)
+    return {
+        game_id: [pair.id for pair in dbm.get_game_id(principal, game_id).players]
+        for game_id in games
+    }
+
+
+def start_server(name: str) -> subprocess.Popen:
+    application, worker_class = SERVERS[name]
+    log_dir = tempfile.mkdtemp(prefix="hts-bench-")
+    environment = {
+        **os.environ,
+        "HTS_BIND": f"127.0.0.1:{PORT}",
+        "HTS_WORKERS": "1",
+        "HTS_THREADS": str(THREADS),
+        "ASYNC_THREADS": str(THREADS),
+        "HTS_WORKER_CLASS": worker_class,
+        "HTS_LOG": os.path.join(log_dir, "server.log"),
+        "HTS_PIDFILE": os.path.join(log_dir, "server.pid"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", application],
+        env=environment,
+    )
+    for _ in range(100):
+        try:
+            connection = HTTPConnection("127.0.0.1", PORT)
+            connection.request("GET", "/api/v1/service/status")
+            connection.getresponse().read()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"{name} server did not start")
+
+
+def post_result(
+    connection: HTTPConnection, token: str, game_id: int, pair_ids: List[int]
+) -> float:
+    """
+    :return: latency of the write in seconds
+    """
+    result = {str(pair_id): random.randint(1, 50) for pair_id in pair_ids}
+    body = json.dumps(dict(token=token, game_id=game_id, result=json.dumps(result)))
+    start = time.perf_counter()
+    connection.request(
+        "POST", "/api/v1/game/results", body, {"Content-Type": "application/json"}
+    )
+    response = connection.getresponse()
+    response.read()
+    latency = time.perf_counter() - start
+    assert response.status == 201, response.status
+    return latency
+
+
+def percentiles(seconds: List[float]) -> str:
+    seconds = sorted(seconds)
+    return (
+        f"p50 {seconds[len(seconds) // 2] * 1000:.1f} ms,"
+        f" p95 {seconds[int(len(seconds) * 0.95)] * 1000:.1f} ms"
+    )
+
+
+def measure(name: str, token: str, games: Dict[int, List[int]]) -> None:
+    game_ids = list(games)
+    sequential_ids = game_ids[:SEQUENTIAL]
+    concurrent_ids = game_ids[SEQUENTIAL:]
+    server = start_server(name)
+    try:
+        connection = HTTPConnection("127.0.0.1", PORT)
+        sequential = [
+            post_result(connection, token, game_id, games[game_id])
+            for game_id in sequential_ids
+        ]
+        concurrent: List[float] = []
+        barrier = threading.Barrier(THREADS)
+
+        def client(client_ids: List[int]) -> None:
+            client_connection = HTTPConnection("127.0.0.1", PORT)
+            for game_id in client_ids:
+                barrier.wait()  # All the clients of a round write at once
+                concurrent.append(
+                    post_result(client_connection, token, game_id, games[game_id])
+                )
+
+        threads = [
+            threading.Thread(target=client, args=(concurrent_ids[i::THREADS],))
+            for i in range(THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+    print(
+        f"{name}: sequential {percentiles(sequential)};"
+        f" {THREADS} concurrent {percentiles(concurrent)}"
+    )
+
+
+def main() -> None:
+    amount = SEQUENTIAL + THREADS * CONCURRENT_ROUNDS
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post("/api/v1/user/register", json=dict(username="owner", password="x"))
+        token = client.post(
+            "/api/v1/user/login", json=dict(username="owner", password="x")
+        ).get_json()["Token"]
+        games = {name: make_games(name, amount) for name in SERVERS}
+    for name in SERVERS:
+        measure(name, token, games[name])
+
+
+if __name__ == "__main__":
+    main()
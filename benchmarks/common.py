@@ -0,0 +1,30 @@
+"""
+Shared setup of the benchmarks. They are run from the repository root,
+e.g. "python -m benchmarks.split_subround", each on a fresh SQLite file
+in a temporary directory
+"""
+
+import os
+import statistics
+import tempfile
+from typing import List
+
+
+def use_temporary_database() -> str:
+    """
+    Points the app to a new database file, must be called before the app is imported
+    :return: path of the file
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="hts-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = "sqlite:///" + path
+    return path
+
+
+def summary(seconds: List[float]) -> str:
+    """
+    :return: median, min and max of the timings in milliseconds
+    """
+    return (
+        f"median {statistics.median(seconds) * 1000:.1f} ms,"
+        f" min {min(seconds) * 1000:.1f} ms, max {max(seconds) * 1000:.1f} ms"
+    )
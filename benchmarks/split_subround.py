@@ -0,0 +1,44 @@
+"""
+Splits subrounds of 1000 pairs into 250 games, the whole split is one transaction
+"""
+
+import time
+
+from benchmarks.common import summary, use_temporary_database
+
+use_temporary_database()
+
+from app import app, db  # noqa: E402
+from app.extensions import dbm  # noqa: E402
+
+PAIRS = 1000
+GAMES = 250
+REPEATS = 10
+
+
+def main() -> None:
+    with app.app_context():
+        db.create_all()
+        dbm.insert_user("owner", "hash")
+        principal = dbm.get_principal("owner")
+        tournament_id = dbm.insert_tournament(principal, "tournament")
+        round_id = dbm.insert_round(principal, tournament_id, "round")
+        dbm.insert_players_bulk(
+            principal,
+            tournament_id,
+            ((line, f"first {line}", f"second {line}") for line in range(PAIRS)),
+        )
+        pair_ids = [pair_id for (pair_id,) in db.session.query(dbm.models.Player.id)]
+        timings = []
+        for repeat in range(REPEATS):
+            subround_id = dbm.insert_subround(principal, round_id, f"subround {repeat}")
+            dbm.add_pair_ids_to_subround(principal, subround_id, pair_ids)
+            start = time.perf_counter()
+            games = dbm.split_subround_into_games(principal, subround_id, GAMES)
+            timings.append(time.perf_counter() - start)
+            assert len(games) == GAMES
+        print(f"split of {PAIRS} pairs into {GAMES} games: {summary(timings)}")
+
+
+if __name__ == "__main__":
+    main()
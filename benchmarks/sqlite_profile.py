@@ -0,0 +1,136 @@
+"""
+Reads round results from 8 threads while 4 threads post game results, for 6 s,
+once with the SQLite profile of the config and once with the SQLite defaults
+and a connection per session. The results cache is disabled, so every read
+reaches the database. Each run is a separate process, as the profile is
+read from the environment when the app is imported
+The gain grows with the cost of fsync on the disk: with the defaults
+readers wait for every commit of the writers
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import use_temporary_database
+
+READERS = 8
+WRITERS = 4
+GAMES = 300
+DURATION_SEC = 6
+RUNS = {  # name -> environment
+    "profile": {},
+    "sqlite defaults": {
+        **{
+            f"SQLITE_{name}": ""
+            for name in (
+                "JOURNAL_MODE",
+                "SYNCHRONOUS",
+                "BUSY_TIMEOUT_MS",
+                "MMAP_SIZE",
+                "CACHE_SIZE",
+                "FOREIGN_KEYS",
+            )
+        },
+        "SQLITE_POOL_SIZE": "0",
+    },
+}
+
+
+def measure(name: str) -> None:
+    use_temporary_database()
+    from app import app, db
+    from app.extensions import dbm
+
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post("/api/v1/user/register", json=dict(username="owner", password="x"))
+        principal = dbm.get_principal("owner")
+        tournament_id = dbm.insert_tournament(principal, "tournament")
+        round_id = dbm.insert_round(principal, tournament_id, "round")
+        subround_id = dbm.insert_subround(principal, round_id, "subround")
+        dbm.insert_players_bulk(
+            principal,
+            tournament_id,
+            ((line, f"first {line}", f"second {line}") for line in range(2 * GAMES)),
+        )
+        pair_ids = [pair_id for (pair_id,) in db.session.query(dbm.models.Player.id)]
+        dbm.add_pair_ids_to_round(principal, round_id, pair_ids)
+        dbm.add_pair_ids_to_subround(principal, subround_id, pair_ids)
+        games = dbm.split_subround_into_games(principal, subround_id, GAMES)
+        members = {
+            game_id: [pair.id for pair in dbm.get_game_id(principal, game_id).players]
+            for game_id in games
+        }
+    dbm.results_cache.max_size = 0
+    token = (
+        app.test_client()
+        .post("/api/v1/user/login", json=dict(username="owner", password="x"))
+        .get_json()["Token"]
+    )
+    stop = threading.Event()
+    reads, writes, read_latencies, errors = [], [], [], []
+
+    def reader() -> None:
+        reader_client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = reader_client.get(
+                "/api/v1/round/results", json=dict(token=token, round_id=round_id)
+            )
+            read_latencies.append(time.perf_counter() - start)
+            (reads if response.status_code == 200 else errors).append(response)
+
+    def writer(game_ids) -> None:
+        writer_client = app.test_client()
+        for game_id in game_ids:
+            if stop.is_set():
+                return
+            result = {str(pair): random.randint(1, 50) for pair in members[game_id]}
+            response = writer_client.post(
+                "/api/v1/game/results",
+                json=dict(token=token, game_id=game_id, result=json.dumps(result)),
+            )
+            (writes if response.status_code == 201 else errors).append(response)
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [
+        threading.Thread(target=writer, args=(games[i::WRITERS],))
+        for i in range(WRITERS)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION_SEC)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    read_latencies.sort()
+    print(
+        f"{name}: {len(reads) / elapsed:.0f} reads/s, {len(writes) / elapsed:.1f} writes/s,"
+        f" read p50 {read_latencies[len(read_latencies) // 2] * 1000:.1f} ms,"
+        f" p99 {read_latencies[int(len(read_latencies) * 0.99)] * 1000:.1f} ms,"
+        f" errors {len(errors)}"
+    )
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        measure(sys.argv[1])
+        return
+    for name, environment in RUNS.items():
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_profile", name],
+            env={**os.environ, **environment},
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
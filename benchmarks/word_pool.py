@@ -0,0 +1,65 @@
+"""
+Draws 10 words at a time into subrounds from a tournament with 100k words
+(50k per difficulty). Between the draws pairs are imported, as results and
+other writes happen between draws in a real tournament, which must not
+make the pool rebuilt
+"""
+
+import random
+import time
+
+from benchmarks.common import summary, use_temporary_database
+
+use_temporary_database()
+
+from app import app, db  # noqa: E402
+from app.extensions import dbm  # noqa: E402
+
+WORDS = 100000
+DRAWS = 200
+AMOUNT = 10
+
+
+def main() -> None:
+    with app.app_context():
+        db.create_all()
+        dbm.insert_user("owner", "hash")
+        principal = dbm.get_principal("owner")
+        tournament_id = dbm.insert_tournament(principal, "tournament")
+        round_id = dbm.insert_round(principal, tournament_id, "round")
+        dbm.insert_words_bulk(
+            principal,
+            tournament_id,
+            ((line, f"word {line}", line % 2) for line in range(WORDS)),
+            chunk_size=5000,
+        )
+        subround_ids = [
+            dbm.insert_subround(principal, round_id, f"subround {number}")
+            for number in range(DRAWS + 1)
+        ]
+        start = time.perf_counter()
+        dbm.add_x_words_of_diff_y_to_subround(principal, subround_ids[0], 0, AMOUNT)
+        first = time.perf_counter() - start
+        timings = []
+        for number, subround_id in enumerate(subround_ids[1:]):
+            dbm.insert_players_bulk(
+                principal, tournament_id, [(1, f"a {number}", f"b {number}")]
+            )
+            start = time.perf_counter()
+            dbm.add_x_words_of_diff_y_to_subround(principal, subround_id, 0, AMOUNT)
+            timings.append(time.perf_counter() - start)
+        Word = dbm.models.Word
+        taken = [
+            word_id
+            for (word_id,) in db.session.query(Word.id).filter(
+                Word.subround_id.isnot(None)
+            )
+        ]
+        assert len(taken) == len(set(taken)) == (DRAWS + 1) * AMOUNT
+        print(f"first draw of {AMOUNT} from {WORDS // 2} words: {first * 1000:.1f} ms")
+        print(f"next draws, a pair imported before each: {summary(timings)}")
+        print(f"sample of drawn ids: {sorted(random.sample(taken, 8))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,43 @@
 import os
 
 basedir = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_SECRET_KEY = "somebody-once-told-me"  # Public, refused in the signed mode
 
 
 class Config(object):
-    SECRET_KEY = os.environ.get("SECRET_KEY") or "somebody-once-told-me"
+    SECRET_KEY = os.environ.get("SECRET_KEY") or DEFAULT_SECRET_KEY
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "DATABASE_URL"
     ) or "sqlite:///" + os.path.join(basedir, "app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     TOKEN_LIFETIME_SEC = 60 * 60 * 24 * 3
-    RANDOM_BORDER = 2 ** 30
+    TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE") or 1024)
+    TOKEN_MODE = os.environ.get("TOKEN_MODE") or "table"  # "table" or "signed"
+    REVOCATION_REFRESH_SEC = int(os.environ.get("REVOCATION_REFRESH_SEC") or 30)
+    RANDOM_BORDER = 2**30
+    IMPORT_CHUNK_SIZE = 500
+    RESULTS_CACHE_SIZE = int(os.environ.get("RESULTS_CACHE_SIZE") or 1024)
+    # Results submitted within the window are committed together, 0 disables
+    GROUP_COMMIT_WINDOW_MS = int(os.environ.get("GROUP_COMMIT_WINDOW_MS") or 0)
+    # Run on every new SQLite connection, an empty value keeps the SQLite default
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+        "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", str(256 * 2**20)),
+        "cache_size": os.environ.get("SQLITE_CACHE_SIZE", "-65536"),  # In KiB
+        "foreign_keys": os.environ.get("SQLITE_FOREIGN_KEYS", "ON"),
+    }
+    # Kept open SQLite connections, 0 opens a new one for every session
+    SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", 8))
+    # Async server (app/asgi.py): threads running the routes, the database URI
+    # of the async engine (derived from SQLALCHEMY_DATABASE_URI if not set),
+    # how often and how long waiting results requests check the tournament
+    ASYNC_THREADS = int(os.environ.get("ASYNC_THREADS") or 32)
+    ASYNC_DATABASE_URI = os.environ.get("ASYNC_DATABASE_URL")
+    LONG_POLL_INTERVAL_MS = int(os.environ.get("LONG_POLL_INTERVAL_MS") or 500)
+    LONG_POLL_MAX_SEC = int(os.environ.get("LONG_POLL_MAX_SEC") or 60)
+    # Cost factor of new password hashes, older ones are rehashed on login
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS") or 12)
+    BCRYPT_THREADS = int(os.environ.get("BCRYPT_THREADS") or 2)  # Parallel hashes
     ADMIN_SECRET = os.environ.get("ADMIN_SECRET") or "mad-hatters"
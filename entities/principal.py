@@ -0,0 +1,31 @@
+from collections import defaultdict
+from typing import DefaultDict, Set
+
+
+class Principal:
+    """
+    Request-scoped authentication context
+    Resolved once per request from the token and passed through DBManager,
+    remembers objects which ownership was already verified during the request
+    """
+
+    def __init__(self, dbu=None, username="", uid=0):
+        if dbu is None:
+            self.username = username
+            self.uid = uid
+        else:
+            self.username = dbu.username
+            self.uid = dbu.id
+        self.owned: DefaultDict[str, Set[int]] = defaultdict(set)
+
+    def owns(self, object_name: str, object_id) -> bool:
+        return int(object_id) in self.owned[object_name]
+
+    def grant(self, object_name: str, object_id) -> None:
+        self.owned[object_name].add(int(object_id))
+
+    def to_base_info_dict(self):
+        return {
+            "username": self.username,
+            "id": self.uid if self.uid > 0 else "Not stated?",
+        }
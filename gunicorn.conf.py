@@ -0,0 +1,43 @@
+"""
+Settings of the production server, started by start_server.sh
+The app is imported once in the master process and the forked workers
+share its memory copy-on-write
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("HTS_BIND") or "0.0.0.0:22421"
+workers = int(os.environ.get("HTS_WORKERS") or multiprocessing.cpu_count())
+threads = int(os.environ.get("HTS_THREADS") or 4)  # Requests served by each worker
+# uvicorn.workers.UvicornWorker serves the async app, see app/asgi.py
+worker_class = os.environ.get("HTS_WORKER_CLASS") or "gthread"
+preload_app = True
+timeout = int(os.environ.get("HTS_TIMEOUT") or 60)
+graceful_timeout = int(os.environ.get("HTS_GRACEFUL_TIMEOUT") or 30)
+pidfile = os.environ.get("HTS_PIDFILE") or ".hts_server.pid"
+accesslog = errorlog = os.environ.get("HTS_LOG") or ".hts_server.log"
+capture_output = True
+
+
+def when_ready(server):
+    """
+    Runs in the master after the app is preloaded: builds the mappers of
+    the models before the fork and moves everything loaded so far out of
+    the garbage collector's reach, so collections in the workers do not
+    touch (and copy) the shared pages
+    """
+    from sqlalchemy.orm import configure_mappers
+
+    configure_mappers()
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Connections opened by the master must not be shared with the workers."""
+    from app import app, db
+
+    with app.app_context():
+        db.engine.dispose()
@@ -1,7 +1,70 @@
+import click
+
 from app import app, db
+from app.extensions import dbm
 from app.models import User, Token
 
 
 @app.shell_context_processor
 def make_shell_context():
     return {"db": db, "User": User, "Token": Token}
+
+
+@app.cli.command("migrate-tournament-version")
+def migrate_tournament_version():
+    """Add the version columns, used for ETags and caches, to the tournaments."""
+    added = dbm.migrate_tournament_version()
+    print(f"Tournament version columns: {'added' if added else 'already exist'}")
+
+
+@app.cli.command("migrate-results-version")
+def migrate_results_version():
+    """Add the results version columns, keys of the results cache, to the scopes."""
+    added = dbm.migrate_results_version()
+    print(f"Results version columns added to: {', '.join(added) if added else 'none'}")
+
+
+@app.cli.command("migrate-results")
+def migrate_results():
+    """Move pickled results of rounds, subrounds and games into the Score table."""
+    print(f"Scores migrated: {dbm.migrate_pickled_results()}")
+
+
+@app.cli.command("create-indexes")
+def create_indexes():
+    """Create the indexes declared in the models which are missing in the database."""
+    created, skipped = dbm.create_missing_indexes()
+    print(f"Indexes created: {', '.join(created) if created else 'none'}")
+    if skipped:
+        print(
+            f"Indexes skipped, their columns are missing: {', '.join(skipped)}"
+            f" (run flask upgrade)"
+        )
+
+
+@app.cli.command("migrate-words")
+def migrate_words():
+    """Make word texts unique within a tournament instead of globally."""
+    print(f"Words migrated: {dbm.migrate_word_namespace()}")
+
+
+@app.cli.command("migrate-player-names")
+def migrate_player_names():
+    """Fill the table of player names, unique within a tournament."""
+    print(f"Player names migrated: {dbm.migrate_player_names()}")
+
+
+@app.cli.command("upgrade")
+def upgrade():
+    """Bring a database of any older version up to date, safe to run repeatedly."""
+    db.create_all()  # Only the missing tables, e.g. revoked_token
+    context = click.get_current_context()
+    for command in (  # Each step needs the columns added by the previous ones
+        migrate_tournament_version,
+        migrate_results_version,
+        migrate_words,
+        migrate_player_names,
+        migrate_results,
+        create_indexes,
+    ):
+        context.invoke(command)
@@ -1,9 +1,47 @@
 #!/usr/bin/env bash
 
-# You should run this inside a tmux session
+# Usage: ./start_server.sh [start|reload|stop|dev]
+#   start   the production server in background: gunicorn with preloaded app,
+#           settings (workers, threads, port, ...) are in gunicorn.conf.py;
+#           HTS_APP=app.asgi:application HTS_WORKER_CLASS=uvicorn.workers.UvicornWorker
+#           serves the async app with long-polled results instead
+#   reload  graceful restart with the new code: a new master with new workers
+#           is started, then the old one finishes its requests and exits
+#   stop    graceful stop, the running requests are finished
+#   dev     the single-threaded flask development server, run it inside tmux
 
+cd "$(dirname "$0")" || exit 1
 export FLASK_APP=hts_server.py
-flask run --host=0.0.0.0 --port=22421 &> .hts_server.log
+export HTS_PIDFILE=${HTS_PIDFILE:-.hts_server.pid}
 
-# And then leave the session using ^-B d
-# TODO: Make the whole app start process run using just one (this) script
\ No newline at end of file
+wait_for_file() {
+  for _ in $(seq 100); do
+    [ -f "$1" ] && return 0
+    sleep 0.1
+  done
+  echo "$1 did not appear" >&2
+  return 1
+}
+
+case "${1:-start}" in
+start)
+  gunicorn --daemon "${HTS_APP:-hts_server:app}"
+  ;;
+reload)
+  old_master=$(cat "$HTS_PIDFILE")
+  kill -USR2 "$old_master"
+  # The new master writes its pid to "$HTS_PIDFILE.2" and takes over the
+  # pidfile when the old one exits
+  wait_for_file "$HTS_PIDFILE.2" && kill -TERM "$old_master"
+  ;;
+stop)
+  kill -TERM "$(cat "$HTS_PIDFILE")"
+  ;;
+dev)
+  flask run --host=0.0.0.0 --port=22421 &>.hts_server.log
+  ;;
+*)
+  echo "Usage: $0 [start|reload|stop|dev]" >&2
+  exit 1
+  ;;
+esac
@@ -0,0 +1,105 @@
+"""
+The tests run against a temporary SQLite file with the production profile,
+the database is recreated for every test
+"""
+
+import os
+import tempfile
+from collections import namedtuple
+from typing import List
+
+import pytest
+from sqlalchemy import event
+
+DB_DIR = tempfile.mkdtemp(prefix="hts-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(DB_DIR, "test.db")
+os.environ["BCRYPT_ROUNDS"] = "4"  # Read by config.py, so set before the import
+
+from app import app, db  # noqa: E402
+from app.extensions import dbm  # noqa: E402
+from utils.utils import gen_token  # noqa: E402
+
+Tournament = namedtuple("Tournament", "id round_id subround_id pair_ids game_ids")
+
+
+@pytest.fixture
+def context():
+    with app.app_context():
+        dbm.clear_all_tables()
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def principal(context):
+    dbm.insert_user("owner", "hash")
+    return dbm.get_principal("owner")
+
+
+@pytest.fixture
+def token(principal) -> str:
+    """
+    Session token of the owner
+    """
+    token, expires_in = gen_token()
+    dbm.insert_token(token, expires_in, "owner")
+    return token
+
+
+@pytest.fixture
+def client(context):
+    return app.test_client()
+
+
+def make_tournament(
+    principal, pairs: int = 8, games: int = 2, name: str = "tournament"
+) -> Tournament:
+    """
+    :return: ids of a tournament with one round and one subround, both with all
+    the pairs, the subround split into games
+    """
+    tournament_id = dbm.insert_tournament(principal, name)
+    round_id = dbm.insert_round(principal, tournament_id, "round")
+    subround_id = dbm.insert_subround(principal, round_id, "subround")
+    dbm.insert_players_bulk(
+        principal,
+        tournament_id,
+        ((line, f"first {line}", f"second {line}") for line in range(pairs)),
+    )
+    pair_ids = [
+        pair.id
+        for pair in dbm.models.Player.query.filter_by(
+            tournament_id=tournament_id
+        ).order_by("id")
+    ]
+    dbm.add_pair_ids_to_round(principal, round_id, pair_ids)
+    dbm.add_pair_ids_to_subround(principal, subround_id, pair_ids)
+    game_ids = dbm.split_subround_into_games(principal, subround_id, games)
+    return Tournament(tournament_id, round_id, subround_id, pair_ids, game_ids)
+
+
+@pytest.fixture
+def tournament(principal) -> Tournament:
+    return make_tournament(principal)
+
+
+class StatementLog:
+    """
+    Collects the statements sent to the database while it is active
+    """
+
+    def __init__(self) -> None:
+        self.statements: List[tuple] = []  # (SQL, parameters, executemany)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters, executemany))
+
+    def __enter__(self) -> "StatementLog":
+        event.listen(db.engine, "before_cursor_execute", self.record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(db.engine, "before_cursor_execute", self.record)
+
+    def __len__(self) -> int:
+        return len(self.statements)
@@ -0,0 +1,126 @@
+"""
+Requests served through the ASGI app, called directly without a server
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Tuple
+
+from app.asgi import AsyncServer, VersionWatcher
+from app import app
+from app.extensions import dbm
+from utils.utils import gen_token
+
+WORDS = 20000
+EXPORTS = 6
+
+
+def owner_token() -> str:
+    token, expires = gen_token()
+    dbm.insert_token(token, expires, "owner")
+    return token
+
+
+async def asgi_get(
+    server: AsyncServer, path: str, query: str, headers: Dict[str, str]
+) -> Tuple[int, bytes, List[Dict]]:
+    """
+    :return: status code, joined body and all the messages sent by the app
+    """
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "http_version": "1.1",
+        "scheme": "http",
+    }
+    messages: List[Dict] = []
+
+    async def receive() -> Dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict) -> None:
+        messages.append(message)
+
+    await server(scope, receive, send)
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return messages[0]["status"], body, messages
+
+
+def test_concurrent_streamed_exports_are_complete(principal):
+    tournament_id = dbm.insert_tournament(principal, "tournament")
+    dbm.insert_words_bulk(
+        principal,
+        tournament_id,
+        ((line, f"word {line}", line % 3) for line in range(WORDS)),
+        chunk_size=5000,
+    )
+    headers = {"X-HTS-Token": owner_token()}
+    server = AsyncServer(app)
+
+    async def exports():
+        try:
+            return await asyncio.gather(
+                *(
+                    asgi_get(
+                        server,
+                        "/api/v1/words/export",
+                        f"tournament_id={tournament_id}",
+                        headers,
+                    )
+                    for _ in range(EXPORTS)
+                )
+            )
+        finally:
+            await server.stop()
+
+    for status, body, messages in asyncio.run(exports()):
+        assert status == 200
+        assert messages[-1] == {"type": "http.response.body"}  # The end was sent
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert [row["text"] for row in rows] == [f"word {n}" for n in range(WORDS)]
+
+
+def test_lifespan_and_websocket_scopes(context):
+    server = AsyncServer(app)
+
+    async def run() -> List[Dict]:
+        received = [
+            {"type": "websocket.connect"},
+            {"type": "lifespan.startup"},
+            {"type": "lifespan.shutdown"},
+        ]
+        sent: List[Dict] = []
+
+        async def receive() -> Dict:
+            return received.pop(0)
+
+        async def send(message: Dict) -> None:
+            sent.append(message)
+
+        await server({"type": "websocket", "path": "/"}, receive, send)
+        await server({"type": "lifespan"}, receive, send)
+        return sent
+
+    assert [message["type"] for message in asyncio.run(run())] == [
+        "websocket.close",
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
+
+
+def test_failed_version_watch_wakes_the_waiters(caplog):
+    def broken_session():
+        raise RuntimeError("database is gone")
+
+    async def wait() -> bool:
+        watcher = VersionWatcher(broken_session, interval_sec=60)
+        changed = await watcher.wait_for_change(("round", 1), 5, timeout=30)
+        await asyncio.sleep(0)  # The done callback has run
+        assert watcher.watches == {} and watcher.tasks == set()
+        return changed
+
+    assert asyncio.run(asyncio.wait_for(wait(), 5))
+    assert "database is gone" in caplog.text
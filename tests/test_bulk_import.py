@@ -0,0 +1,140 @@
+"""
+Streaming bulk imports: good lines are imported, bad ones are rejected one by one
+"""
+
+import pytest
+
+from app.extensions import dbm
+
+
+def post_import(client, path: str, token: str, tournament_id: int, body: bytes, fmt):
+    return client.post(
+        path,
+        data=body,
+        headers={"X-HTS-Token": token},
+        query_string={"tournament_id": tournament_id, "format": fmt},
+    )
+
+
+@pytest.fixture
+def tournament_id(principal) -> int:
+    return dbm.insert_tournament(principal, "tournament")
+
+
+def word_texts(tournament_id: int):
+    return [
+        word.text
+        for word in dbm.models.Word.query.filter_by(tournament_id=tournament_id)
+    ]
+
+
+def test_words_partial_acceptance(client, token, principal, tournament_id):
+    dbm.insert_word(principal, tournament_id, "existing", 1)
+    body = b"\n".join(
+        [
+            b'{"text": "apple", "difficulty": 1}',
+            b'{"text": "Apple ", "difficulty": 2}',  # Normalized duplicate
+            b'{"text": "pear", "difficulty": 1',
+            b'{"text": "plum"}',
+            b'{"text": "fig", "difficulty": "hard"}',
+            b'{"text": "caf\xe9", "difficulty": 1}',  # Latin-1
+            b'{"text": "Existing", "difficulty": 1}',
+            b"",
+            b'{"text": "lime", "difficulty": 3}',
+        ]
+    )
+    response = post_import(
+        client, "/api/v1/words/import", token, tournament_id, body, "ndjson"
+    )
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["Imported"] == 2
+    assert [line["line"] for line in data["Rejected"]] == [2, 3, 4, 5, 6, 7]
+    reasons = [line["reason"] for line in data["Rejected"]]
+    assert reasons[0] == "Word already exists"
+    assert reasons[1].startswith("Bad JSON line")
+    assert reasons[2].startswith("Bad JSON line")
+    assert reasons[3].startswith("Bad value")
+    assert reasons[4].startswith("Not UTF-8")
+    assert reasons[5] == "Word already exists"
+    assert sorted(word_texts(tournament_id)) == ["apple", "existing", "lime"]
+
+
+def test_words_csv_with_header(client, token, tournament_id):
+    body = b"text,difficulty\napple,1\npear\n\nplum,2\n"
+    response = post_import(
+        client, "/api/v1/words/import", token, tournament_id, body, "csv"
+    )
+    assert response.status_code == 201
+    assert response.get_json() == {
+        "Imported": 2,
+        "Rejected": [{"line": 3, "reason": "Expected 2 fields"}],
+    }
+
+
+def test_players_partial_acceptance(client, token, principal, tournament_id):
+    dbm.insert_player(principal, tournament_id, "Ann", "Bob")
+    body = b"\n".join(
+        [
+            b"name_first,name_second",
+            b"Carl,Dave",
+            b"Eve,eve",  # Same player twice
+            b"carl ,Fred",  # Normalized duplicate in the upload
+            b"Gil,Ann",  # Already in the tournament
+            b"Hal",
+            b"Ivy, ",
+            b"J\xfcrgen,Kim",  # Latin-1
+            b"Lea,Max",
+        ]
+    )
+    response = post_import(
+        client, "/api/v1/players/import", token, tournament_id, body, "csv"
+    )
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["Imported"] == 2
+    assert data["Rejected"][:5] == [
+        {"line": 3, "reason": "Same player twice"},
+        {"line": 4, "reason": "Player already exists"},
+        {"line": 5, "reason": "Player already exists"},
+        {"line": 6, "reason": "Expected 2 fields"},
+        {"line": 7, "reason": "Bad value: empty string"},
+    ]
+    assert data["Rejected"][5]["line"] == 8
+    assert data["Rejected"][5]["reason"].startswith("Not UTF-8")
+    pairs = dbm.models.Player.query.filter_by(tournament_id=tournament_id)
+    assert sorted(pair.name_first for pair in pairs) == ["Ann", "Carl", "Lea"]
+
+
+def test_unknown_format_is_rejected(client, token, tournament_id):
+    response = post_import(
+        client, "/api/v1/words/import", token, tournament_id, b"", "xml"
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {"Message": "Unknown import format xml"}
+
+
+@pytest.mark.parametrize("path", ["/api/v1/words/import", "/api/v1/players/import"])
+def test_token_in_url_is_rejected(client, token, tournament_id, path):
+    response = client.post(
+        path,
+        data=b"",
+        headers={"X-HTS-Token": token},
+        query_string={"tournament_id": tournament_id, "token": token},
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {
+        "Message": "Token should be passed in the X-HTS-Token header"
+    }
+
+
+@pytest.mark.parametrize("path", ["/api/v1/words/import", "/api/v1/players/import"])
+def test_header_token_is_checked(client, tournament_id, path):
+    response = client.post(
+        path,
+        data=b"",
+        headers={"X-HTS-Token": "unknown"},
+        query_string={"tournament_id": tournament_id},
+    )
+    assert response.status_code == 404
+    assert response.get_json() == {"Message": "Token not found"}
@@ -0,0 +1,55 @@
+"""
+Conditional GETs of the results: the ETag follows the tournament version
+"""
+
+import json
+
+import pytest
+
+from app.extensions import dbm
+
+RESULTS = {
+    "round": ("/api/v1/round/results", "round_id"),
+    "round pretty": ("/api/v1/round/results/pretty", "round_id"),
+    "subround": ("/api/v1/subround/results", "subround_id"),
+    "subround pretty": ("/api/v1/subround/results/pretty", "subround_id"),
+}
+
+
+def get_results(client, token: str, tournament, name: str, etag=None):
+    path, argument = RESULTS[name]
+    object_id = getattr(tournament, argument)
+    headers = {} if etag is None else {"If-None-Match": etag}
+    return client.get(path, json={"token": token, argument: object_id}, headers=headers)
+
+
+@pytest.mark.parametrize("name", list(RESULTS))
+def test_matching_etag_gets_304(client, token, tournament, name):
+    response = get_results(client, token, tournament, name)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    response = get_results(client, token, tournament, name, etag)
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+    response = get_results(client, token, tournament, name, f'"other", {etag}')
+    assert response.status_code == 304
+    response = get_results(client, token, tournament, name, '"other"')
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("name", list(RESULTS))
+def test_etag_changes_after_a_result_write(client, token, principal, tournament, name):
+    etag = get_results(client, token, tournament, name).headers["ETag"]
+    game_id = tournament.game_ids[0]
+    pairs = dbm.get_game_id(principal, game_id).players
+    result = {str(pair.id): number + 1 for number, pair in enumerate(pairs)}
+    response = client.post(
+        "/api/v1/game/results",
+        json=dict(token=token, game_id=game_id, result=json.dumps(result)),
+    )
+    assert response.status_code == 201
+    response = get_results(client, token, tournament, name, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert max(value for _, value in response.get_json()["Result"]) == len(result)
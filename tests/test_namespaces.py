@@ -0,0 +1,128 @@
+"""
+Words and player names are unique within a tournament by their normalized form
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.db_manager import DBException
+from app.extensions import dbm
+from exceptions.UserExceptions import ObjectAlreadyExistsException
+
+
+@pytest.fixture
+def tournament_ids(principal):
+    return [dbm.insert_tournament(principal, name) for name in ("first", "second")]
+
+
+def post_word(client, token: str, tournament_id: int, word_text: str):
+    return client.post(
+        "/api/v1/word",
+        json=dict(
+            token=token,
+            tournament_id=tournament_id,
+            word_text=word_text,
+            word_difficulty=1,
+        ),
+    )
+
+
+def test_same_word_in_two_tournaments(client, token, tournament_ids):
+    for tournament_id in tournament_ids:
+        assert post_word(client, token, tournament_id, "apple").status_code == 201
+
+
+@pytest.mark.parametrize("duplicate", ["apple", "Apple", " APPLE ", "ａｐｐｌｅ"])
+def test_normalized_duplicate_word_is_refused(client, token, tournament_ids, duplicate):
+    assert post_word(client, token, tournament_ids[0], "apple").status_code == 201
+    response = post_word(client, token, tournament_ids[0], duplicate)
+    assert response.status_code == 400
+    assert response.get_json() == {"Message": "Word already exists"}
+
+
+def test_word_migration_refuses_existing_duplicates(principal, tournament_ids):
+    first, second = tournament_ids
+    dbm.insert_word(principal, first, "apple", 1)
+    pear_id = dbm.insert_word(principal, first, "pear", 1)
+    dbm.insert_word(principal, second, "Apple", 1)
+    session = dbm.db.session
+    session.execute(text("DROP INDEX uq_word_tournament_normalized_text"))
+    session.execute(  # Allowed by the former index, it compared the texts as sent
+        text("UPDATE word SET text = 'Apple ' WHERE id = :id"), {"id": pear_id}
+    )
+    session.commit()
+    with pytest.raises(DBException) as error:
+        dbm.migrate_word_namespace()
+    assert error.value.code == 409
+    assert f"Words {pear_id} duplicate" in error.value.message
+
+    dbm.delete_word(principal, pear_id)
+    assert dbm.migrate_word_namespace() == 2
+    with pytest.raises(ObjectAlreadyExistsException):  # The index is back
+        dbm.insert_word(principal, first, "APPLE", 1)
+
+
+def post_pair(client, token: str, tournament_id: int, first: str, second: str):
+    return client.post(
+        "/api/v1/player",
+        json=dict(
+            token=token,
+            tournament_id=tournament_id,
+            name_first=first,
+            name_second=second,
+        ),
+    )
+
+
+def find_pair(client, token: str, tournament_id: int, player_name: str):
+    return client.get(
+        "/api/v1/player/by_name",
+        json=dict(token=token, tournament_id=tournament_id, player_name=player_name),
+    )
+
+
+def test_same_players_in_two_tournaments(client, token, tournament_ids):
+    pair_ids = []
+    for tournament_id in tournament_ids:
+        response = post_pair(client, token, tournament_id, "Ann", "Bob")
+        assert response.status_code == 201
+        pair_ids.append(response.get_json()["ID"])
+    for tournament_id, pair_id in zip(tournament_ids, pair_ids):
+        for name in ("Ann", "bob "):
+            response = find_pair(client, token, tournament_id, name)
+            assert response.status_code == 200
+            assert response.get_json() == {"ID": pair_id}
+
+
+@pytest.mark.parametrize("first, second", [("ann", "Carl"), ("Carl", " BOB")])
+def test_normalized_duplicate_player_is_refused(
+    client, token, tournament_ids, first, second
+):
+    assert post_pair(client, token, tournament_ids[0], "Ann", "Bob").status_code == 201
+    response = post_pair(client, token, tournament_ids[0], first, second)
+    assert response.status_code == 400
+    assert response.get_json() == {"Message": "Player already exists"}
+    response = find_pair(client, token, tournament_ids[0], "Carl")
+    assert response.status_code == 404  # Nothing of the refused pair is left
+
+
+def test_player_migration_refuses_existing_duplicates(principal, tournament_ids):
+    first, second = tournament_ids
+    dbm.insert_player(principal, first, "Ann", "Bob")
+    pair_id = dbm.insert_player(principal, first, "Carl", "Dave")
+    other_id = dbm.insert_player(principal, second, "Carl", "Ann")
+    m = dbm.models
+    session = dbm.db.session
+    session.execute(m.PlayerName.__table__.delete())  # As before the name table
+    session.execute(
+        text("UPDATE player SET name_first = 'ANN' WHERE id = :id"), {"id": pair_id}
+    )
+    session.commit()
+    with pytest.raises(DBException) as error:
+        dbm.migrate_player_names()
+    assert error.value.code == 409
+    assert f"Pairs {pair_id} reuse" in error.value.message
+
+    dbm.delete_player(principal, pair_id)
+    assert dbm.migrate_player_names() == 4
+    assert dbm.get_pair_by_name(principal, second, "carl") == other_id
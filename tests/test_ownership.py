@@ -0,0 +1,70 @@
+"""
+Ownership of every object is resolved together with the object in one statement
+"""
+
+import pytest
+
+from app.extensions import dbm
+from exceptions.UserExceptions import (
+    NotTheOwnerOfObjectException,
+    ObjectNotFoundException,
+)
+from tests.conftest import StatementLog
+
+GETTERS = {  # object -> (getter, id in the tournament fixture)
+    "tournament": (dbm.get_tournament_id, lambda t: t.id),
+    "round": (dbm.get_round_id, lambda t: t.round_id),
+    "subround": (dbm.get_subround_id, lambda t: t.subround_id),
+    "game": (dbm.get_game_id, lambda t: t.game_ids[0]),
+    "pair": (dbm.get_pair_id, lambda t: t.pair_ids[0]),
+}
+
+
+@pytest.mark.parametrize("name", GETTERS)
+def test_owned_object_is_one_statement(tournament, name):
+    getter, object_id = GETTERS[name]
+    principal = dbm.get_principal("owner")  # Nothing is granted yet
+    with StatementLog() as log:
+        object_obj = getter(principal, object_id(tournament))
+    assert object_obj.id == object_id(tournament)
+    assert len(log) == 1
+
+
+@pytest.mark.parametrize("name", GETTERS)
+def test_owned_object_is_not_checked_twice(tournament, name):
+    getter, object_id = GETTERS[name]
+    principal = dbm.get_principal("owner")
+    object_obj = getter(principal, object_id(tournament))  # Stays in the session
+    with StatementLog() as log:
+        assert getter(principal, object_id(tournament)) is object_obj
+    assert len(log) == 0
+
+
+@pytest.mark.parametrize("name", GETTERS)
+def test_other_owner_is_rejected_in_one_statement(tournament, name):
+    getter, object_id = GETTERS[name]
+    dbm.insert_user("other", "hash")
+    principal = dbm.get_principal("other")
+    expected = ObjectNotFoundException if name == "tournament" else None
+    with StatementLog() as log:
+        with pytest.raises(expected or NotTheOwnerOfObjectException):
+            getter(principal, object_id(tournament))
+    assert len(log) == 1
+
+
+def test_word_ownership_is_one_statement(tournament):
+    word_id = dbm.insert_word(dbm.get_principal("owner"), tournament.id, "word", 1)
+    principal = dbm.get_principal("owner")
+    with StatementLog() as log:
+        assert dbm.get_word_id(principal, word_id).id == word_id
+    assert len(log) == 1
+
+
+@pytest.mark.parametrize("name", ["round", "subround"])
+def test_results_version_is_one_statement(tournament, name):
+    getter = getattr(dbm, f"get_{name}_versions")
+    object_id = GETTERS[name][1](tournament)
+    principal = dbm.get_principal("owner")
+    with StatementLog() as log:
+        getter(principal, object_id)
+    assert len(log) == 1
@@ -0,0 +1,44 @@
+"""
+Keyset pagination arguments of the list requests
+"""
+
+import pytest
+
+from app.extensions import dbm
+
+TOURNAMENTS = 5
+
+
+@pytest.fixture
+def tournaments(principal):
+    return [dbm.insert_tournament(principal, str(n)) for n in range(TOURNAMENTS)]
+
+
+def test_pages_follow_the_cursor(client, token, tournaments):
+    ids, after_id = [], 0
+    while after_id is not None:
+        response = client.get(
+            "/api/v1/tournaments",
+            json=dict(token=token, after_id=after_id, limit=2, fields=["id"]),
+        )
+        assert response.status_code == 200
+        page = response.get_json()
+        ids += [tournament["id"] for tournament in page["Tournaments"]]
+        after_id = page["Next cursor"]
+    assert ids == tournaments
+
+
+@pytest.mark.parametrize(
+    "arguments, message",
+    [
+        ({"limit": "many"}, "after_id and limit should be integers"),
+        ({"after_id": "first"}, "after_id and limit should be integers"),
+        ({"after_id": None}, "after_id and limit should be integers"),
+        ({"limit": 0}, "Limit should be positive"),
+        ({"limit": -2}, "Limit should be positive"),
+    ],
+)
+def test_bad_arguments_are_rejected(client, token, tournaments, arguments, message):
+    response = client.get("/api/v1/tournaments", json=dict(token=token, **arguments))
+    assert response.status_code == 400
+    assert response.get_json() == {"Message": message}
@@ -0,0 +1,122 @@
+"""
+EXPLAIN QUERY PLAN of every statement of the hot DBManager helpers:
+none of them may fall back to a full table scan, each one uses its index
+The tables are not analyzed, so SQLite plans them as large ones
+"""
+
+import re
+from typing import List, Tuple
+
+import pytest
+
+from app import db
+from app.extensions import dbm
+from tests.conftest import StatementLog
+
+EXPLAINED = re.compile(r"\s*(SELECT|UPDATE|DELETE)", re.IGNORECASE)
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?(?!CONSTANT ROW)\w+")  # Also of an index
+
+
+def query_plans(action) -> List[Tuple[str, List[str]]]:
+    """
+    :return: statements run by the action and the details of their plans
+    """
+    with StatementLog() as log:
+        action()
+    plans = []
+    for statement, parameters, executemany in log.statements:
+        if not EXPLAINED.match(statement):
+            continue
+        if executemany:
+            parameters = parameters[0]
+        rows = db.session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        )
+        plans.append((statement, [row[-1] for row in rows]))
+    return plans
+
+
+def draw_pool(tournament_id: int, difficulty: int) -> None:
+    with dbm.word_pools_lock:
+        dbm.word_pools.clear()
+        dbm.get_word_pool(tournament_id, difficulty, 0)
+
+
+HELPERS = {  # name -> (action, index which has to be used)
+    "tournament by name": (
+        lambda p, t: dbm.is_tournament_exists_id(p.uid, "tournament"),
+        "ix_tournament_user_name",
+    ),
+    "round by name": (
+        lambda p, t: dbm.is_round_exists_id(p, t.id, "round"),
+        "ix_round_tournament_name",
+    ),
+    "subround by name": (
+        lambda p, t: dbm.is_subround_exists_id(p, t.round_id, "subround"),
+        "ix_subround_round_name",
+    ),
+    "pair by player name": (
+        lambda p, t: dbm.find_pair_id(t.id, "First 1"),
+        "sqlite_autoindex_player_name_1",
+    ),
+    "pairs of a tournament": (
+        lambda p, t: dbm.get_players(p, t.id),
+        "ix_player_tournament_id",
+    ),
+    "free words of a difficulty": (
+        lambda p, t: draw_pool(t.id, 1),
+        "ix_word_tournament_difficulty_free",
+    ),
+    "words of a subround": (
+        lambda p, t: dbm.get_subround_words(p, t.subround_id),
+        "ix_word_subround_id",
+    ),
+    "pairs of a round": (
+        lambda p, t: dbm.get_players_in_round(p, t.round_id),
+        "ix_players_in_rounds_round",
+    ),
+    "pairs of a subround": (
+        lambda p, t: dbm.get_players_in_subround(p, t.subround_id),
+        "ix_players_in_subrounds_subround",
+    ),
+    "games of a subround": (
+        lambda p, t: dbm.get_games(p, t.subround_id),
+        "ix_game_subround_id",
+    ),
+    "pairs of a game": (
+        lambda p, t: dbm.get_game_info(p, t.game_ids[0]),
+        "ix_players_in_games_game",
+    ),
+    "round results": (
+        lambda p, t: dbm.get_scores("round", t.round_id, True),
+        "ix_score_scope_value",
+    ),
+    "rank in a round": (
+        lambda p, t: dbm.get_rank("round", t.round_id, t.pair_ids[0]),
+        "ix_score_scope_value",
+    ),
+}
+
+
+@pytest.fixture
+def filled(tournament, principal):
+    dbm.insert_words_bulk(
+        principal,
+        tournament.id,
+        ((line, f"word {line}", line % 3) for line in range(30)),
+    )
+    dbm.add_x_words_of_diff_y_to_subround(principal, tournament.subround_id, 1, 3)
+    return tournament
+
+
+@pytest.mark.parametrize("name", HELPERS)
+def test_no_full_scans(filled, name):
+    action, index = HELPERS[name]
+    principal = dbm.get_principal("owner")
+    plans = query_plans(lambda: action(principal, filled))
+    assert plans
+    for statement, details in plans:
+        scans = [detail for detail in details if FULL_SCAN.match(detail)]
+        assert scans == [], f"{scans} in {statement}"
+    used = " ".join(detail for _, details in plans for detail in details)
+    assert f"INDEX {index} " in used + " ", used
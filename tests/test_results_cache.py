@@ -0,0 +1,95 @@
+"""
+Results cache: entries are keyed on the results version of their round,
+subround or game, so only writes to the scores of the scope replace them
+"""
+
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import update
+
+from app.extensions import dbm
+from tests.conftest import make_tournament
+
+
+def totals(result) -> Dict:
+    return {pair_id: value for pair_id, value in result}
+
+
+def game_result(principal, game_id: int) -> Counter:
+    pairs = dbm.get_game_id(principal, game_id).players
+    return Counter({pair.id: number + 1 for number, pair in enumerate(pairs)})
+
+
+def test_hits_and_misses(principal):
+    tournament = make_tournament(principal)
+    other_subround_id = dbm.insert_subround(principal, tournament.round_id, "other")
+    dbm.add_pair_ids_to_subround(principal, other_subround_id, tournament.pair_ids)
+    (other_game_id,) = dbm.split_subround_into_games(principal, other_subround_id, 1)
+
+    def read_round():
+        dbm.get_round_result(principal, tournament.round_id, False)
+
+    def read_subround():
+        dbm.get_subround_result(principal, tournament.subround_id, False)
+
+    def counts():
+        stats = dbm.results_cache.stats()
+        return stats["hits"] - before["hits"], stats["misses"] - before["misses"]
+
+    before = dbm.results_cache.stats()
+    read_round(), read_subround()
+    read_round(), read_subround()
+    assert counts() == (2, 2)
+
+    dbm.insert_word(principal, tournament.id, "word", 1)  # Not a score write
+    dbm.set_game_result(principal, other_game_id, game_result(principal, other_game_id))
+    read_subround()
+    assert counts() == (3, 2)  # Only the other subround written
+    read_round()
+    assert counts() == (3, 3)  # Its round has new totals
+
+
+def test_no_stale_read_after_write(principal):
+    tournament = make_tournament(principal)
+    game_id = tournament.game_ids[0]
+    before = totals(dbm.get_round_result(principal, tournament.round_id, False))
+    assert set(before.values()) == {0}
+    result = game_result(principal, game_id)
+    dbm.set_game_result(principal, game_id, result)
+    assert totals(dbm.get_round_result(principal, tournament.round_id, False)) == {
+        **before,
+        **result,
+    }
+    assert totals(dbm.get_game_result(principal, game_id, False)) == result
+    dbm.delete_game_result(principal, game_id)
+    assert totals(dbm.get_round_result(principal, tournament.round_id, False)) == before
+
+
+def test_no_stale_read_after_write_of_another_process(principal):
+    tournament = make_tournament(principal)
+    m = dbm.models
+    dbm.get_round_result(principal, tournament.round_id, False)
+    dbm.db.session.execute(  # As another process would, this cache misses it
+        update(m.Score)
+        .where((m.Score.scope == "round") & (m.Score.scope_id == tournament.round_id))
+        .values(value=7)
+    )
+    dbm.bump_results_version("round", [tournament.round_id])
+    dbm.db.session.commit()
+    result = totals(dbm.get_round_result(principal, tournament.round_id, False))
+    assert set(result.values()) == {7}
+
+
+def test_deleted_pair_leaves_the_cached_results(principal):
+    tournament = make_tournament(principal)
+    pair_id = tournament.pair_ids[0]
+    dbm.get_round_result(principal, tournament.round_id, False)
+    dbm.get_subround_result(principal, tournament.subround_id, False)
+    dbm.delete_player(principal, pair_id)
+    assert pair_id not in totals(
+        dbm.get_round_result(principal, tournament.round_id, False)
+    )
+    assert pair_id not in totals(
+        dbm.get_subround_result(principal, tournament.subround_id, False)
+    )
@@ -0,0 +1,105 @@
+"""
+Concurrent submissions and deletions of game results keep the round and
+subround totals equal to the sums of the games, with and without group commit
+Every pair plays in every subround, so games of different subrounds
+update the same round totals at once
+"""
+
+import random
+import threading
+from collections import Counter
+from typing import Dict, List
+
+import pytest
+
+from app import app, db
+from app.extensions import dbm
+from tests.conftest import make_tournament
+from utils.group_commit import GroupCommitter
+
+THREADS = 8
+PAIRS = 40
+SUBROUNDS = 10
+GAMES_PER_SUBROUND = 20
+
+
+def scorekeeper(game_ids: List[int], results: Dict, final: Dict, errors: List):
+    """
+    Sets the results of the games, deletes every third of them
+    and sets new results of every other deleted one
+    """
+    with app.app_context():
+        principal = dbm.get_principal("owner")
+        try:
+            for game_id in game_ids:
+                dbm.set_game_result(principal, game_id, results[game_id])
+            for game_id in game_ids[::3]:
+                dbm.delete_game_result(principal, game_id)
+            for game_id in game_ids[::6]:
+                result = Counter(
+                    {pair: 2 * value for pair, value in results[game_id].items()}
+                )
+                dbm.set_game_result(principal, game_id, result)
+                final[game_id] = result
+            for game_id in set(game_ids) - set(game_ids[::3]):
+                final[game_id] = results[game_id]
+        except Exception as e:
+            errors.append(e)
+
+
+@pytest.mark.parametrize("group_commit", [False, True])
+def test_totals_equal_sums_of_games(principal, group_commit):
+    tournament = make_tournament(principal, PAIRS, GAMES_PER_SUBROUND)
+    subround_games = {tournament.subround_id: tournament.game_ids}
+    for number in range(1, SUBROUNDS):
+        subround_id = dbm.insert_subround(principal, tournament.round_id, str(number))
+        dbm.add_pair_ids_to_subround(principal, subround_id, tournament.pair_ids)
+        subround_games[subround_id] = dbm.split_subround_into_games(
+            principal, subround_id, GAMES_PER_SUBROUND
+        )
+    results: Dict[int, Counter] = dict()
+    for game_ids in subround_games.values():
+        for game_id in game_ids:
+            pairs = dbm.get_game_id(principal, game_id).players
+            results[game_id] = Counter(
+                {pair.id: random.randint(1, 50) for pair in pairs}
+            )
+    game_ids = list(results)
+    random.shuffle(game_ids)  # Each thread scores games of all the subrounds
+
+    if group_commit:
+        dbm.group_committer = GroupCommitter(dbm.run_group, 0.005)
+    final: Dict[int, Counter] = dict()
+    errors: List[Exception] = []
+    threads = [
+        threading.Thread(
+            target=scorekeeper, args=(game_ids[i::THREADS], results, final, errors)
+        )
+        for i in range(THREADS)
+    ]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        dbm.group_committer = None
+    assert errors == []
+    db.session.expire_all()  # The games were loaded before the threads wrote them
+
+    def totals(game_ids: List[int]) -> Dict[int, int]:
+        expected = Counter({pair_id: 0 for pair_id in tournament.pair_ids})
+        expected.update(sum((final[g] for g in game_ids if g in final), Counter()))
+        return dict(expected)
+
+    round_result = dbm.get_round_result(principal, tournament.round_id, False)
+    assert dict(round_result) == totals(game_ids)
+    for subround_id, subround_game_ids in subround_games.items():
+        subround_result = dbm.get_subround_result(principal, subround_id, False)
+        assert dict(subround_result) == totals(subround_game_ids)
+    for game_id in game_ids:
+        if game_id in final:
+            game_result = dbm.get_game_result(principal, game_id, False)
+            assert dict(game_result) == dict(final[game_id])
+        else:
+            assert not dbm.get_game_id(principal, game_id).results_set
@@ -0,0 +1,84 @@
+"""
+Stateless signed session tokens (TOKEN_MODE=signed)
+"""
+
+import pytest
+
+import app.functions as functions
+from app import create_app
+from app.extensions import dbm
+from config import Config, DEFAULT_SECRET_KEY
+from exceptions.UserExceptions import ObjectNotFoundException
+from utils.signed_token import gen_signed_token, read_signed_token, SEPARATOR
+
+
+@pytest.fixture
+def signed_mode(monkeypatch):
+    monkeypatch.setattr(Config, "TOKEN_MODE", "signed")
+    monkeypatch.setattr(Config, "SECRET_KEY", "a private test key")
+
+
+def test_valid_token_is_accepted(signed_mode, principal):
+    token, _ = gen_signed_token(principal.uid)
+    assert functions.token_auth(token).uid == principal.uid
+
+
+@pytest.mark.parametrize("part", [0, 1, 2, 3])  # user id, expiration, id, signature
+def test_tampered_token_is_rejected(signed_mode, principal, part):
+    token, _ = gen_signed_token(principal.uid)
+    parts = token.split(SEPARATOR)
+    parts[part] = ("8" if parts[part][0] == "9" else "9") + parts[part][1:]
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(SEPARATOR.join(parts))
+
+
+def test_token_signed_with_another_key_is_rejected(signed_mode, principal, monkeypatch):
+    token, _ = gen_signed_token(principal.uid)
+    monkeypatch.setattr(Config, "SECRET_KEY", "another private key")
+    assert read_signed_token(token) is None
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
+
+
+def test_expired_token_is_rejected(signed_mode, principal, monkeypatch):
+    monkeypatch.setattr(Config, "TOKEN_LIFETIME_SEC", -1)
+    token, _ = gen_signed_token(principal.uid)
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
+
+
+def test_token_is_rejected_after_logout(signed_mode, principal):
+    token, _ = gen_signed_token(principal.uid)
+    functions.token_auth(token)  # Cached now
+    assert functions.logout(token).status_code == 200
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
+
+
+def test_revocation_by_another_process_is_seen_after_refresh(signed_mode, principal):
+    token, _ = gen_signed_token(principal.uid)
+    functions.token_auth(token)  # Loads the revocation list
+    _, expires_in, token_id = read_signed_token(token)
+    dbm.db.session.add(dbm.models.RevokedToken(id=token_id, expires_in=expires_in))
+    dbm.db.session.commit()
+    dbm.revoked_tokens_loaded = None  # The refresh interval has passed
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
+
+
+def test_token_of_deleted_user_is_rejected(signed_mode, principal):
+    token, _ = gen_signed_token(principal.uid)
+    dbm.db.session.delete(dbm.models.User.query.get(principal.uid))
+    dbm.db.session.commit()
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
+
+
+@pytest.mark.parametrize("secret_key", [DEFAULT_SECRET_KEY, "", None])
+def test_signed_mode_refuses_default_secret_key(secret_key):
+    class SignedConfig(Config):
+        TOKEN_MODE = "signed"
+        SECRET_KEY = secret_key
+
+    with pytest.raises(RuntimeError, match="SECRET_KEY"):
+        create_app(SignedConfig)
@@ -0,0 +1,56 @@
+"""
+Whole-tournament snapshot: the statement count doesn't grow with the tournament
+"""
+
+from collections import Counter
+
+from app.extensions import dbm
+from tests.conftest import make_tournament, StatementLog
+
+
+def fill(principal, tournament, rounds: int, subrounds: int, games: int) -> None:
+    """
+    Adds rounds of subrounds with words and games, sets the results of the games
+    """
+    dbm.insert_words_bulk(
+        principal,
+        tournament.id,
+        ((line, f"word {line}", 1) for line in range(rounds * subrounds * 2)),
+    )
+    round_ids = [tournament.round_id] + [
+        dbm.insert_round(principal, tournament.id, f"round {number}")
+        for number in range(1, rounds)
+    ]
+    game_ids = list(tournament.game_ids)
+    for round_id in round_ids:
+        if round_id != tournament.round_id:
+            dbm.add_pair_ids_to_round(principal, round_id, tournament.pair_ids)
+        for number in range(subrounds):
+            subround_id = dbm.insert_subround(principal, round_id, f"more {number}")
+            dbm.add_pair_ids_to_subround(principal, subround_id, tournament.pair_ids)
+            dbm.add_x_words_of_diff_y_to_subround(principal, subround_id, 1, 2)
+            game_ids += dbm.split_subround_into_games(principal, subround_id, games)
+    for game_id in game_ids:
+        pairs = dbm.get_game_id(principal, game_id).players
+        result = Counter({pair.id: number for number, pair in enumerate(pairs)})
+        dbm.set_game_result(principal, game_id, result)
+
+
+def snapshot_statements(principal, tournament_id: int) -> int:
+    dbm.db.session.expire_all()  # Nothing loaded by the setup is reused
+    with StatementLog() as log:
+        snapshot = dbm.get_tournament_snapshot(principal, tournament_id)
+    assert snapshot["rounds"][0]["subrounds"][0]["games"][0]["results"]
+    return len(log)
+
+
+def test_statement_count_is_constant(principal):
+    small = make_tournament(principal, pairs=4, games=1)
+    fill(principal, small, rounds=1, subrounds=1, games=1)
+    small_count = snapshot_statements(principal, small.id)
+
+    large = make_tournament(principal, pairs=24, games=4, name="large")
+    fill(principal, large, rounds=3, subrounds=3, games=4)
+    large_count = snapshot_statements(principal, large.id)
+
+    assert small_count == large_count
@@ -0,0 +1,113 @@
+"""
+In-process caches of the tokens: TTLCache and its use by token_auth
+"""
+
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import app.functions as functions
+import utils.cache
+from app.extensions import dbm
+from exceptions.UserExceptions import ObjectNotFoundException
+from utils.cache import TTLCache
+
+
+class Clock:
+    """
+    Replaces the time of utils.cache, moved only by advance
+    """
+
+    def __init__(self) -> None:
+        self.now = datetime.datetime.utcnow()
+
+    def utcnow(self) -> datetime.datetime:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += datetime.timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(utils.cache, "datetime", SimpleNamespace(datetime=clock))
+    return clock
+
+
+def insert_token(lifetime_sec: float) -> str:
+    token = f"token-{lifetime_sec}"
+    expires_in = datetime.datetime.utcnow() + datetime.timedelta(seconds=lifetime_sec)
+    dbm.insert_token(token, expires_in, "owner")
+    return token
+
+
+def test_entry_expires(clock):
+    cache = TTLCache()
+    cache.put("key", "value", clock.now + datetime.timedelta(seconds=10))
+    clock.advance(9)
+    assert cache.get("key") == "value"
+    clock.advance(1)
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_size_is_bounded_least_recently_used_first(clock):
+    cache = TTLCache(max_size=2)
+    expires_at = clock.now + datetime.timedelta(seconds=10)
+    cache.put("first", 1, expires_at)
+    cache.put("second", 2, expires_at)
+    cache.get("first")
+    cache.put("third", 3, expires_at)
+    assert len(cache) == 2
+    assert cache.get("second") is None
+    assert (cache.get("first"), cache.get("third")) == (1, 3)
+
+
+def test_zero_size_disables_the_cache(clock):
+    cache = TTLCache(max_size=0)
+    cache.put("key", "value", clock.now + datetime.timedelta(seconds=10))
+    assert cache.get("key") is None
+
+
+def test_entry_is_capped_at_token_expiration(principal, clock):
+    token = insert_token(lifetime_sec=dbm.revocation_refresh_sec / 2)
+    _, expires_in = dbm.get_principal_and_exptime_by_token(token)
+    assert dbm.token_cache.entries[token][1] == expires_in
+    clock.now = expires_in
+    assert dbm.token_cache.get(token) is None
+
+
+def test_entry_is_refreshed_from_the_database(principal, clock):
+    token = insert_token(lifetime_sec=3600)
+    functions.token_auth(token)
+    dbm.db.session.execute(  # As another process would, this cache misses it
+        dbm.models.Token.__table__.delete().where(dbm.models.Token.id == token)
+    )
+    dbm.db.session.commit()
+    assert functions.token_auth(token).uid == principal.uid  # Still cached
+    clock.advance(dbm.revocation_refresh_sec + 1)
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
+
+
+def test_token_is_rejected_after_logout(principal):
+    token = insert_token(lifetime_sec=3600)
+    functions.token_auth(token)  # Cached now
+    assert functions.logout(token).status_code == 200
+    assert dbm.token_cache.get(token) is None
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
+
+
+def test_token_of_deleted_user_is_rejected_after_refresh(principal, clock):
+    token = insert_token(lifetime_sec=3600)
+    functions.token_auth(token)
+    m = dbm.models
+    dbm.db.session.execute(m.Token.__table__.delete())
+    dbm.db.session.execute(m.User.__table__.delete())
+    dbm.db.session.commit()
+    clock.advance(dbm.revocation_refresh_sec + 1)
+    with pytest.raises(ObjectNotFoundException):
+        functions.token_auth(token)
@@ -0,0 +1,91 @@
+"""
+Line-by-line readers for the bulk import endpoints
+Rows are validated while the upload is streamed, broken lines are collected
+into the rejected list instead of aborting the whole import
+"""
+
+import csv
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from exceptions.UserExceptions import UserException
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def non_empty_str(value: Any) -> str:
+    value = str(value).strip()
+    if not value:
+        raise ValueError("empty string")
+    return value
+
+
+class ImportReader:
+    def __init__(
+        self, lines: Iterable[bytes], fmt: str, fields: List[Tuple[str, Callable]]
+    ) -> None:
+        """
+        :param lines: lines of the upload, UTF-8 encoded
+        :param fmt: "csv" (header row is optional) or "ndjson"
+        :param fields: names and converters of the expected columns
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise UserException(400, f"Unknown import format {fmt}")
+        self.lines = self.decode_lines(lines)
+        self.fmt = fmt
+        self.fields = fields
+        self.rejected: List[Dict[str, Any]] = []
+
+    def reject(self, line_no: int, reason: str) -> None:
+        self.rejected.append({"line": line_no, "reason": reason})
+
+    def decode_lines(self, lines: Iterable[bytes]) -> Iterator[str]:
+        """
+        Lines which are not UTF-8 are rejected and replaced with empty ones,
+        so the following lines keep their numbers
+        """
+        for line_no, line in enumerate(lines, start=1):
+            try:
+                yield line.decode("utf-8")
+            except UnicodeDecodeError as e:
+                self.reject(line_no, f"Not UTF-8: {e}")
+                yield "\n"
+
+    def convert(self, line_no: int, values: List[Any]):
+        if len(values) != len(self.fields):
+            self.reject(line_no, f"Expected {len(self.fields)} fields")
+            return None
+        try:
+            return tuple(
+                converter(value) for (_, converter), value in zip(self.fields, values)
+            )
+        except (TypeError, ValueError) as e:
+            self.reject(line_no, f"Bad value: {e}")
+            return None
+
+    def read_csv(self) -> Iterator[Tuple[int, List[Any]]]:
+        names = [name for name, _ in self.fields]
+        reader = csv.reader(self.lines)
+        for values in reader:
+            if not values:
+                continue
+            if reader.line_num == 1 and [v.strip() for v in values] == names:
+                continue
+            yield reader.line_num, values
+
+    def read_ndjson(self) -> Iterator[Tuple[int, List[Any]]]:
+        for line_no, line in enumerate(self.lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+                yield line_no, [item[name] for name, _ in self.fields]
+            except (ValueError, KeyError, TypeError) as e:
+                self.reject(line_no, f"Bad JSON line: {e}")
+
+    def __iter__(self) -> Iterator[Tuple[int, tuple]]:
+        rows = self.read_csv() if self.fmt == "csv" else self.read_ndjson()
+        for line_no, values in rows:
+            converted = self.convert(line_no, values)
+            if converted is not None:
+                yield (line_no,) + converted
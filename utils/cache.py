@@ -0,0 +1,113 @@
+import datetime
+import threading
+from collections import OrderedDict
+from datetime import datetime as DatetimeT
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Bounded LRU cache, every entry also expires at its own (UTC) time
+    Thread-safe, lives inside one process only
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size: int = max_size
+        self.entries: "OrderedDict[Hashable, Tuple[Any, DatetimeT]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= datetime.datetime.utcnow():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, expires_at: DatetimeT) -> None:
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class InvalidatedCache:
+    """
+    Bounded LRU cache without expiration, entries are dropped by the writers
+    A value read from the database is stored only if nothing was invalidated
+    since the read has started, so a concurrent write can't be overwritten
+    with the data it has replaced. Counts hits and misses
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size: int = max_size
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.invalidations: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], int]:
+        """
+        :return: cached value or None, and the stamp to pass to put
+        """
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value, self.invalidations
+
+    def put(self, key: Hashable, value: Any, stamp: int) -> None:
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            if stamp != self.invalidations:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self.lock:
+            self.invalidations += 1
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.invalidations += 1
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.entries),
+                "max size": self.max_size,
+            }
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -1,18 +1,39 @@
+"""
+Password hashing with bcrypt in a dedicated bounded thread pool, so a burst
+of logins keeps at most Config.BCRYPT_THREADS cores busy and the other
+requests are not starved. The cost factor is Config.BCRYPT_ROUNDS, hashes
+with another cost are rehashed on the next successful login
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
+from config import Config
+
+hashing_pool = ThreadPoolExecutor(Config.BCRYPT_THREADS, "bcrypt")
+
 
 def check_password(password: str, hashed: str) -> bool:
     password = password.encode("utf-8")
     hashed = hashed.encode("utf-8")
-    return bcrypt.checkpw(password, hashed)
+    return hashing_pool.submit(bcrypt.checkpw, password, hashed).result()
 
 
 def encrypt_password(password: str) -> str:
     password = password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password, salt)
+    salt = bcrypt.gensalt(Config.BCRYPT_ROUNDS)
+    hashed = hashing_pool.submit(bcrypt.hashpw, password, salt).result()
     return hashed.decode("utf-8")
 
 
+def needs_rehash(hashed: str) -> bool:
+    """
+    :param hashed: "$2b$<cost>$<salt and hash>"
+    :return: whether the hash was made with another cost than the configured one
+    """
+    return int(hashed.split("$")[2]) != Config.BCRYPT_ROUNDS
+
+
 def encrypt_string(string: str) -> str:
     return encrypt_password(string)
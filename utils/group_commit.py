@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Any, Callable, List, Tuple
+
+Outcome = Tuple[bool, Any]  # (success, returned value or exception)
+
+
+class PendingAction:
+    def __init__(self, action: Callable[[], Any]) -> None:
+        self.action = action
+        self.outcome: Outcome = (False, None)
+        self.done = threading.Event()
+
+
+class GroupCommitter:
+    """
+    Coalesces actions submitted by concurrent threads within a short window
+    into one batch, which is executed (and committed once) by run_batch in
+    the thread of the first submitter. Every submitter gets its own outcome
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Callable[[], Any]]], List[Outcome]],
+        window_sec: float,
+    ) -> None:
+        self.run_batch = run_batch
+        self.window_sec = window_sec
+        self.queue: List[PendingAction] = []
+        self.queue_lock = threading.Lock()
+        self.batch_lock = threading.Lock()  # One batch is executed at a time
+        self.leader_waiting = False
+
+    def submit(self, action: Callable[[], Any]) -> Any:
+        pending = PendingAction(action)
+        with self.queue_lock:
+            self.queue.append(pending)
+            is_leader = not self.leader_waiting
+            self.leader_waiting = True
+        if is_leader:
+            time.sleep(self.window_sec)
+            with self.batch_lock:
+                with self.queue_lock:
+                    batch, self.queue = self.queue, []
+                    self.leader_waiting = False
+                self.execute(batch)
+        pending.done.wait()
+        success, value = pending.outcome
+        if not success:
+            raise value
+        return value
+
+    def execute(self, batch: List[PendingAction]) -> None:
+        try:
+            outcomes = self.run_batch([pending.action for pending in batch])
+        except Exception as e:
+            outcomes = [(False, e)] * len(batch)
+        for pending, outcome in zip(batch, outcomes):
+            pending.outcome = outcome
+            pending.done.set()
@@ -0,0 +1,53 @@
+import random
+from typing import Dict, Hashable, Iterable, List
+
+
+class ShuffledPool:
+    """
+    Set of items kept in a uniformly random order, so taking k random items
+    is popping k from the end: O(k). Adding (inside-out Fisher-Yates step)
+    and discarding (swap with the last one) are O(1) and keep the order random
+    Not thread-safe
+    """
+
+    def __init__(self, items: Iterable[Hashable] = ()) -> None:
+        self.items: List[Hashable] = list(items)
+        random.shuffle(self.items)
+        self.positions: Dict[Hashable, int] = {
+            item: position for position, item in enumerate(self.items)
+        }
+
+    def add(self, item: Hashable) -> None:
+        if item in self.positions:
+            return
+        self.items.append(item)
+        self.positions[item] = len(self.items) - 1
+        self.swap(len(self.items) - 1, random.randrange(len(self.items)))
+
+    def discard(self, item: Hashable) -> None:
+        position = self.positions.get(item)
+        if position is None:
+            return
+        self.swap(position, len(self.items) - 1)
+        self.items.pop()
+        del self.positions[item]
+
+    def draw(self, k: int) -> List[Hashable]:
+        """
+        :return: k random items, removed from the pool
+        """
+        if k > len(self.items):
+            raise ValueError("Not enough items in the pool")
+        drawn = self.items[len(self.items) - k :]
+        del self.items[len(self.items) - k :]
+        for item in drawn:
+            del self.positions[item]
+        return drawn
+
+    def swap(self, i: int, j: int) -> None:
+        self.items[i], self.items[j] = self.items[j], self.items[i]
+        self.positions[self.items[i]] = i
+        self.positions[self.items[j]] = j
+
+    def __len__(self) -> int:
+        return len(self.items)
@@ -0,0 +1,66 @@
+"""
+Stateless session tokens: "<user id>.<expiration timestamp>.<token id>.<signature>"
+The signature is HMAC-SHA256 of the rest of the token with Config.SECRET_KEY,
+so a token can be checked without the token table. Anyone knowing the key
+can sign in as any user, so the signed mode needs an explicitly set secret key
+"""
+
+import datetime
+import hashlib
+import hmac
+import uuid
+from datetime import datetime as DatetimeT
+from typing import Optional, Tuple
+
+from config import Config, DEFAULT_SECRET_KEY
+
+SEPARATOR = "."
+
+
+def check_secret_key(secret_key: Optional[str]) -> None:
+    """
+    Raises RuntimeError if the key can't be used to sign tokens
+    """
+    if not secret_key or secret_key == DEFAULT_SECRET_KEY:
+        raise RuntimeError(
+            "TOKEN_MODE=signed needs the SECRET_KEY environment variable"
+            " set to a private value"
+        )
+
+
+def _sign(payload: str) -> str:
+    return hmac.new(
+        Config.SECRET_KEY.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def is_signed_token(token: str) -> bool:
+    return token.count(SEPARATOR) == 3
+
+
+def gen_signed_token(user_id: int) -> Tuple[str, DatetimeT]:
+    expires_in = datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(
+        seconds=Config.TOKEN_LIFETIME_SEC
+    )
+    expires_ts = int(expires_in.replace(tzinfo=datetime.timezone.utc).timestamp())
+    payload = SEPARATOR.join([str(user_id), str(expires_ts), uuid.uuid4().hex])
+    return payload + SEPARATOR + _sign(payload), expires_in
+
+
+def read_signed_token(token: str) -> Optional[Tuple[int, DatetimeT, str]]:
+    """
+    :param token: signed token
+    :return: (user id, expiration time, token id) if the signature is valid, None otherwise
+    Expiration time is not checked here
+    """
+    if not is_signed_token(token):
+        return None
+    payload, signature = token.rsplit(SEPARATOR, 1)
+    if not hmac.compare_digest(_sign(payload), signature):
+        return None
+    user_id, expires_ts, token_id = payload.split(SEPARATOR)
+    try:
+        expires_in = datetime.datetime.utcfromtimestamp(int(expires_ts))
+        return int(user_id), expires_in, token_id
+    except ValueError:
+        return None
@@ -0,0 +1,50 @@
+"""
+Production profile for SQLite: pragmas applied to every new connection
+and a pool which keeps the connections (and so their page caches) open
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+IN_MEMORY_URIS = ("sqlite://", "sqlite:///:memory:")
+
+
+def is_sqlite_file(uri: str) -> bool:
+    return uri.startswith("sqlite") and uri not in IN_MEMORY_URIS
+
+
+def sqlite_engine_options(pool_size: int) -> Dict[str, Any]:
+    """
+    :param pool_size: amount of kept connections, 0 opens a connection per session
+    :return: SQLALCHEMY_ENGINE_OPTIONS for a file database
+    """
+    if pool_size <= 0:
+        return {}
+    return {
+        "poolclass": QueuePool,
+        "pool_size": pool_size,
+        "max_overflow": pool_size,
+        "connect_args": {"check_same_thread": False},  # The pool hands it over
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """
+    Runs "PRAGMA name=value" on every new connection of the engine,
+    pragmas with empty values keep the SQLite defaults
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    statements = [
+        f"PRAGMA {name}={value}" for name, value in pragmas.items() if value != ""
+    ]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
@@ -1,5 +1,6 @@
-from typing import List, Set, Any, Tuple
+from typing import List, Set, Any, Tuple, Iterable, Iterator
 import random
+import unicodedata
 
 import datetime
 from datetime import datetime as DatetimeT
@@ -48,6 +49,14 @@ def gen_rand_key() -> int:
     return random.randint(-Config.RANDOM_BORDER, Config.RANDOM_BORDER)
 
 
+def normalize_word(text: str) -> str:
+    """
+    Form of a word or a player name used to detect duplicates:
+    compatibility-normalized, case-folded, with collapsed whitespace
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
 def str_list(
     items: List[Any], prefix: str = "", separator: str = "\n", suffix: str = ""
 ) -> str:
@@ -57,3 +66,14 @@ def str_list(
 def take_n_random_from_set(values: Set[Any], k: int) -> List[Any]:
     assert len(values) >= k
     return random.choices(list(values), k=k)
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
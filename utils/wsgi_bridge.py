@@ -0,0 +1,176 @@
+"""
+Serves a WSGI app from an ASGI server: the app runs in a thread pool,
+the event loop only moves the bytes. Unlike a single sync thread, the pool
+lets slow requests (e.g. bcrypt logins) run next to each other
+"""
+
+import asyncio
+import itertools
+import sys
+import threading
+from concurrent.futures import Executor
+from tempfile import SpooledTemporaryFile
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+ASGIReceive = Callable[[], Any]
+ASGISend = Callable[[Dict], Any]
+
+BODY_IN_MEMORY = 2**20  # Larger request bodies are spooled to disk
+RESPONSE_CHUNK = 2**16  # Streamed responses are sent in chunks of this size
+RESPONSE_QUEUE = 2  # Chunks read ahead of the client
+
+
+async def read_body(receive: ASGIReceive) -> IO[bytes]:
+    body = SpooledTemporaryFile(max_size=BODY_IN_MEMORY)
+    while True:
+        message = await receive()
+        body.write(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    body.seek(0)
+    return body
+
+
+def build_environ(scope: Dict, body: IO[bytes]) -> Dict[str, Any]:
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": scope["client"][0] if scope.get("client") else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope["headers"]:
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+def start_wsgi(
+    wsgi_app: Callable, environ: Dict
+) -> Tuple[int, List[Tuple[bytes, bytes]], Iterator[bytes], Optional[Callable]]:
+    """
+    :return: status code, headers, the body iterator of the response
+    and the close() of the WSGI iterable, if it has one
+    """
+    started: List = []
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+        started[:] = [status, headers]
+        return lambda data: None  # The legacy write() callable is not supported
+
+    iterable = wsgi_app(environ, start_response)
+    body = iter(iterable)
+    first = next(body, b"")  # Lazy apps call start_response only now
+    status, headers = started
+    encoded = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers
+    ]
+    return (
+        int(status.split(" ", 1)[0]),
+        encoded,
+        itertools.chain([first], body),
+        getattr(iterable, "close", None),
+    )
+
+
+def next_chunk(body: Iterator[bytes]) -> Optional[bytes]:
+    """
+    :return: joined pieces of the body up to RESPONSE_CHUNK bytes, None at the end
+    """
+    pieces, size = [], 0
+    for piece in body:
+        pieces.append(piece)
+        size += len(piece)
+        if size >= RESPONSE_CHUNK:
+            break
+    return b"".join(pieces) if pieces else None
+
+
+def serve_wsgi(wsgi_app: Callable, environ: Dict, put: Callable[[Any], bool]) -> None:
+    """
+    Runs the whole response on the calling thread: the start, every chunk and
+    close(), as Flask's stream_with_context pops its context on the thread which
+    pushed it. Hands (status, headers), the chunks, then None (or the exception)
+    to put, which returns False once the client is gone
+    """
+    close = None
+    try:
+        status, headers, body, close = start_wsgi(wsgi_app, environ)
+        if not put((status, headers)):
+            return
+        while True:
+            chunk = next_chunk(body)
+            if not put(chunk) or chunk is None:
+                return
+    except Exception as e:
+        put(e)
+    finally:
+        if close is not None:
+            close()
+
+
+async def run_wsgi(
+    wsgi_app: Callable,
+    scope: Dict,
+    body: IO[bytes],
+    send: ASGISend,
+    executor: Executor,
+) -> int:
+    """
+    Runs the request through the WSGI app on one thread of the executor
+    and sends the response, the chunks come through a small queue
+    :return: status code of the response
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(RESPONSE_QUEUE)
+    gone = threading.Event()
+
+    def put(item: Any) -> bool:
+        if gone.is_set():
+            return False
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        return not gone.is_set()
+
+    async def get() -> Any:
+        item = await queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    served = loop.run_in_executor(
+        executor, serve_wsgi, wsgi_app, build_environ(scope, body), put
+    )
+    try:
+        status, headers = await get()
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        while True:
+            chunk = await get()
+            if chunk is None:
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    except BaseException:
+        gone.set()
+        while not queue.empty():  # Unblocks the thread, it stops at its next put
+            queue.get_nowait()
+        served.add_done_callback(lambda future: future.exception())
+        raise
+    await served  # close() has run
+    await send({"type": "http.response.body"})
+    return status